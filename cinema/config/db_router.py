@@ -0,0 +1,59 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_use_replica = ContextVar("use_replica", default=False)
+
+
+def start_replica_reads():
+    """
+    Send the following reads to a read replica, if any is configured.
+
+    Returns:
+        Token: To pass to `stop_replica_reads`.
+    """
+    return _use_replica.set(True)
+
+
+def stop_replica_reads(token):
+    """
+    Send reads back to where they went before the matching `start_replica_reads`.
+    """
+    _use_replica.reset(token)
+
+
+@contextmanager
+def read_from_replica():
+    """
+    Send the reads made inside this block to a read replica, if any is configured.
+    """
+    token = start_replica_reads()
+    try:
+        yield
+    finally:
+        stop_replica_reads(token)
+
+
+class ReplicaRouter:
+    """
+    Database router sending reads to a random replica inside `read_from_replica` blocks.
+
+    Everything else, writes and migrations included, goes to the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the default database
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
@@ -0,0 +1,12 @@
+"""
+Settings profiles trimming the base settings for a single role.
+
+Each profile starts from ``config.settings`` and only keeps the apps, middleware
+and renderers that role needs, so its processes start faster and use less memory:
+
+- ``config.profiles.api``: JSON API workers.
+- ``config.profiles.admin``: Django admin workers.
+- ``config.profiles.importer``: management commands and job workers, no HTTP.
+
+Select one with DJANGO_SETTINGS_MODULE, e.g. ``DJANGO_SETTINGS_MODULE=config.profiles.api``.
+"""
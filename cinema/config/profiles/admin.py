@@ -0,0 +1,13 @@
+"""
+Settings for workers serving the Django admin (and the API to logged in staff).
+"""
+
+from config.settings import *  # noqa: F401,F403
+from config.settings import INSTALLED_APPS, REST_FRAMEWORK
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app != "drf_yasg"]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+}
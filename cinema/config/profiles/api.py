@@ -0,0 +1,33 @@
+"""
+Settings for workers only serving the JSON API, authenticated with JWT.
+"""
+
+from config.settings import *  # noqa: F401,F403
+from config.settings import REST_FRAMEWORK
+
+INSTALLED_APPS = [
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "rest_framework",
+    "rest_framework_simplejwt",
+    "films",
+]
+
+MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "films.middleware.CompressionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_AUTHENTICATION_CLASSES": (
+        "films.authentication.CachedJWTAuthentication",
+    ),
+    # JSON and the binary formats, without the browsable API
+    "DEFAULT_RENDERER_CLASSES": [
+        renderer
+        for renderer in REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"]
+        if renderer != "rest_framework.renderers.BrowsableAPIRenderer"
+    ],
+}
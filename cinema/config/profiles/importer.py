@@ -0,0 +1,14 @@
+"""
+Settings for management commands and job workers (TMDb import, recommendations...).
+"""
+
+from config.settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "films",
+]
+
+# No HTTP requests are served
+MIDDLEWARE = []
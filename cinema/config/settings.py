@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import importlib.util
 import os
 from datetime import timedelta
 from pathlib import Path
@@ -27,9 +28,14 @@ load_dotenv()
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY")
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# DEBUG also keeps every SQL query in memory, set DJANGO_DEBUG=False when serving with gunicorn.
+DEBUG = os.getenv("DJANGO_DEBUG", "True") == "True"
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.getenv("DJANGO_ALLOWED_HOSTS", "").split(",")
+    if host.strip()
+]
 
 
 # Application definition
@@ -49,6 +55,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "films.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -88,9 +95,47 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        # Seconds a connection is reused across requests, 0 closes it after each request
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        # Check reused connections before each request instead of failing on a dropped one
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "True") == "True",
     }
 }
 
+# Connection pool (psycopg 3), shared by the threads of a process.
+# It replaces persistent connections when DB_POOL_MAX_SIZE is set.
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "0"))
+
+if DB_POOL_MAX_SIZE:
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": DB_POOL_MAX_SIZE,
+            # Seconds a request waits for a free connection before failing
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        }
+    }
+
+# Read replicas: a comma-separated list of hosts sharing the default database settings
+REPLICA_HOSTS = [
+    host.strip() for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host.strip()
+]
+DATABASE_REPLICAS = []
+for number, host in enumerate(REPLICA_HOSTS, 1):
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["config.db_router.ReplicaRouter"]
+# Seconds a client keeps reading from the primary database after a write
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+REPLICA_PIN_COOKIE = "db_pin"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -127,6 +172,46 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = "static/"
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# Uploaded files. Avatar variants have their own storage, so they can be moved
+# to an object store or CDN without touching the other uploads.
+MEDIA_URL = "media/"
+MEDIA_ROOT = Path(os.getenv("MEDIA_ROOT", BASE_DIR / "media"))
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+    },
+    "avatars": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {
+            "location": MEDIA_ROOT / "avatars" / "variants",
+            "base_url": f"/{MEDIA_URL}avatars/variants/",
+        },
+    },
+    "images": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {
+            "location": MEDIA_ROOT / "images",
+            "base_url": f"/{MEDIA_URL}images/",
+        },
+    },
+}
+# Side of the square avatar variants, in pixels, and the one used by default
+AVATAR_SIZES = [48, 128, 512]
+AVATAR_DEFAULT_SIZE = 128
+# Widths of the TMDb poster and backdrop variants, in pixels
+POSTER_SIZES = [185, 342, 780]
+BACKDROP_SIZES = [300, 780, 1280]
+
+if not DEBUG:
+    # runserver serves static files in development, gunicorn workers rely on WhiteNoise
+    MIDDLEWARE.insert(1, "whitenoise.middleware.WhiteNoiseMiddleware")
+    # Compressed copies and hashed names, so static files can be cached forever
+    STORAGES["staticfiles"] = {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"
+    }
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -137,17 +222,114 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.AllowAny",),
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "films.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_RENDERER_CLASSES": [
         "rest_framework.renderers.JSONRenderer",
+        "films.renderers.MessagePackRenderer",
         "rest_framework.renderers.BrowsableAPIRenderer",
     ],
+    "DEFAULT_PARSER_CLASSES": [
+        "rest_framework.parsers.JSONParser",
+        "films.renderers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    "DEFAULT_PAGINATION_CLASS": "films.pagination.EstimatedCountPagination",
+    "DEFAULT_THROTTLE_CLASSES": ["films.throttling.TokenBucketThrottle"],
+    # "<requests>/<period>:<burst>": sustained rate, and the requests allowed back to back
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": os.getenv("THROTTLE_ANON_RATE", "120/min:30"),
+        "user": os.getenv("THROTTLE_USER_RATE", "600/min:100"),
+        "search": os.getenv("THROTTLE_SEARCH_RATE", "30/min:10"),
+        "ratings": os.getenv("THROTTLE_RATINGS_RATE", "30/min:10"),
+    },
+    # Reverse proxies in front of the app: anonymous clients are identified by the
+    # address the last of them saw, never by an X-Forwarded-For they could forge
+    "NUM_PROXIES": int(os.getenv("THROTTLE_NUM_PROXIES", "0")),
 }
 
+# CBOR is optional (films[binary] extra)
+if importlib.util.find_spec("cbor2") is not None:
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].insert(2, "films.renderers.CBORRenderer")
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"].insert(2, "films.renderers.CBORParser")
+
+# Response compression (films.middleware.CompressionMiddleware), Brotli when installed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_MAX_SIZE = int(os.getenv("COMPRESSION_MAX_SIZE", str(10 * 1024 * 1024)))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_CONTENT_TYPES = [
+    "application/json",
+    "application/msgpack",
+    "application/cbor",
+    # Not text/html: the browsable API pages hold a CSRF token (BREACH)
+    "text/plain",
+]
+
+# Above this many rows, unfiltered listings report the planner estimate instead of COUNT(*)
+ESTIMATED_COUNT_THRESHOLD = int(os.getenv("ESTIMATED_COUNT_THRESHOLD", "100000"))
+# Maximum number of resource requests in a POST /api/batch/ body
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "50"))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
+    "TOKEN_OBTAIN_SERIALIZER": "films.authentication.CinemaTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "films.authentication.CinemaTokenRefreshSerializer",
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# A shared Redis cache is used when REDIS_URL is set, a per-process memory cache otherwise.
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Seconds an authenticated user is served from the cache instead of the database
+JWT_USER_CACHE_TIMEOUT = int(os.getenv("JWT_USER_CACHE_TIMEOUT", "60"))
+
 LOGIN_REDIRECT_URL = "/api/"
+
+TMDB_API_KEY = os.getenv("TMDB_API_KEY")
+TMDB_IMAGE_BASE_URL = "https://image.tmdb.org/t/p/original"
+# Concurrent image downloads of the download_movie_images job
+TMDB_IMAGE_WORKERS = int(os.getenv("TMDB_IMAGE_WORKERS", "8"))
+
+# Recommendations
+RECOMMENDATIONS_TOP_K = int(os.getenv("RECOMMENDATIONS_TOP_K", "20"))
+# Lowest rating counted as a spectator liking a movie
+RECOMMENDATIONS_MIN_RATING = int(os.getenv("RECOMMENDATIONS_MIN_RATING", "6"))
+
+# Content-based similar movies index (memory-mapped .npy files)
+CONTENT_INDEX_DIR = Path(
+    os.getenv("CONTENT_INDEX_DIR", BASE_DIR / "var" / "content_index")
+)
+CONTENT_INDEX_FEATURES = 2**18
+
+# Background jobs
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+JOB_RETRY_DELAY = int(os.getenv("JOB_RETRY_DELAY", "30"))
+# Seconds after which a running job is deemed lost with its worker, and requeued
+JOB_TIMEOUT = int(os.getenv("JOB_TIMEOUT", "3600"))
+
+# Change events (transactional outbox) and their delivery to webhooks
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "100"))
+WEBHOOK_POLL_INTERVAL = float(os.getenv("WEBHOOK_POLL_INTERVAL", "1"))
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "10"))
+WEBHOOK_RETRY_MAX_DELAY = int(os.getenv("WEBHOOK_RETRY_MAX_DELAY", "3600"))
+WEBHOOK_MAX_FAILURES = int(os.getenv("WEBHOOK_MAX_FAILURES", "20"))
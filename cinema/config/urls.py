@@ -36,15 +36,18 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
-from django.contrib import admin
-from django.urls import include, path
+from django.apps import apps
+from django.conf import settings
+from django.conf.urls.static import static
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import (TokenObtainPairView,
                                             TokenRefreshView)
 
-from films.views import (AuthorViewSet, FavoriteViewSet, LogoutView,
+from films.views import (AuthorViewSet, BatchView, ChangesView,
+                         DatabaseStatusView, FavoriteViewSet, LogoutView,
                          MovieViewSet, RatingViewSet, SpectatorViewSet,
-                         UserViewSet)
+                         UserViewSet, hashed_media)
 
 router = DefaultRouter()
 router.register(r"movies", MovieViewSet, basename="movie")
@@ -54,10 +57,34 @@ router.register(r"spectators", SpectatorViewSet, basename="spectator")
 router.register(r"rating", RatingViewSet, basename="rating")
 router.register(r"users", UserViewSet, basename="user")
 urlpatterns = [
-    path("admin/", admin.site.urls),
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("api/", include(router.urls)),
-    path("api-auth/", include("rest_framework.urls", namespace="rest_framework")),
     path("api/logout/", LogoutView.as_view(), name="logout"),
+    path("api/health/db/", DatabaseStatusView.as_view(), name="database_status"),
+    path("api/changes/", ChangesView.as_view(), name="changes"),
+    path("api/batch/", BatchView.as_view(), name="batch"),
 ]
+# Image variants, named by content hash (see films.images)
+for storage, prefix in [("avatars", "avatars/variants/"), ("images", "images/")]:
+    urlpatterns.append(
+        re_path(
+            rf"^{settings.MEDIA_URL.lstrip('/')}{prefix}"
+            r"(?P<name>[0-9a-f]{32}\.(?:webp|jpg))$",
+            hashed_media,
+            {"storage": storage},
+            name=f"{storage}_variant",
+        )
+    )
+# Original uploads are only served by Django in development
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+# Settings profiles without the admin or sessions (config.profiles) skip these routes
+if apps.is_installed("django.contrib.admin"):
+    from django.contrib import admin
+
+    urlpatterns.append(path("admin/", admin.site.urls))
+if apps.is_installed("django.contrib.sessions"):
+    urlpatterns.append(
+        path("api-auth/", include("rest_framework.urls", namespace="rest_framework"))
+    )
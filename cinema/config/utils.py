@@ -1,11 +1,5 @@
-import os
-
 import requests
-from dotenv import load_dotenv
-
-load_dotenv()
-
-API_KEY = os.getenv("TMDB_API_KEY")
+from django.conf import settings
 
 
 def get_tmdb_data(endpoint, params=None):
@@ -24,7 +18,7 @@ def get_tmdb_data(endpoint, params=None):
     """
     url = f"https://api.themoviedb.org/3/{endpoint}"
     headers = {
-        "Authorization": f"Bearer {API_KEY}",
+        "Authorization": f"Bearer {settings.TMDB_API_KEY}",
         "Content-Type": "application/json;charset=utf-8",
     }
 
@@ -35,3 +29,21 @@ def get_tmdb_data(endpoint, params=None):
     else:
         print(f"TMDb API error: {response.status_code} - {response.text}")
         response.raise_for_status()
+
+
+def get_tmdb_image(path):
+    """
+    Download an image from the TMDb image server, in its original size.
+
+    Args:
+        path (str): The image path given by the API (e.g., '/kqjL17yufvn9OVLyXYpvtyrFfak.jpg').
+
+    Returns:
+        bytes: The image file.
+
+    Raises:
+        HTTPError: If the request fails.
+    """
+    response = requests.get(f"{settings.TMDB_IMAGE_BASE_URL}{path}", timeout=30)
+    response.raise_for_status()
+    return response.content
@@ -0,0 +1,6 @@
+#!/bin/sh
+# Production entrypoint: collect the static files, then serve with gunicorn.
+set -e
+
+python manage.py collectstatic --noinput
+exec gunicorn --config gunicorn.conf.py config.wsgi:application
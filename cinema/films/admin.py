@@ -1,8 +1,21 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.admin import SimpleListFilter
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch
+from django.forms.models import BaseInlineFormSet
+from django.shortcuts import redirect
+from django.urls import path
+from django.utils import timezone
+
+from .bulk import update_returning_ids
+from .jobs import enqueue
 
 # Register your models here.
-from .models import Author, Favorite, Movie, Rating, Spectator, Users
+from .models import (Author, Favorite, Job, Movie, Rating, Spectator, Users,
+                     Webhook)
+from .outbox import emit_many
+from .pagination import EstimatedCountPaginator
 
 
 class HasMoviesFilter(SimpleListFilter):
@@ -20,14 +33,55 @@ class HasMoviesFilter(SimpleListFilter):
         )
 
     def queryset(self, request, queryset):
+        has_movies = Exists(
+            Movie.authors.through.objects.filter(users_id=OuterRef("pk"))
+        )
         if self.value() == "yes":
-            return queryset.filter(movies__isnull=False).distinct()
+            return queryset.filter(has_movies)
         if self.value() == "no":
-            return queryset.filter(movies__isnull=True)
+            return queryset.filter(~has_movies)
         return queryset
 
 
-class MovieAuthorsInline(admin.TabularInline):
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """
+    Inline formset showing one page of related objects instead of all of them.
+    """
+
+    per_page = 20
+    page_number = 1
+
+    def get_queryset(self):
+        if not hasattr(self, "_page"):
+            paginator = Paginator(super().get_queryset(), self.per_page)
+            self._page = paginator.get_page(self.page_number)
+        return self._page.object_list
+
+    @property
+    def page(self):
+        self.get_queryset()
+        return self._page
+
+
+class PaginatedTabularInline(admin.TabularInline):
+    """
+    Tabular inline paginated with a `<prefix>-page` query parameter.
+    """
+
+    formset = PaginatedInlineFormSet
+    template = "admin/films/edit_inline/paginated_tabular.html"
+    per_page = 20
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.page_number = request.GET.get(
+            f"{formset.get_default_prefix()}-page", 1
+        )
+        return formset
+
+
+class MovieAuthorsInline(PaginatedTabularInline):
     """
     Inline for displaying authors of a movie.
     """
@@ -37,10 +91,11 @@ class MovieAuthorsInline(admin.TabularInline):
     verbose_name = "Film"
     verbose_name_plural = "Films"
     fields = ["movie"]
+    raw_id_fields = ["movie"]
     show_change_link = True
 
 
-class MovieRatingInline(admin.TabularInline):
+class MovieRatingInline(PaginatedTabularInline):
     """
     Inline for displaying ratings related to a movie.
     """
@@ -49,6 +104,7 @@ class MovieRatingInline(admin.TabularInline):
     fk_name = "movie"
     extra = 0
     fields = ["spectator", "rating"]
+    raw_id_fields = ["spectator"]
     show_change_link = True
 
     def formfield_for_foreignkey(self, db_field, request=None, **kwargs):
@@ -67,9 +123,10 @@ class AuthorInline(admin.TabularInline):
     verbose_name = "Author"
     verbose_name_plural = "Authors"
     fields = ["users"]
+    raw_id_fields = ["users"]
 
 
-class FavoriteInline(admin.TabularInline):
+class FavoriteInline(PaginatedTabularInline):
     """
     Inline for displaying favorite movies of a spectator.
     """
@@ -78,6 +135,7 @@ class FavoriteInline(admin.TabularInline):
     fk_name = "spectator"
     extra = 0
     fields = ["movie"]
+    raw_id_fields = ["movie"]
     show_change_link = True
 
     def formfield_for_foreignkey(self, db_field, request=None, **kwargs):
@@ -139,9 +197,18 @@ class MovieAdmin(admin.ModelAdmin):
         "original_title",
         "original_language",
     ]
-    list_filter = ["status", "release_date", "rating"]
+    list_filter = ["state", "status", "release_date", "rating"]
     search_fields = ["title", "overview"]
     inlines = [MovieRatingInline, AuthorInline]
+    actions = ["recompute_ratings", "archive_movies", "unarchive_movies"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.prefetch_related(
+            Prefetch("authors", queryset=Users.objects.only("id", "username"))
+        )
 
     def get_authors(self, obj):
         """
@@ -151,6 +218,45 @@ class MovieAdmin(admin.ModelAdmin):
 
     get_authors.short_description = "Authors movie"
 
+    @admin.action(description="Recompute spectator ratings of selected movies")
+    def recompute_ratings(self, request, queryset):
+        """
+        Enqueue a background job recomputing the rating aggregates of the selected movies.
+        """
+        movie_ids = list(queryset.values_list("pk", flat=True))
+        enqueue("recompute_movie_ratings", movie_ids=movie_ids)
+        self.message_user(
+            request, f"Rating recompute queued for {len(movie_ids)} movie(s)."
+        )
+
+    @admin.action(description="Archive selected movies")
+    def archive_movies(self, request, queryset):
+        """
+        Archive the selected movies in a single UPDATE statement.
+        """
+        with transaction.atomic():
+            movie_ids = update_returning_ids(
+                Movie, {"state": "archived"}, queryset=queryset
+            )
+            emit_many("movie.changed", movie_ids, state="archived")
+        self.message_user(
+            request, f"{len(movie_ids)} movie(s) archived.", messages.SUCCESS
+        )
+
+    @admin.action(description="Unarchive selected movies")
+    def unarchive_movies(self, request, queryset):
+        """
+        Restore the selected movies to the live catalog in a single UPDATE statement.
+        """
+        with transaction.atomic():
+            movie_ids = update_returning_ids(
+                Movie, {"state": "active"}, queryset=queryset
+            )
+            emit_many("movie.changed", movie_ids, state="active")
+        self.message_user(
+            request, f"{len(movie_ids)} movie(s) unarchived.", messages.SUCCESS
+        )
+
 
 @admin.register(Rating)
 class RatingAdmin(admin.ModelAdmin):
@@ -160,6 +266,10 @@ class RatingAdmin(admin.ModelAdmin):
 
     list_display = ["spectator", "movie", "rating"]
     list_filter = ["rating"]
+    list_select_related = ["spectator", "movie"]
+    raw_id_fields = ["spectator", "movie"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     search_fields = ["spectator__username", "movie__title"]
 
 
@@ -170,4 +280,68 @@ class FavoriteAdmin(admin.ModelAdmin):
     """
 
     list_display = ["spectator", "movie"]
+    list_select_related = ["spectator", "movie"]
+    raw_id_fields = ["spectator", "movie"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     search_fields = ["spectator__username", "movie__title"]
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for Job model.
+    Also provides a button to enqueue a TMDb import.
+    """
+
+    list_display = ["name", "status", "attempts", "run_at", "finished_at"]
+    list_filter = ["status", "name"]
+    readonly_fields = ["attempts", "started_at", "finished_at", "last_error"]
+    actions = ["retry_jobs"]
+
+    def get_urls(self):
+        urls = [
+            path(
+                "import-tmdb/",
+                self.admin_site.admin_view(self.import_tmdb_view),
+                name="films_job_import_tmdb",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def import_tmdb_view(self, request):
+        """
+        Enqueue a TMDb import job and go back to the job list.
+        """
+        if request.method == "POST":
+            enqueue("import_tmdb")
+            self.message_user(request, "TMDb import queued.")
+        return redirect("admin:films_job_changelist")
+
+    @admin.action(description="Retry selected jobs")
+    def retry_jobs(self, request, queryset):
+        """
+        Queue the selected jobs again, resetting their attempts.
+        """
+        count = queryset.update(
+            status="queued", attempts=0, last_error="", run_at=timezone.now()
+        )
+        self.message_user(request, f"{count} job(s) queued again.", messages.SUCCESS)
+
+
+@admin.register(Webhook)
+class WebhookAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for Webhook model.
+    """
+
+    list_display = [
+        "url",
+        "is_active",
+        "cursor_transaction_id",
+        "cursor",
+        "failures",
+        "retry_at",
+    ]
+    list_filter = ["is_active"]
+    readonly_fields = ["failures", "last_error", "created_at"]
@@ -12,3 +12,9 @@ class FilmsConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "films"
+
+    def ready(self):
+        """
+        Register the system checks, background job tasks and signal handlers.
+        """
+        from . import checks, signals, tasks  # noqa: F401
@@ -0,0 +1,148 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import (TokenObtainPairSerializer,
+                                                  TokenRefreshSerializer)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import (aware_utcnow, datetime_from_epoch,
+                                            get_md5_hash_password)
+
+from .models import RevokedToken
+
+
+def user_cache_key(user_id):
+    """
+    Return the cache key of an authenticated user.
+    """
+    return f"jwt-user:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    """
+    Remove a user from the authentication cache, e.g. after it was saved or deleted.
+    """
+    cache.delete(user_cache_key(user_id))
+
+
+def blacklist_cache_key(jti):
+    """
+    Return the cache key of the blacklist state of a token.
+    """
+    return f"jwt-blacklist:{jti}"
+
+
+def cache_blacklisted(token, blacklisted=True):
+    """
+    Record in the cache whether a token is blacklisted.
+
+    Blacklisting overwrites a cached "not blacklisted", while the "not
+    blacklisted" found by a check is only added if the key is missing: a check
+    racing with the blacklisting of the token never overwrites it. Blacklisted
+    tokens are cached until they expire, the others for JWT_USER_CACHE_TIMEOUT
+    seconds at most, which bounds how long a per-process cache accepts a token
+    blacklisted by another process.
+    """
+    expires_at = datetime_from_epoch(token["exp"])
+    timeout = (expires_at - aware_utcnow()).total_seconds()
+    if timeout <= 0:
+        return
+    key = blacklist_cache_key(token[api_settings.JTI_CLAIM])
+    if blacklisted:
+        cache.set(key, True, timeout)
+    else:
+        cache.add(key, False, min(timeout, settings.JWT_USER_CACHE_TIMEOUT))
+
+
+def blacklist_token(token):
+    """
+    Blacklist a refresh token.
+
+    The token is stored in the database, which survives restarts, and in the
+    cache, which answers most checks. Both entries only live until the token
+    expires, so they never outlive REFRESH_TOKEN_LIFETIME.
+
+    Args:
+        token (RefreshToken): The token to blacklist.
+
+    Returns:
+        bool: False if the token was already blacklisted.
+    """
+    _, created = RevokedToken.objects.get_or_create(
+        jti=token[api_settings.JTI_CLAIM],
+        defaults={"expires_at": datetime_from_epoch(token["exp"])},
+    )
+    cache_blacklisted(token)
+    return created
+
+
+def is_token_blacklisted(token):
+    """
+    Return True if a refresh token was blacklisted.
+
+    The answer is cached whether the token is blacklisted or not (see
+    `cache_blacklisted`), so most checks run no query. The others run a unique
+    index lookup on a table that only holds unexpired tokens (see the
+    purge_blacklist command).
+    """
+    blacklisted = cache.get(blacklist_cache_key(token[api_settings.JTI_CLAIM]))
+    if blacklisted is None:
+        blacklisted = RevokedToken.objects.filter(
+            jti=token[api_settings.JTI_CLAIM]
+        ).exists()
+        cache_blacklisted(token, blacklisted)
+    return blacklisted
+
+
+class CinemaTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Token serializer adding the username claim to issued tokens.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["username"] = user.username
+        return token
+
+
+class CinemaTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh serializer rejecting blacklisted refresh tokens.
+    """
+
+    def validate(self, attrs):
+        if is_token_blacklisted(self.token_class(attrs["refresh"])):
+            raise InvalidToken("Token is blacklisted")
+        return super().validate(attrs)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication serving `request.user` from the cache.
+
+    The user is loaded from the database on the first request only, then kept
+    for `JWT_USER_CACHE_TIMEOUT` seconds. Saving or deleting the user removes it
+    from the cache (see films.signals): with a shared cache (REDIS_URL), role or
+    status changes apply at once. With the per-process memory cache, the other
+    processes keep the old user until the entry expires, which the films.W001
+    deployment check warns about.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.JWT_USER_CACHE_TIMEOUT)
+            return user
+
+        # The token specific checks still apply to a cached user
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                "The user's password has been changed.", code="password_changed"
+            )
+        return user
@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.files.storage import storages
+from django.db import transaction
+
+from .images import make_variants, pick_variant
+from .models import Users
+
+
+def make_avatar_variants(user_id):
+    """
+    Make the square WebP and JPEG variants of a user's avatar.
+
+    The variants are stored in the 'avatars' storage, see `make_variants`.
+    Their names are saved in `Users.avatar_variants` with the avatar they were
+    made from. The variants of an avatar replaced in the meantime are not saved.
+
+    Args:
+        user_id (int): The user whose avatar is resized.
+
+    Returns:
+        int: The number of variants made.
+    """
+    user = Users.objects.filter(pk=user_id).first()
+    if user is None or not user.avatar:
+        return 0
+    source = user.avatar.name
+    with user.avatar.open("rb") as avatar:
+        sizes = make_variants(
+            storages["avatars"], avatar, settings.AVATAR_SIZES, square=True
+        )
+
+    # Jobs run outside a transaction: the change event of the save (post_save)
+    # must be committed with it
+    with transaction.atomic():
+        user.refresh_from_db(fields=["avatar"])
+        if user.avatar.name != source:
+            return 0
+        user.avatar_variants = {"source": source, "sizes": sizes}
+        # save() rather than update(), so the cached authenticated user is dropped
+        user.save(update_fields=["avatar_variants"])
+    return sum(len(formats) for formats in sizes.values())
+
+
+def avatar_variant_url(user, size=None, image_format="webp"):
+    """
+    Return the URL of the avatar variant best matching a size.
+
+    Until the variants of the current avatar are made, the URL of the original
+    avatar is returned.
+
+    Args:
+        user (Users): The avatar owner.
+        size (int, optional): Wanted side in pixels, `AVATAR_DEFAULT_SIZE` by default.
+        image_format (str): 'webp' or 'jpeg'.
+
+    Returns:
+        str or None: The URL, or None when the user has no avatar.
+    """
+    if not user.avatar:
+        return None
+    variants = user.avatar_variants or {}
+    name = None
+    if variants.get("source") == user.avatar.name:
+        size = size or settings.AVATAR_DEFAULT_SIZE
+        name = pick_variant(variants["sizes"], size, image_format)
+    if name is None:
+        return user.avatar.url
+    return storages["avatars"].url(name)
@@ -0,0 +1,213 @@
+from collections import defaultdict
+
+from .models import Favorite, Movie, Rating, Users
+from .serializers import BatchMovieSerializer, BatchUserSerializer
+
+
+class DataLoader:
+    """
+    Load objects by key for a batch request, with one query for all the keys.
+
+    Keys are queued with `load_many` while the batch is resolved, then
+    `dispatch` loads the queued keys that are not cached yet with a single
+    call of `batch_load`, like the DataLoader of GraphQL servers.
+
+    Args:
+        batch_load (callable): Takes a set of keys and returns a dict of the
+            values found, by key. Missing keys are cached as None.
+    """
+
+    def __init__(self, batch_load):
+        self.batch_load = batch_load
+        self.cache = {}
+        self.queue = set()
+
+    def load_many(self, keys):
+        self.queue.update(key for key in keys if key not in self.cache)
+
+    def dispatch(self):
+        if not self.queue:
+            return
+        found = self.batch_load(self.queue)
+        self.cache.update({key: found.get(key) for key in self.queue})
+        self.queue = set()
+
+    def get(self, key):
+        return self.cache.get(key)
+
+
+def load_movies(movie_ids):
+    return Movie.all_objects.in_bulk(movie_ids)
+
+
+def load_users(user_ids):
+    return Users.objects.in_bulk(user_ids)
+
+
+def load_movie_authors(movie_ids):
+    """
+    Return the author ids of movies, by movie id.
+    """
+    authors = defaultdict(list)
+    links = Movie.authors.through.objects.filter(movie_id__in=movie_ids)
+    for movie_id, user_id in links.order_by("pk").values_list("movie_id", "users_id"):
+        authors[movie_id].append(user_id)
+    return authors
+
+
+def load_favorites(spectator_ids):
+    """
+    Return the favorite movie ids of spectators, by spectator id.
+    """
+    favorites = defaultdict(list)
+    rows = Favorite.objects.filter(spectator_id__in=spectator_ids)
+    for spectator_id, movie_id in rows.order_by("pk").values_list(
+        "spectator_id", "movie_id"
+    ):
+        favorites[spectator_id].append(movie_id)
+    return favorites
+
+
+def load_ratings(keys):
+    """
+    Return ratings by (spectator id, movie id).
+    """
+    ratings = Rating.objects.filter(
+        spectator_id__in={spectator_id for spectator_id, _ in keys},
+        movie_id__in={movie_id for _, movie_id in keys},
+    )
+    return {(rating.spectator_id, rating.movie_id): rating for rating in ratings}
+
+
+class Batch:
+    """
+    Resolve the resource requests of a batch with one query per type of object.
+
+    The requests are resolved in phases: the movies, users, favorites and
+    ratings they ask for are queued, then each phase dispatches a loader and
+    queues what the loaded objects refer to (the authors of the movies, the
+    favorites of the users). Users requested directly and as authors, or
+    favorites read for `is_favorite` and for `favorite_movies`, are thus
+    loaded together, whatever the number of requests.
+
+    Args:
+        request (Request): The batch request, for the authenticated user and
+            the serializer context.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.user_id = request.user.pk if request.user.is_authenticated else None
+        self.movies = DataLoader(load_movies)
+        self.movie_authors = DataLoader(load_movie_authors)
+        self.users = DataLoader(load_users)
+        self.favorites = DataLoader(load_favorites)
+        self.ratings = DataLoader(load_ratings)
+        self.user_data = {}
+
+    def resolve(self, items):
+        """
+        Answer the resource requests, in order.
+
+        Args:
+            items (list): The validated data of `BatchItemSerializer`s.
+
+        Returns:
+            list: A `{"status", "data"}` or `{"status", "error"}` dict per request.
+        """
+        for item in items:
+            self.queue(item)
+        self.movies.dispatch()
+        self.movie_authors.load_many(
+            movie_id for movie_id, movie in self.movies.cache.items() if movie
+        )
+        self.movie_authors.dispatch()
+        self.users.load_many(
+            user_id
+            for author_ids in self.movie_authors.cache.values()
+            for user_id in author_ids or []
+        )
+        self.users.dispatch()
+        self.favorites.load_many(
+            user_id for user_id, user in self.users.cache.items() if user
+        )
+        self.favorites.dispatch()
+        self.ratings.dispatch()
+        return [self.respond(item) for item in items]
+
+    def queue(self, item):
+        spectator_id = item.get("spectator", self.user_id)
+        resource = item["resource"]
+        if resource == "movie":
+            self.movies.load_many([item["id"]])
+            include = item.get("include", set())
+            if spectator_id is not None and "my_rating" in include:
+                self.ratings.load_many([(spectator_id, item["id"])])
+            if spectator_id is not None and "is_favorite" in include:
+                self.favorites.load_many([spectator_id])
+        elif resource == "user":
+            self.users.load_many([item["id"]])
+        elif spectator_id is None:
+            return
+        elif resource == "rating":
+            self.ratings.load_many([(spectator_id, item["movie"])])
+        elif resource == "favorite":
+            self.favorites.load_many([spectator_id])
+
+    def respond(self, item):
+        spectator_id = item.get("spectator", self.user_id)
+        resource = item["resource"]
+        if resource in ["rating", "favorite"] and spectator_id is None:
+            return {"status": 401, "error": "Authentication required"}
+
+        if resource == "movie":
+            movie = self.movies.get(item["id"])
+            if movie is None:
+                return {"status": 404, "error": "Movie not found"}
+            data = BatchMovieSerializer(movie, context=self.context).data
+            include = item.get("include", set())
+            if "my_rating" in include:
+                rating = self.ratings.get((spectator_id, movie.pk))
+                data["my_rating"] = rating.rating if rating else None
+            if "is_favorite" in include:
+                data["is_favorite"] = movie.pk in (
+                    self.favorites.get(spectator_id) or []
+                )
+        elif resource == "user":
+            data = self.serialize_user(self.users.get(item["id"]))
+            if data is None:
+                return {"status": 404, "error": "User not found"}
+        elif resource == "rating":
+            rating = self.ratings.get((spectator_id, item["movie"]))
+            if rating is None:
+                return {"status": 404, "error": "Rating not found"}
+            data = {
+                "id": rating.pk,
+                "spectator": rating.spectator_id,
+                "movie": rating.movie_id,
+                "rating": rating.rating,
+            }
+        else:
+            data = {
+                "spectator": spectator_id,
+                "movie": item["movie"],
+                "is_favorite": item["movie"]
+                in (self.favorites.get(spectator_id) or []),
+            }
+        return {"status": 200, "data": data}
+
+    @property
+    def context(self):
+        return {"request": self.request, "batch": self}
+
+    def serialize_user(self, user):
+        """
+        Serialize a user once per batch, however many movies they authored.
+        """
+        if user is None:
+            return None
+        if user.pk not in self.user_data:
+            self.user_data[user.pk] = BatchUserSerializer(
+                user, context=self.context
+            ).data
+        return self.user_data[user.pk]
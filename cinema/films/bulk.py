@@ -0,0 +1,49 @@
+from django.db import connections, router
+
+
+def update_returning_ids(model, values, ids=None, queryset=None):
+    """
+    Update many rows in a single UPDATE statement and return the ids of the updated rows.
+
+    Unlike `QuerySet.update`, which only returns a row count, the statement ends
+    with RETURNING, so the caller learns which rows were actually updated (ids
+    that do not exist are left out). Like `QuerySet.update`, no `save()` is called
+    and no signal is sent.
+
+    Args:
+        model (Model): The model whose table is updated.
+        values (dict): New value of each field, by field name.
+        ids (list, optional): Primary keys of the rows to update.
+        queryset (QuerySet, optional): Rows to update when no ids are given.
+            Either way the rows are selected with `WHERE id IN (SELECT id ...)`,
+            compiled by the ORM for the current backend.
+
+    Returns:
+        list: The sorted primary keys of the updated rows.
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    meta = model._meta
+
+    fields = [meta.get_field(name) for name in values]
+    assignments = ", ".join(f"{quote(field.column)} = %s" for field in fields)
+    params = [
+        field.get_db_prep_save(field.to_python(value), connection)
+        for field, value in zip(fields, values.values())
+    ]
+    pk = quote(meta.pk.column)
+    if ids is not None:
+        # The base manager, so that archived rows are updated as well
+        queryset = model._base_manager.filter(pk__in=list(ids))
+    subquery = queryset.using(using).order_by().prefetch_related(None)
+    sql, where_params = subquery.values("pk").query.sql_with_params()
+    where = f"{pk} IN ({sql})"
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {quote(meta.db_table)} SET {assignments} "
+            f"WHERE {where} RETURNING {pk}",
+            params + list(where_params),
+        )
+        return sorted(row[0] for row in cursor.fetchall())
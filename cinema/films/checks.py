@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.core import checks
+from django.db.models import Q
+
+
+def serves_field(index, field_name, aliases):
+    """
+    Return whether an index can serve a filter on a field of the movie lists.
+
+    The index must lead with the field, or with the expression of the alias of
+    that name, and either cover every movie or only the active ones, which the
+    lists show unless a state is requested.
+
+    Args:
+        index (Index): The index.
+        field_name (str): The filtered field or alias.
+        aliases (dict): The expressions of the aliases, by name.
+    """
+    if index.fields:
+        leads = index.fields[0].lstrip("-") == field_name
+    else:
+        leads = field_name in aliases and index.expressions[0] == aliases[field_name]
+    return leads and index.condition in [None, Q(state="active")]
+
+
+@checks.register(checks.Tags.models)
+def check_movie_filter_indexes(app_configs, **kwargs):
+    """
+    Check that every movie list filter is served by an index, so that adding a
+    filter without its index fails `manage.py check` instead of the database.
+    """
+    from .filters import MOVIE_ALIASES, MOVIE_FILTERS
+    from .models import Movie
+
+    indexes = {index.name: index for index in Movie._meta.indexes}
+    errors = []
+    for param, (lookup, index_name) in MOVIE_FILTERS.items():
+        field_name = lookup.split("__")[0]
+        if index_name is None:
+            field = Movie._meta.get_field(field_name)
+            if not field.is_relation:
+                errors.append(
+                    checks.Error(
+                        f"The '{param}' movie filter has no index.",
+                        hint=f"Index Movie.{field_name} and name the index in MOVIE_FILTERS.",
+                        obj=Movie,
+                        id="films.E001",
+                    )
+                )
+            continue
+        index = indexes.get(index_name)
+        if index is None:
+            errors.append(
+                checks.Error(
+                    f"The '{param}' movie filter uses the unknown index '{index_name}'.",
+                    obj=Movie,
+                    id="films.E002",
+                )
+            )
+        elif not serves_field(index, field_name, MOVIE_ALIASES):
+            errors.append(
+                checks.Error(
+                    f"The '{index_name}' index does not lead with '{field_name}' or "
+                    f"leaves out movies of the lists, "
+                    f"so it cannot serve the '{param}' movie filter.",
+                    obj=Movie,
+                    id="films.E003",
+                )
+            )
+    return errors
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Check that the cache is shared by the processes in production: the cached
+    users of CachedJWTAuthentication and the cached blacklist are only
+    invalidated in the process that saved the user or revoked the token.
+    """
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend != "django.core.cache.backends.locmem.LocMemCache":
+        return []
+    return [
+        checks.Warning(
+            "The default cache is local to each process: other processes keep "
+            "serving a saved user, and accepting a refresh token revoked by "
+            "another process, for up to JWT_USER_CACHE_TIMEOUT seconds.",
+            hint="Set REDIS_URL to share the cache between processes.",
+            id="films.W001",
+        )
+    ]
@@ -0,0 +1,157 @@
+import os
+import re
+import time
+import zlib
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+from .models import Movie, Users
+
+TOKEN_RE = re.compile(r"\w\w+")
+
+_loaded = {"version": None, "matrix": None, "movie_ids": None}
+
+
+def movie_tokens(movie):
+    """
+    Return the terms describing a movie: overview words, genres, language and authors.
+    """
+    tokens = TOKEN_RE.findall(movie.overview.lower())
+    if movie.genres:
+        tokens += [f"genre:{g.strip().lower()}" for g in movie.genres.split(",")]
+    if movie.original_language:
+        tokens.append(f"lang:{movie.original_language.lower()}")
+    tokens += [f"author:{author.pk}" for author in movie.authors.all()]
+    return tokens
+
+
+def build_content_index():
+    """
+    Build the TF-IDF content index of all movies and publish it.
+
+    Terms are hashed into `CONTENT_INDEX_FEATURES` columns, so no vocabulary has
+    to be stored. Rows are L2-normalized, which makes the dot product of two rows
+    their cosine similarity. The CSR arrays are saved as .npy files in a new
+    version directory, then the `current` link is switched atomically, so
+    processes reading the previous version are never disturbed. The previous
+    version is kept until the next build, for the processes that resolved the
+    link just before the switch but did not open its files yet.
+
+    Returns:
+        int: The number of indexed movies.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    n_features = settings.CONTENT_INDEX_FEATURES
+    movies = Movie.objects.order_by("pk").prefetch_related(
+        Prefetch("authors", queryset=Users.objects.only("pk"))
+    )
+    movie_ids, rows, columns = [], [], []
+    for row, movie in enumerate(movies.iterator(chunk_size=1000)):
+        movie_ids.append(movie.pk)
+        for token in movie_tokens(movie):
+            rows.append(row)
+            columns.append(zlib.crc32(token.encode()) % n_features)
+
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+        shape=(len(movie_ids), n_features),
+    )
+    counts.sum_duplicates()
+    # Sublinear term frequency and smoothed inverse document frequency
+    document_frequency = np.bincount(counts.indices, minlength=n_features)
+    idf = np.log((1 + len(movie_ids)) / (1 + document_frequency)) + 1
+    counts.data = (1 + np.log(counts.data)) * idf[counts.indices]
+    norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    matrix = (sparse.diags(1 / norms) @ counts).tocsr()
+
+    index_dir = Path(settings.CONTENT_INDEX_DIR)
+    version_dir = index_dir / f"v{time.time_ns()}"
+    version_dir.mkdir(parents=True)
+    np.save(version_dir / "data.npy", matrix.data.astype(np.float32))
+    np.save(version_dir / "indices.npy", matrix.indices.astype(np.int32))
+    np.save(version_dir / "indptr.npy", matrix.indptr.astype(np.int32))
+    np.save(version_dir / "movie_ids.npy", np.array(movie_ids, dtype=np.int64))
+
+    link = index_dir / "current"
+    try:
+        previous = os.readlink(link)
+    except OSError:
+        previous = None
+    tmp_link = index_dir / f"current.{os.getpid()}"
+    os.symlink(version_dir.name, tmp_link)
+    os.replace(tmp_link, link)
+
+    # Processes still mapping an older version keep their open files
+    for old_dir in index_dir.glob("v*"):
+        if old_dir.name not in [version_dir.name, previous]:
+            for path in old_dir.iterdir():
+                path.unlink()
+            old_dir.rmdir()
+    return len(movie_ids)
+
+
+def load_content_index():
+    """
+    Return the current content index, loading it if it changed since the last call.
+
+    The arrays are memory-mapped, so every worker process shares the same pages
+    of the page cache instead of holding its own copy.
+
+    Returns:
+        tuple: The (movies x features) CSR matrix and the sorted movie ids of its rows,
+        or (None, None) if no index was built yet.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    link = Path(settings.CONTENT_INDEX_DIR) / "current"
+    try:
+        version = os.readlink(link)
+    except OSError:
+        return None, None
+    if version != _loaded["version"]:
+        version_dir = link.parent / version
+        arrays = {
+            name: np.load(version_dir / f"{name}.npy", mmap_mode="r")
+            for name in ["data", "indices", "indptr", "movie_ids"]
+        }
+        _loaded["matrix"] = sparse.csr_matrix(
+            (arrays["data"], arrays["indices"], arrays["indptr"]),
+            shape=(len(arrays["movie_ids"]), settings.CONTENT_INDEX_FEATURES),
+            copy=False,
+        )
+        _loaded["movie_ids"] = arrays["movie_ids"]
+        _loaded["version"] = version
+    return _loaded["matrix"], _loaded["movie_ids"]
+
+
+def content_similar_movie_ids(movie_id, limit):
+    """
+    Return the ids of the movies whose content is the most similar to a movie, best first.
+
+    Args:
+        movie_id (int): The movie to compare with.
+        limit (int): The maximum number of movies returned.
+
+    Returns:
+        list: Movie ids, empty if the movie is not indexed yet.
+    """
+    import numpy as np
+
+    matrix, movie_ids = load_content_index()
+    if matrix is None:
+        return []
+    position = int(np.searchsorted(movie_ids, int(movie_id)))
+    if position >= len(movie_ids) or movie_ids[position] != int(movie_id):
+        return []
+
+    scores = (matrix @ matrix[position].T).toarray().ravel()
+    scores[position] = 0
+    candidates = np.flatnonzero(scores > 0)
+    best = candidates[np.argsort(-scores[candidates], kind="stable")[:limit]]
+    return [int(movie_ids[i]) for i in best]
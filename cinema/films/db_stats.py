@@ -0,0 +1,41 @@
+from django.db import connections
+
+
+def server_connections(connection):
+    """
+    Count the server-side connections to the database of a connection, by state.
+
+    Returns:
+        dict: The number of connections by state, empty for databases other than
+        PostgreSQL, which have no pg_stat_activity.
+    """
+    if connection.vendor != "postgresql":
+        return {}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT coalesce(state, 'unknown'), count(*) FROM pg_stat_activity"
+            " WHERE datname = current_database() GROUP BY 1"
+        )
+        return dict(cursor.fetchall())
+
+
+def database_stats():
+    """
+    Describe how each configured database is connected.
+
+    Returns:
+        dict: For each database alias, the persistent connection settings, the
+        connection pool statistics (None without a pool) and the number of
+        server-side connections to the database, by state.
+    """
+    stats = {}
+    for connection in connections.all():
+        # Only the PostgreSQL and Oracle backends support connection pools
+        pool = getattr(connection, "pool", None)
+        stats[connection.alias] = {
+            "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+            "conn_health_checks": connection.settings_dict["CONN_HEALTH_CHECKS"],
+            "pool": pool.get_stats() if pool else None,
+            "server_connections": server_connections(connection),
+        }
+    return stats
@@ -0,0 +1,116 @@
+from datetime import date
+
+from django.db import connections
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import GENRE_LIST, Movie
+
+# Query parameter: (queryset lookup, name of the index serving it).
+# Relations have no index name: their join table columns are always indexed.
+# films.checks makes sure every index exists, leads with the filtered field or
+# alias, and is not limited to other movies than the listed ones.
+MOVIE_FILTERS = {
+    "release_date_after": ("release_date__gte", "movie_active_release_idx"),
+    "release_date_before": ("release_date__lte", "movie_active_release_idx"),
+    "rating_min": ("rating__gte", "movie_active_rating_idx"),
+    "rating_max": ("rating__lte", "movie_active_rating_idx"),
+    "original_language": ("original_language", "movie_active_language_idx"),
+    "status": ("status", "movie_active_status_idx"),
+    "source": ("source", "movie_active_source_idx"),
+    "state": ("state", "movie_state_release_idx"),
+    "author": ("authors", None),
+    "genre": ("genre_list__contains", "movie_active_genres_idx"),
+}
+
+# Expressions filtered on through an alias, like the indexes built on them.
+MOVIE_ALIASES = {"genre_list": GENRE_LIST}
+
+
+class MovieQuerySerializer(serializers.Serializer):
+    """
+    Query parameters filtering the movie lists, see `MOVIE_FILTERS`.
+    """
+
+    release_date_after = serializers.DateField(required=False)
+    release_date_before = serializers.DateField(required=False)
+    year = serializers.IntegerField(required=False, min_value=1, max_value=9999)
+    rating_min = serializers.IntegerField(required=False, min_value=1, max_value=10)
+    rating_max = serializers.IntegerField(required=False, min_value=1, max_value=10)
+    original_language = serializers.CharField(max_length=10, required=False)
+    status = serializers.ChoiceField(Movie.STATUS_CHOICES, required=False)
+    source = serializers.ChoiceField(Movie.SOURCE_CHOICES, required=False)
+    state = serializers.ChoiceField(["active", "archived"], required=False)
+    author = serializers.IntegerField(required=False, min_value=1)
+    genre = serializers.ListField(
+        child=serializers.CharField(max_length=100), required=False, max_length=5
+    )
+
+    def validate(self, attrs):
+        """
+        Reject the combinations that cannot match any movie, and turn `year`
+        into a release date range.
+        """
+        year = attrs.pop("year", None)
+        if year is not None:
+            if "release_date_after" in attrs or "release_date_before" in attrs:
+                raise serializers.ValidationError(
+                    "year cannot be combined with release_date_after or release_date_before."
+                )
+            attrs["release_date_after"] = date(year, 1, 1)
+            attrs["release_date_before"] = date(year, 12, 31)
+        for low, high in [
+            ("release_date_after", "release_date_before"),
+            ("rating_min", "rating_max"),
+        ]:
+            if low in attrs and high in attrs and attrs[low] > attrs[high]:
+                raise serializers.ValidationError(f"{low} must not exceed {high}.")
+        if "genre" in attrs:
+            attrs["genre"] = [genre.lower() for genre in attrs["genre"]]
+        return attrs
+
+
+def filter_movies(queryset, filters):
+    """
+    Apply validated movie filters to a queryset.
+
+    Args:
+        queryset (QuerySet): The movies.
+        filters (dict): The validated data of a `MovieQuerySerializer`.
+
+    Returns:
+        QuerySet: The filtered movies.
+    """
+    filters = dict(filters)
+    genres = filters.pop("genre", None)
+    if genres and connections[queryset.db].vendor != "postgresql":
+        # Without arrays, look for each genre in the genres instead
+        for genre in genres:
+            queryset = queryset.filter(genres__icontains=genre)
+    elif genres:
+        queryset = queryset.alias(**MOVIE_ALIASES)
+        filters["genre"] = genres
+    return queryset.filter(
+        **{
+            MOVIE_FILTERS[param][0]: value
+            for param, value in filters.items()
+            if param in MOVIE_FILTERS
+        }
+    )
+
+
+class MovieFilterBackend(BaseFilterBackend):
+    """
+    Filter backend for the movie lists.
+
+    Every query parameter is validated before the query is built: invalid
+    values, empty ranges and contradictory parameters are rejected with a
+    400 response instead of running a query that cannot match anything.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        serializer = MovieQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            raise ValidationError({"error": serializer.errors})
+        return filter_movies(queryset, serializer.validated_data)
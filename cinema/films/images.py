@@ -0,0 +1,86 @@
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Pillow format and file extension of each variant format
+FORMATS = {"webp": ("WEBP", "webp"), "jpeg": ("JPEG", "jpg")}
+
+
+def encode_variant(image, size, image_format, square=False):
+    """
+    Return the bytes of a resized variant of an image.
+
+    Args:
+        image (Image): The RGB source image.
+        size (int): Width of the variant in pixels (side, for square variants).
+            Images are never enlarged.
+        image_format (str): 'webp' or 'jpeg'.
+        square (bool): Crop the variant to a centered square.
+
+    Returns:
+        bytes: The encoded variant.
+    """
+    if square:
+        variant = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    else:
+        variant = image.copy()
+        variant.thumbnail((size, image.height), Image.Resampling.LANCZOS)
+    output = BytesIO()
+    variant.save(output, FORMATS[image_format][0], quality=85, optimize=True)
+    return output.getvalue()
+
+
+def make_variants(storage, content, sizes, square=False):
+    """
+    Make the WebP and JPEG variants of an image in every size, and store them.
+
+    Each variant is stored under the hash of its content. A name never changes
+    content, so variants can be cached forever, and identical variants are
+    stored once.
+
+    Args:
+        storage (Storage): Where the variants are stored.
+        content (bytes or file): The source image.
+        sizes (list): Variant widths in pixels.
+        square (bool): Crop the variants to centered squares.
+
+    Returns:
+        dict: Variant names by size (as a string) then by format.
+    """
+    if isinstance(content, bytes):
+        content = BytesIO(content)
+    image = ImageOps.exif_transpose(Image.open(content)).convert("RGB")
+    variants = {}
+    for size in sizes:
+        variants[str(size)] = {}
+        for image_format, (_, extension) in FORMATS.items():
+            data = encode_variant(image, size, image_format, square=square)
+            name = f"{hashlib.sha256(data).hexdigest()[:32]}.{extension}"
+            if not storage.exists(name):
+                storage.save(name, ContentFile(data))
+            variants[str(size)][image_format] = name
+    return variants
+
+
+def pick_variant(variants, size, image_format="webp"):
+    """
+    Return the name of the variant best matching a size.
+
+    The smallest variant at least as large as the size is chosen, or the
+    largest variant.
+
+    Args:
+        variants (dict): Variant names, as returned by `make_variants`.
+        size (int): Wanted width in pixels.
+        image_format (str): 'webp' or 'jpeg'.
+
+    Returns:
+        str or None: The variant name, or None for an unknown format.
+    """
+    if image_format not in FORMATS or not variants:
+        return None
+    sizes = sorted(int(side) for side in variants)
+    side = next((side for side in sizes if side >= size), sizes[-1])
+    return variants[str(side)][image_format]
@@ -0,0 +1,139 @@
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+TASKS = {}
+
+
+def task(name):
+    """
+    Register a function as a job task under the given name.
+
+    Args:
+        name (str): The name used to enqueue the task.
+
+    Returns:
+        callable: A decorator registering the function and returning it unchanged.
+    """
+
+    def decorator(func):
+        TASKS[name] = func
+        return func
+
+    return decorator
+
+
+def enqueue(name, max_attempts=3, **payload):
+    """
+    Enqueue a job to be run by the job worker.
+
+    Args:
+        name (str): The name of a registered task.
+        max_attempts (int, optional): How many times the job is tried before failing.
+        **payload: Keyword arguments passed to the task (must be JSON serializable).
+
+    Returns:
+        Job: The queued job.
+
+    Raises:
+        KeyError: If no task is registered under this name.
+    """
+    if name not in TASKS:
+        raise KeyError(f"Unknown job task: {name}")
+    return Job.objects.create(name=name, payload=payload, max_attempts=max_attempts)
+
+
+def claim_job():
+    """
+    Lock the next due job and mark it as running.
+
+    Rows locked by other workers are skipped (SELECT ... FOR UPDATE SKIP LOCKED),
+    so several workers can poll the same table without blocking each other.
+    On backends without row locking (SQLite), the lock clause is simply omitted.
+
+    Returns:
+        Job or None: The claimed job, or None if no job is due.
+    """
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status="queued", run_at__lte=timezone.now())
+            .order_by("run_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = "running"
+        job.attempts += 1
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "attempts", "started_at"])
+    return job
+
+
+def run_job(job):
+    """
+    Run a claimed job and record its outcome.
+
+    A failing job is queued again with an exponential backoff until it reaches
+    `max_attempts`, then marked as failed.
+
+    Args:
+        job (Job): A job returned by `claim_job`.
+    """
+    try:
+        TASKS[job.name](**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            job.status = "queued"
+            job.run_at = timezone.now() + timedelta(seconds=delay)
+        else:
+            job.status = "failed"
+            job.finished_at = timezone.now()
+    else:
+        job.status = "done"
+        job.finished_at = timezone.now()
+    job.save(update_fields=["status", "run_at", "last_error", "finished_at"])
+
+
+def requeue_lost_jobs():
+    """
+    Requeue the jobs left running by a worker that died, once they have been
+    running for more than `JOB_TIMEOUT` seconds. Jobs that had no attempt left
+    are marked as failed.
+
+    Returns:
+        int: The number of jobs requeued or failed.
+    """
+    now = timezone.now()
+    lost = Job.objects.filter(
+        status="running", started_at__lt=now - timedelta(seconds=settings.JOB_TIMEOUT)
+    )
+    error = f"Still running after {settings.JOB_TIMEOUT} seconds, worker lost."
+    requeued = lost.filter(attempts__lt=F("max_attempts")).update(
+        status="queued", run_at=now, last_error=error
+    )
+    failed = lost.update(status="failed", finished_at=now, last_error=error)
+    return requeued + failed
+
+
+def run_pending_jobs():
+    """
+    Requeue the lost jobs, then run due jobs until the queue is empty.
+
+    Returns:
+        int: The number of jobs run.
+    """
+    requeue_lost_jobs()
+    count = 0
+    while (job := claim_job()) is not None:
+        run_job(job)
+        count += 1
+    return count
@@ -0,0 +1,83 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Measure the latency and throughput of an API endpoint on a running server"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", help="Path to request, e.g. /api/movies/1/ (with its query string)."
+        )
+        parser.add_argument(
+            "--base-url",
+            default="http://localhost:8000",
+            help="Address of the running server.",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=500, help="Number of timed requests."
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=8, help="Number of concurrent clients."
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=20,
+            help="Untimed requests sent first, to open connections and fill caches.",
+        )
+        parser.add_argument(
+            "--header",
+            action="append",
+            default=[],
+            help='Extra request header, e.g. "Accept: application/json". Repeatable.',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Sends the same GET request from concurrent clients and reports the throughput
+        and latency percentiles. Each client keeps its HTTP connection open, so the
+        timings reflect the server and not TCP setup.
+        Run it twice against the same server configuration change (e.g. DB_CONN_MAX_AGE=0
+        then 60) to compare both settings.
+        """
+        url = options["base_url"].rstrip("/") + options["path"]
+        headers = dict(
+            (name.strip(), value.strip())
+            for name, value in (header.split(":", 1) for header in options["header"])
+        )
+        local = threading.local()
+
+        def timed_get(_):
+            if not hasattr(local, "session"):
+                local.session = requests.Session()
+                local.session.headers.update(headers)
+            start = time.perf_counter()
+            response = local.session.get(url)
+            elapsed = time.perf_counter() - start
+            return elapsed, response.status_code, len(response.content)
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            list(executor.map(timed_get, range(options["warmup"])))
+            start = time.perf_counter()
+            results = list(executor.map(timed_get, range(options["requests"])))
+            duration = time.perf_counter() - start
+
+        latencies = sorted(elapsed * 1000 for elapsed, _, _ in results)
+        errors = sum(1 for _, status_code, _ in results if status_code >= 400)
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(f"{url}: {len(results)} requests, {errors} error(s)")
+        self.stdout.write(f"Response size: {results[-1][2]} bytes")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(results) / duration:.1f} req/s, "
+                f"mean {statistics.fmean(latencies):.2f} ms, "
+                f"p50 {percentiles[49]:.2f} ms, p95 {percentiles[94]:.2f} ms, "
+                f"p99 {percentiles[98]:.2f} ms"
+            )
+        )
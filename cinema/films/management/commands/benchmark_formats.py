@@ -0,0 +1,107 @@
+import gzip
+import io
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.urls import resolve
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from films.renderers import (CBORParser, CBORRenderer, MessagePackParser,
+                             MessagePackRenderer, cbor2)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class Command(BaseCommand):
+    help = "Compare the payload size and encode/decode time of the response formats"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default="/api/movies/",
+            help="API path, with its query string (default: /api/movies/).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Encodings per format, the fastest one is reported.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Gets the response data of the path once, in-process, then for each format
+        (JSON, MessagePack, and CBOR when installed) reports the payload size,
+        the best render and parse times, and the gzip and Brotli sizes and times
+        at the levels used by films.middleware.CompressionMiddleware.
+        """
+        data = self.get_data(options["path"])
+        formats = [
+            ("json", JSONRenderer(), JSONParser()),
+            ("msgpack", MessagePackRenderer(), MessagePackParser()),
+        ]
+        if cbor2 is not None:
+            formats.append(("cbor", CBORRenderer(), CBORParser()))
+
+        repeat = max(options["repeat"], 1)
+        for name, renderer, parser in formats:
+            payload, encode = self.best_time(lambda: renderer.render(data), repeat)
+            _, decode = self.best_time(
+                lambda: parser.parse(io.BytesIO(payload), parser.media_type, {}), repeat
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{name}: {len(payload)} bytes, encode {encode * 1000:.2f} ms, "
+                    f"decode {decode * 1000:.2f} ms"
+                )
+            )
+            compressed, elapsed = self.best_time(
+                lambda: gzip.compress(
+                    payload, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0
+                ),
+                repeat,
+            )
+            self.stdout.write(
+                f"    gzip: {len(compressed)} bytes, {elapsed * 1000:.2f} ms"
+            )
+            if brotli is not None:
+                compressed, elapsed = self.best_time(
+                    lambda: brotli.compress(
+                        payload, quality=settings.COMPRESSION_BROTLI_QUALITY
+                    ),
+                    repeat,
+                )
+                self.stdout.write(
+                    f"    br: {len(compressed)} bytes, {elapsed * 1000:.2f} ms"
+                )
+
+    def get_data(self, path):
+        """
+        Return the response data of a GET on an API path, before rendering.
+        """
+        request = APIRequestFactory().get(path, HTTP_HOST="localhost")
+        response = resolve(urlsplit(path).path).func(request)
+        return response.data
+
+    def best_time(self, func, repeat):
+        """
+        Call a function several times.
+
+        Returns:
+            tuple: The result of the last call and the fastest duration, in seconds.
+        """
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
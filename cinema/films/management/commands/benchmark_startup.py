@@ -0,0 +1,110 @@
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+PROFILES = [
+    "config.settings",
+    "config.profiles.api",
+    "config.profiles.admin",
+    "config.profiles.importer",
+]
+
+# What a process does before its first request, or its first job without middleware
+COLD_START = """
+import django
+from django.conf import settings
+
+django.setup()
+if settings.MIDDLEWARE:
+    from django.core.wsgi import get_wsgi_application
+    from django.urls import get_resolver
+
+    get_wsgi_application()
+    get_resolver().url_patterns
+"""
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+class Command(BaseCommand):
+    help = "Measure the cold start time of each settings profile with python -X importtime"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profile",
+            action="append",
+            help="Settings module to measure (repeatable). Defaults to every profile.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Cold starts per profile, the fastest one is reported.",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=5,
+            help="Number of top-level packages listed by import time.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Starts a fresh interpreter per run, which sets Django up then, for profiles
+        serving HTTP, loads the WSGI application and the URLconf, like a worker
+        before its first request.
+        Reports the wall time, the number of imported modules, the total import time
+        and the packages taking the most time to import.
+        """
+        for profile in options["profile"] or PROFILES:
+            runs = [self.cold_start(profile) for _ in range(max(options["repeat"], 1))]
+            wall_time, imports = min(runs, key=lambda run: run[0])
+            packages = Counter()
+            for module, self_us in imports.items():
+                packages[module.split(".")[0]] += self_us
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{profile}: {wall_time * 1000:.0f} ms, {len(imports)} modules, "
+                    f"{sum(imports.values()) / 1000:.0f} ms importing"
+                )
+            )
+            for package, self_us in packages.most_common(options["top"]):
+                self.stdout.write(f"    {package}: {self_us / 1000:.1f} ms")
+
+    def cold_start(self, profile):
+        """
+        Run a cold start of the given settings module in a new interpreter.
+
+        Args:
+            profile (str): The settings module, e.g. 'config.profiles.api'.
+
+        Returns:
+            tuple: The wall time in seconds, and the import time of each module in
+            microseconds, excluding its own imports.
+
+        Raises:
+            CalledProcessError: If the interpreter fails to start the application.
+        """
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": profile}
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", COLD_START],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        wall_time = time.perf_counter() - start
+        imports = {}
+        for line in result.stderr.splitlines():
+            match = IMPORT_TIME_LINE.match(line)
+            if match:
+                imports[match.group(4)] = int(match.group(1))
+        return wall_time, imports
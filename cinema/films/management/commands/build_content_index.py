@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from films.content_index import build_content_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the content-based similar movies index"
+
+    def handle(self, *args, **kwargs):
+        """
+        Builds the TF-IDF index of movie overviews, genres, languages and authors.
+        """
+        count = build_content_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} movie(s)"))
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from films.recommendations import build_recommendations
+
+
+class Command(BaseCommand):
+    help = "Rebuild similar movies from spectator favorites and ratings"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top-k",
+            type=int,
+            default=settings.RECOMMENDATIONS_TOP_K,
+            help="Number of similar movies kept per movie.",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rewrite every movie instead of only the ones whose neighbors changed.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Computes the item-item similarity of movies and stores the top-K neighbors of each movie.
+        """
+        count = build_recommendations(top_k=options["top_k"], full=options["full"])
+        self.stdout.write(self.style.SUCCESS(f"Updated similar movies of {count} movie(s)"))
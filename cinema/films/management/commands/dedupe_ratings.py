@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import connections, router
+from django.db.models import Exists, OuterRef, Q
+
+from films.models import Rating
+
+
+class Command(BaseCommand):
+    help = "Delete duplicate movie ratings, keeping the latest rating of each spectator"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many ratings would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Deletes, in a single statement, the ratings without a movie and every
+        rating for which the same spectator has rated the same movie again later.
+        Must be run before migrating to the unique (spectator, movie) constraint
+        and the non-null movie, so it only reads and writes the rating table.
+        The statement sends no post_delete signal: once migrated, initialize the
+        spectator summaries and the movie rating aggregates, which do not exist yet.
+        """
+        newer = Rating.objects.filter(
+            spectator=OuterRef("spectator"),
+            movie=OuterRef("movie"),
+            pk__gt=OuterRef("pk"),
+        )
+        duplicates = Rating.objects.filter(Q(movie__isnull=True) | Exists(newer))
+        if options["dry_run"]:
+            self.stdout.write(f"{duplicates.count()} duplicate rating(s) to delete")
+            return
+
+        using = router.db_for_write(Rating)
+        connection = connections[using]
+        quote = connection.ops.quote_name
+        # The duplicates are selected by a subquery, without loading their ids
+        sql, params = (
+            duplicates.using(using).order_by().values("pk").query.sql_with_params()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {quote(Rating._meta.db_table)} "
+                f"WHERE {quote(Rating._meta.pk.column)} IN ({sql})",
+                params,
+            )
+            deleted = cursor.rowcount
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} duplicate rating(s)"))
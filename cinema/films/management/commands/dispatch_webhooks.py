@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from films.outbox import dispatch_webhooks, prune_events
+
+
+class Command(BaseCommand):
+    help = "Deliver change events to the registered webhooks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once every webhook is up to date instead of polling for new events.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=settings.WEBHOOK_POLL_INTERVAL,
+            help="Seconds to wait between polls when there is nothing to deliver.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.WEBHOOK_BATCH_SIZE,
+            help="Maximum number of events per webhook request.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Deliver batches of events to the webhooks until they are up to date,
+        then wait for new events unless running in burst mode.
+        Events older than OUTBOX_RETENTION_DAYS are deleted on each pass.
+        """
+        try:
+            while True:
+                delivered = dispatch_webhooks(options["batch_size"])
+                if delivered:
+                    self.stdout.write(
+                        self.style.SUCCESS(f"Delivered {delivered} event(s)")
+                    )
+                    continue
+                pruned = prune_events()
+                if pruned:
+                    self.stdout.write(f"Deleted {pruned} old event(s)")
+                if options["burst"]:
+                    return
+                close_old_connections()
+                time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
@@ -1,7 +1,17 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
 from config.utils import get_tmdb_data
+from films.content_index import build_content_index
+from films.jobs import enqueue
 from films.models import Movie, Users
+from films.outbox import emit_many
+
+STATUS_MAP = {
+    "Released": "released",
+    "Post Production": "post_production",
+    "Planned": "planned",
+}
 
 
 class Command(BaseCommand):
@@ -9,106 +19,207 @@ class Command(BaseCommand):
 
     def handle(self, *args, **kwargs):
         """
-        Imports popular movies from TMDb, creates or updates authors (directors) and movies in the database.
-        For each movie:
-            - Fetches details and genres from TMDb.
-            - Fetches director info and date of birth.
-            - Creates or updates the author (director) in the database.
-            - Creates or updates the movie and links it to the author.
+        Imports popular movies from TMDb, creates authors (directors) and movies in the database.
+            - Loads the TMDb person id -> user id map of known directors, in one query.
+            - Fetches the details, genres and credits of each movie in a single request.
+            - Fetches the info and date of birth of new directors only, and inserts
+              them in bulk.
+            - Creates or updates each movie and links it to its director.
+            - Queues the download of the posters and backdrops, run by the job
+              worker so images never hold up the import.
+        Finally reports how many TMDb requests were needed per movie, and rebuilds
+        the content-based similar movies index.
         """
+        self.request_count = 0
         try:
             # Clear existing movies
-            Movie.objects.filter(source="tmdb").delete()
+            Movie.all_objects.filter(source="tmdb").delete()
+            self.author_ids = dict(
+                Users.objects.filter(tmdb_person_id__isnull=False).values_list(
+                    "tmdb_person_id", "pk"
+                )
+            )
             # Get popular movies from TMDB
-            data = get_tmdb_data("movie/popular", params={"page": 1})
+            data = self.fetch("movie/popular", params={"page": 1})
             movies = data.get("results", [])
+            listing_requests = self.request_count
 
-            for movie in movies:
-                # Fetch movie details from TMDB
-                movie_id = movie.get("id")
-                movie_details = get_tmdb_data(f"movie/{movie_id}")
-                title = movie_details.get("title")
-                release_date = movie_details.get("release_date")
-                overview = movie_details.get("overview")
-                vote_average = movie_details.get("vote_average", 0)
-                tmdb_status = get_tmdb_data(f"movie/{movie_id}").get("status")
-                status_map = {
-                    "Released": "released",
-                    "Post Production": "post_production",
-                    "Planned": "planned",
-                }
-                status = status_map.get(tmdb_status, "released")
-                genres = get_tmdb_data(f"movie/{movie_id}").get("genres", [])
-                genre_names = [g["name"] for g in genres]
-                original_title = get_tmdb_data(f"movie/{movie_id}").get(
-                    "original_title", title
-                )
-                original_language = get_tmdb_data(f"movie/{movie_id}").get(
-                    "original_language"
+            movies_details = [self.fetch_movie(movie.get("id")) for movie in movies]
+            directors = {}
+            for movie_details in movies_details:
+                director = self.get_director(movie_details)
+                if director is not None:
+                    directors[director["id"]] = director["name"]
+            self.create_directors(directors)
+
+            movie_ids = []
+            for movie_details in movies_details:
+                # Commit each movie with its change event (post_save) and author link
+                with transaction.atomic():
+                    movie_ids.append(self.import_movie(movie_details))
+            enqueue(
+                "download_movie_images",
+                movie_ids=[movie_id for movie_id in movie_ids if movie_id],
+            )
+
+            self.report_stats(len(movies), self.request_count - listing_requests)
+            indexed = build_content_index()
+            self.stdout.write(f"Content index rebuilt ({indexed} movies)")
+
+        except Exception as e:
+            # Fails the command, and the import_tmdb job so that it is retried
+            raise CommandError(f"Error importing movies: {e}") from e
+
+    def fetch(self, endpoint, params=None):
+        """
+        Call the TMDb API and count the request for the import statistics.
+        """
+        self.request_count += 1
+        return get_tmdb_data(endpoint, params=params)
+
+    def fetch_movie(self, movie_id):
+        """
+        Fetch movie details with its credits appended, in a single TMDb request.
+        """
+        return self.fetch(f"movie/{movie_id}", params={"append_to_response": "credits"})
+
+    def get_director(self, movie_details):
+        """
+        Return the first director in the appended credits of a movie, if any.
+        """
+        crew = movie_details.get("credits", {}).get("crew", [])
+        return next((person for person in crew if person["job"] == "Director"), None)
+
+    def create_directors(self, directors):
+        """
+        Create the authors of the directors missing from the id map, in bulk.
+
+        TMDb authors imported before person ids were stored are matched by
+        username and given their id, without calling TMDb again. Other users,
+        such as registered spectators (whose source also defaults to 'tmdb'),
+        are never adopted. The person
+        endpoint is only called for the other directors. Usernames taken by
+        someone else get the TMDb person id appended, so namesakes stay apart.
+
+        Args:
+            directors (dict): Director names by TMDb person id.
+        """
+        new = {
+            person_id: name
+            for person_id, name in directors.items()
+            if person_id not in self.author_ids
+        }
+        if not new:
+            return
+        usernames = {
+            person_id: name.lower().replace(" ", "_") for person_id, name in new.items()
+        }
+        legacy = {
+            user.username: user
+            for user in Users.objects.filter(
+                role="author",
+                source="tmdb",
+                tmdb_person_id__isnull=True,
+                username__in=usernames.values(),
+            )
+        }
+        adopted = []
+        for person_id, username in list(usernames.items()):
+            user = legacy.pop(username, None)
+            if user is not None:
+                user.tmdb_person_id = person_id
+                adopted.append(user)
+                self.author_ids[person_id] = user.pk
+                del usernames[person_id]
+        Users.objects.bulk_update(adopted, ["tmdb_person_id"])
+
+        taken = set(
+            Users.objects.filter(username__in=usernames.values()).values_list(
+                "username", flat=True
+            )
+        )
+        authors = []
+        for person_id, username in usernames.items():
+            if username in taken:
+                username = f"{username}_{person_id}"
+            taken.add(username)
+            person = self.fetch(f"person/{person_id}")
+            authors.append(
+                Users(
+                    username=username,
+                    role="author",
+                    source="tmdb",
+                    bio="",
+                    avatar=None,
+                    email=f"{username}@tmdb.local",
+                    date_of_birth=person.get("birthday") or "1970-01-01",
+                    tmdb_person_id=person_id,
                 )
+            )
+        # The command runs outside a transaction: commit the authors with their events
+        with transaction.atomic():
+            Users.objects.bulk_create(authors)
+            # bulk_create sends no post_save signal
+            emit_many("author.changed", [author.pk for author in authors])
+        for author in authors:
+            self.author_ids[author.tmdb_person_id] = author.pk
+            self.stdout.write(self.style.SUCCESS(f"Created author: {author.username}"))
 
-                # Fetch director information
-                credits = get_tmdb_data(f"movie/{movie_id}/credits")
-                crew = credits.get("crew", [])
-                directors = [person for person in crew if person["job"] == "Director"]
-
-                users = []
-                if directors:
-                    director = directors[0]
-                    director_name = director["name"]
-                    director_id = director["id"]
-                    username = director_name.lower().replace(" ", "_")
-
-                    # Fetch director details for date of birth
-                    director_details = get_tmdb_data(f"person/{director_id}")
-                    date_of_birth = director_details.get("birthday") or "1970-01-01"
-
-                    # Create or update the author (director)
-                    user, created_user = Users.objects.get_or_create(
-                        username=username,
-                        defaults={
-                            "role": "author",
-                            "source": "tmdb",
-                            "bio": "",
-                            "avatar": None,
-                            "email": f"{username}@tmdb.local",
-                            "date_of_birth": date_of_birth,
-                        },
-                    )
-                    if not created_user and user.date_of_birth != date_of_birth:
-                        user.date_of_birth = date_of_birth
-                        user.save()
-                    users.append(user)
-                    if created_user:
-                        self.stdout.write(
-                            self.style.SUCCESS(f"Created author: {director_name}")
-                        )
-                    # Create or update the movie and link to author
-                    movie_obj, created_movie = Movie.objects.get_or_create(
-                        title=title,
-                        status=status,
-                        release_date=release_date,
-                        original_title=original_title,
-                        original_language=original_language,
-                        overview=overview,
-                        rating=vote_average,
-                        genres=", ".join(genre_names),
-                        defaults={
-                            "source": "tmdb",
-                        },
+    def import_movie(self, movie_details):
+        """
+        Create or update a movie from TMDb movie details, and link it to its director.
+
+        Returns:
+            int or None: The movie id, or None for movies without a director.
+        """
+        title = movie_details.get("title")
+        release_date = movie_details.get("release_date")
+        overview = movie_details.get("overview")
+        vote_average = movie_details.get("vote_average", 0)
+        status = STATUS_MAP.get(movie_details.get("status"), "released")
+        genre_names = [g["name"] for g in movie_details.get("genres", [])]
+        original_title = movie_details.get("original_title", title)
+        original_language = movie_details.get("original_language")
+
+        director = self.get_director(movie_details)
+        if director is not None:
+            author_id = self.author_ids[director["id"]]
+            # Create or update the movie and link to author
+            movie_obj, created_movie = Movie.all_objects.get_or_create(
+                title=title,
+                status=status,
+                release_date=release_date,
+                original_title=original_title,
+                original_language=original_language,
+                overview=overview,
+                rating=vote_average,
+                genres=", ".join(genre_names),
+                defaults={
+                    "source": "tmdb",
+                    "poster_path": movie_details.get("poster_path"),
+                    "backdrop_path": movie_details.get("backdrop_path"),
+                },
+            )
+            movie_obj.authors.add(author_id)
+            # Log creation messages
+            if created_movie:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Created movie: {title} (Director: {director['name']})"
                     )
-                    movie_obj.authors.add(*users)
-                    # Log creation messages
-                    if created_movie:
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f"Created movie: {title} (Director: {', '.join([d['name'] for d in directors])})"
-                            )
-                        )
-
-                print(
-                    f"Title: {title}, Release Date: {release_date}, Overview: {overview}, Vote Average: {vote_average}, Directors: {', '.join([d['name'] for d in directors])}, User: {user.username}, Movie source: {movie_obj.source}, Status: {movie_obj.status}, genres: {', '.join(genre_names)}, date_of_birth: {date_of_birth}"
                 )
 
-        except Exception as e:
-            self.stderr.write(f"Error importing movies: {e}")
+            print(
+                f"Title: {title}, Release Date: {release_date}, Overview: {overview}, Vote Average: {vote_average}, Director: {director['name']}, Movie source: {movie_obj.source}, Status: {movie_obj.status}, genres: {', '.join(genre_names)}"
+            )
+            return movie_obj.pk
+
+    def report_stats(self, movie_count, movie_requests):
+        """
+        Write the number of TMDb requests made per imported movie.
+        """
+        per_movie = movie_requests / movie_count if movie_count else 0
+        self.stdout.write(
+            f"Imported {movie_count} movies with {self.request_count} TMDb requests "
+            f"({per_movie:.2f} requests per movie)"
+        )
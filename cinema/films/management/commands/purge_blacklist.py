@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from films.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = "Delete blacklisted tokens that have expired"
+
+    def handle(self, *args, **kwargs):
+        """
+        Deletes expired blacklisted tokens, which can no longer be used anyway.
+        Meant to be run periodically (e.g. daily from cron) to keep the blacklist small.
+        """
+        deleted, _ = RevokedToken.objects.filter(expires_at__lt=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired token(s)"))
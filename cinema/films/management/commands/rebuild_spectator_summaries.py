@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from films.summaries import rebuild_spectator_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute the activity counters of every spectator"
+
+    def handle(self, *args, **kwargs):
+        """
+        Recomputes the favorites and ratings counters of spectators from scratch.
+        Needed once on databases that had favorites or ratings before the counters,
+        and after writes that bypass the models (e.g. raw SQL).
+        """
+        count = rebuild_spectator_summaries()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} spectator summary(ies)"))
@@ -0,0 +1,79 @@
+import multiprocessing
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from films.jobs import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.JOB_WORKERS,
+            help="Number of worker processes.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling for new jobs.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help="Seconds to wait between polls when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Start the job workers.
+        With a single worker, jobs run in the current process; otherwise each
+        worker is a forked process with its own database connection.
+        """
+        workers = max(options["workers"], 1)
+        if workers == 1:
+            self.work(options["burst"], options["sleep"])
+            return
+
+        # Never share a database connection or pool across forked processes
+        connections.close_all()
+        for connection in connections.all():
+            # Only the PostgreSQL and Oracle backends support connection pools
+            if hasattr(connection, "close_pool"):
+                connection.close_pool()
+        processes = [
+            multiprocessing.Process(
+                target=self.work, args=(options["burst"], options["sleep"])
+            )
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+
+    def work(self, burst, sleep):
+        """
+        Run due jobs, then wait for new ones unless running in burst mode.
+        """
+        try:
+            while True:
+                count = run_pending_jobs()
+                if count:
+                    self.stdout.write(self.style.SUCCESS(f"Ran {count} job(s)"))
+                if burst:
+                    return
+                close_old_connections()
+                time.sleep(sleep)
+        except KeyboardInterrupt:
+            pass
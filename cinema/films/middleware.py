@@ -0,0 +1,108 @@
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # Brotli support is optional (films[binary] extra)
+    brotli = None
+
+
+def parse_accept_encoding(header):
+    """
+    Return the quality value of each content coding of an Accept-Encoding header.
+
+    Args:
+        header (str): e.g. 'gzip, br;q=0.8, *;q=0'.
+
+    Returns:
+        dict: Quality values between 0 and 1, by lower-cased coding.
+    """
+    qualities = {}
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    return qualities
+
+
+def pick_encoding(header):
+    """
+    Return the supported coding the client prefers, Brotli on a tie, or None.
+
+    Codings missing from the header take the quality of '*', and codings with a
+    quality of 0 (e.g. 'br;q=0') are refused.
+    """
+    qualities = parse_accept_encoding(header)
+    default = qualities.get("*", 0.0)
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    encoding = max(supported, key=lambda coding: qualities.get(coding, default))
+    return encoding if qualities.get(encoding, default) > 0 else None
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with Brotli or gzip, depending on the client's Accept-Encoding.
+
+    Only complete responses of a compressible content type are compressed, and
+    only when their size is between `COMPRESSION_MIN_SIZE` (below, compression
+    saves less than it costs) and `COMPRESSION_MAX_SIZE` (above, the CPU time
+    would hold a worker too long). Brotli is preferred when installed, unless
+    the client gives gzip a higher quality value.
+    HTML is not compressed: the browsable API pages hold a CSRF token, which
+    compression would expose to BREACH.
+    Dynamic responses use moderate levels (`COMPRESSION_BROTLI_QUALITY`,
+    `COMPRESSION_GZIP_LEVEL`), which compress nearly as well as the maximum
+    levels for a fraction of the time.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.should_compress(response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = pick_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding == "br":
+            content = brotli.compress(
+                response.content, quality=settings.COMPRESSION_BROTLI_QUALITY
+            )
+        elif encoding == "gzip":
+            content = gzip.compress(
+                response.content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0
+            )
+        else:
+            return response
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response["Content-Length"] = str(len(content))
+        response["Content-Encoding"] = encoding
+        # The compressed body differs from the one the ETag was computed for
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
+
+    def should_compress(self, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return False
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if content_type not in settings.COMPRESSION_CONTENT_TYPES:
+            return False
+        size = len(response.content)
+        return settings.COMPRESSION_MIN_SIZE <= size <= settings.COMPRESSION_MAX_SIZE
@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.permissions import SAFE_METHODS
+
+from config.db_router import start_replica_reads, stop_replica_reads
+
+
+def pin_cache_key(user_id):
+    """
+    Return the cache key pinning a user's reads to the primary database.
+    """
+    return f"db-pin:{user_id}"
+
+
+class ReplicaReadMixin:
+    """
+    Viewset mixin reading from the replicas for safe-method requests.
+
+    After a successful write, the client reads from the primary database for
+    `REPLICA_STICKY_SECONDS`, so it sees its own writes whatever the replication
+    lag. Browsers are pinned with a cookie, authenticated API clients through
+    the cache, keyed by user.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not self.is_pinned_to_primary(request):
+            self._replica_token = start_replica_reads()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica_token", None)
+        if token is not None:
+            stop_replica_reads(token)
+            self._replica_token = None
+        elif request.method not in SAFE_METHODS and response.status_code < 400:
+            self.pin_to_primary(request, response)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def is_pinned_to_primary(self, request):
+        if settings.REPLICA_PIN_COOKIE in request.COOKIES:
+            return True
+        user = request.user
+        return user.is_authenticated and cache.get(pin_cache_key(user.pk)) is not None
+
+    def pin_to_primary(self, request, response):
+        response.set_cookie(
+            settings.REPLICA_PIN_COOKIE,
+            "1",
+            max_age=settings.REPLICA_STICKY_SECONDS,
+            httponly=True,
+            samesite="Lax",
+        )
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            cache.set(pin_cache_key(user.pk), True, settings.REPLICA_STICKY_SECONDS)
+
+
+class RateLimitHeadersMixin:
+    """
+    Viewset mixin reporting the client's rate limit in the response headers.
+
+    The throttle (films.throttling.TokenBucketThrottle) stores the tightest
+    bucket of the request, reported as its burst size, the requests left and the
+    seconds until it is full again.
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        rate_limit = getattr(request, "rate_limit", None)
+        if rate_limit is not None:
+            response["X-RateLimit-Limit"] = rate_limit["limit"]
+            response["X-RateLimit-Remaining"] = rate_limit["remaining"]
+            response["X-RateLimit-Reset"] = rate_limit["reset"]
+        return response
+
+
+class AtomicWritesMixin:
+    """
+    Viewset mixin running each write request in a single transaction.
+
+    The change events written by the signal handlers (films.outbox) are then
+    committed, or rolled back, with the changes themselves. REST framework marks
+    the transaction for rollback when the view raises an exception.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+        with transaction.atomic():
+            return super().dispatch(request, *args, **kwargs)
@@ -1,9 +1,50 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.db import connections, models
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+from django.utils import timezone
 
 # Create your models here.
 
 
+class GenreList(models.Func):
+    """
+    The lowercased list of the comma-separated genres of a movie, e.g.
+    ['drama', 'comedy'], on PostgreSQL. The other backends have no arrays:
+    there, it is the lowercased genres.
+    """
+
+    function = "string_to_array"
+    output_field = ArrayField(models.TextField())
+
+    def __init__(self):
+        super().__init__(Lower("genres"), models.Value(", "))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return compiler.compile(self.source_expressions[0])
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, **extra_context)
+
+
+# Filtering on it uses movie_active_genres_idx, built on the same expression.
+GENRE_LIST = GenreList()
+
+
+class GenreListIndex(GinIndex):
+    """
+    GIN index on GENRE_LIST, or a B-tree index on the lowercased genres on the
+    backends without GIN indexes.
+    """
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        if schema_editor.connection.vendor != "postgresql":
+            return models.Index.create_sql(self, model, schema_editor, **kwargs)
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+
 class Users(AbstractUser):
     """
     Custom user model with roles (author, spectator), bio, avatar, source, and date of birth.
@@ -20,8 +61,12 @@ class Users(AbstractUser):
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
     bio = models.TextField(null=True, blank=True)
     avatar = models.ImageField(upload_to="avatars/", null=True, blank=True)
+    # Resized copies of the avatar, see films.avatars
+    avatar_variants = models.JSONField(default=dict, blank=True)
     source = models.CharField(max_length=100, choices=SOURCE_CHOICES, default="tmdb")
     date_of_birth = models.DateField(null=True, blank=True)
+    # TMDb person id of imported directors, see the import_tmdb command
+    tmdb_person_id = models.PositiveIntegerField(null=True, blank=True, unique=True)
 
     def is_author(self):
         """Return True if the user is an author."""
@@ -32,9 +77,57 @@ class Users(AbstractUser):
         return self.role == "spectator"
 
 
+class MovieQuerySet(models.QuerySet):
+    """
+    QuerySet for movies, by state.
+    """
+
+    def active(self):
+        """Return the movies in the live catalog."""
+        return self.filter(state="active")
+
+    def archived(self):
+        """Return the archived movies."""
+        return self.filter(state="archived")
+
+    def with_user_state(self, user):
+        """
+        Annotate the movies with whether they are favorites of a user
+        (`is_favorite`) and the user's rating (`my_rating`, None if unrated).
+
+        Both are subqueries of the same statement, served by the indexes of the
+        (spectator, movie) unique constraints, so they add no query whatever the
+        number of movies. Anonymous users get no annotations.
+        """
+        if not user.is_authenticated:
+            return self
+        return self.annotate(
+            is_favorite=models.Exists(
+                Favorite.objects.filter(spectator=user, movie=models.OuterRef("pk"))
+            ),
+            my_rating=models.Subquery(
+                Rating.objects.filter(
+                    spectator=user, movie=models.OuterRef("pk")
+                ).values("rating")[:1]
+            ),
+        )
+
+
+class ActiveMovieManager(models.Manager.from_queryset(MovieQuerySet)):
+    """
+    Manager returning only active movies.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().active()
+
+
 class Movie(models.Model):
     """
     Model representing a movie, with title, overview, release date, rating, status, authors, and other metadata.
+
+    `Movie.objects` only returns active movies; `Movie.all_objects` returns archived
+    movies too, and is the default manager (admin, relations, uniqueness checks).
     """
 
     STATUS_CHOICES = [
@@ -75,9 +168,59 @@ class Movie(models.Model):
     original_title = models.CharField(max_length=100, null=True, blank=True)
     original_language = models.CharField(max_length=10, null=True, blank=True)
     state = models.CharField(max_length=20, default="active")
+    ratings_count = models.PositiveIntegerField(default=0)
+    ratings_average = models.FloatField(null=True, blank=True)
+    # TMDb image paths, and their local variants by kind (see films.images)
+    poster_path = models.CharField(max_length=100, null=True, blank=True)
+    backdrop_path = models.CharField(max_length=100, null=True, blank=True)
+    images = models.JSONField(default=dict, blank=True)
+
+    all_objects = MovieQuerySet.as_manager()
+    objects = ActiveMovieManager()
 
     class Meta:
         unique_together = ("title", "status", "release_date")
+        default_manager_name = "all_objects"
+        base_manager_name = "all_objects"
+        # Partial indexes: queries on the live catalog never read archived rows
+        indexes = [
+            models.Index(
+                fields=["status"],
+                condition=models.Q(state="active"),
+                name="movie_active_status_idx",
+            ),
+            models.Index(
+                fields=["source"],
+                condition=models.Q(state="active"),
+                name="movie_active_source_idx",
+            ),
+            # Orderings of the cursor pagination, with its id tie-breaker
+            models.Index(
+                fields=["release_date", "id"],
+                condition=models.Q(state="active"),
+                name="movie_active_release_idx",
+            ),
+            models.Index(
+                fields=["rating", "id"],
+                condition=models.Q(state="active"),
+                name="movie_active_rating_idx",
+            ),
+            models.Index(
+                fields=["original_language"],
+                condition=models.Q(state="active"),
+                name="movie_active_language_idx",
+            ),
+            GenreListIndex(
+                GENRE_LIST,
+                condition=models.Q(state="active"),
+                name="movie_active_genres_idx",
+            ),
+            # Movies in a given state, archived ones included, by release date
+            models.Index(
+                fields=["state", "release_date"],
+                name="movie_state_release_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -94,12 +237,14 @@ class Rating(models.Model):
         related_name="spectator_ratings",
         limit_choices_to={"role": "spectator"},
     )
-    movie = models.ForeignKey(
-        Movie, on_delete=models.CASCADE, related_name="ratings", null=True, blank=True
-    )
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name="ratings")
 
     rating = models.IntegerField(choices=Movie.RATING_CHOICES)
 
+    class Meta:
+        # Run the dedupe_ratings command before migrating existing databases
+        unique_together = ("spectator", "movie")
+
     def __str__(self):
         return f"{self.spectator.username} rated {self.movie.title}: {self.rating}"
 
@@ -151,6 +296,30 @@ class Favorite(models.Model):
         return f"{self.spectator.username} - {self.movie.title}"
 
 
+class SpectatorSummary(models.Model):
+    """
+    Model holding the activity counters of a spectator, kept up to date with each
+    favorite and rating write (see films.summaries).
+    """
+
+    spectator = models.OneToOneField(
+        Users, on_delete=models.CASCADE, primary_key=True, related_name="summary"
+    )
+    favorites_count = models.PositiveIntegerField(default=0)
+    ratings_count = models.PositiveIntegerField(default=0)
+    ratings_sum = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def ratings_average(self):
+        if not self.ratings_count:
+            return None
+        return self.ratings_sum / self.ratings_count
+
+    def __str__(self):
+        return f"Summary of spectator {self.spectator_id}"
+
+
 class Author(Users):
     """
     Proxy model for authors (users with role 'author').
@@ -171,3 +340,181 @@ class Spectator(Users):
         proxy = True
         verbose_name = "Spectator"
         verbose_name_plural = "Spectators"
+
+
+class Job(models.Model):
+    """
+    Model representing a background job, stored in the database and run by the job worker.
+    """
+
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    last_error = models.TextField(blank=True, default="")
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_at"])]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class RevokedToken(models.Model):
+    """
+    Model representing a blacklisted refresh token, kept until the token expires.
+    """
+
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
+
+
+class MovieSimilarity(models.Model):
+    """
+    Model representing one of the most similar movies to a movie, with its similarity score.
+    """
+
+    movie = models.ForeignKey(
+        Movie, on_delete=models.CASCADE, related_name="similarities"
+    )
+    similar_movie = models.ForeignKey(
+        Movie, on_delete=models.CASCADE, related_name="+"
+    )
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ("movie", "similar_movie")
+        indexes = [models.Index(fields=["movie", "-score"])]
+
+    def __str__(self):
+        return f"{self.movie_id} ~ {self.similar_movie_id}: {self.score:.3f}"
+
+
+class TmdbImage(models.Model):
+    """
+    Model representing a TMDb image downloaded once, with the names of its local variants.
+
+    Rows outlive the movies (TMDb movies are replaced on every import), so an
+    image is never downloaded twice.
+    """
+
+    path = models.CharField(max_length=100, unique=True)
+    checksum = models.CharField(max_length=64, db_index=True)
+    variants = models.JSONField(default=dict)
+    downloaded_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.path
+
+
+class CurrentTransactionId(models.Func):
+    """
+    The id of the current transaction on PostgreSQL, 0 on the other backends,
+    which serialize writes: there, event ids already follow the commit order.
+    """
+
+    function = "pg_current_xact_id"
+    template = "%(function)s()::text::bigint"
+    output_field = models.BigIntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return "0", []
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, **extra_context)
+
+
+class OutboxEventQuerySet(models.QuerySet):
+    """
+    QuerySet for outbox events.
+    """
+
+    def visible(self):
+        """
+        Return the events whose transaction, and every earlier one, has ended.
+
+        Event ids are allocated when the events are written, not when their
+        transaction commits. Reading past an event from a transaction still in
+        progress would make a consumer skip it for good, once its cursor has
+        moved on. Events are only served once every transaction older than the
+        oldest one still running has ended, and consumers read them in
+        (transaction_id, id) order (see films.outbox.pending_events): every
+        event still hidden has a higher transaction id than the ones served.
+        Other backends serialize writes, so every committed event is visible.
+        """
+        if connections[self.db].vendor != "postgresql":
+            return self
+        return self.filter(
+            transaction_id__lt=RawSQL(
+                "pg_snapshot_xmin(pg_current_snapshot())::text::bigint", []
+            )
+        )
+
+
+class OutboxEvent(models.Model):
+    """
+    Model representing a change to the catalog, ratings or favorites, written in
+    the same transaction as the change (transactional outbox).
+
+    Events are delivered to webhooks by the dispatch_webhooks command, and can be
+    pulled from /api/changes/. Both read them in (transaction_id, id) order,
+    which is also their cursor.
+    """
+
+    topic = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # PostgreSQL id of the transaction that wrote the event
+    transaction_id = models.BigIntegerField(db_default=CurrentTransactionId())
+
+    objects = OutboxEventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["transaction_id", "id"], name="outbox_event_cursor_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.topic} {self.object_id}"
+
+
+class Webhook(models.Model):
+    """
+    Model representing a URL receiving batches of outbox events.
+
+    `cursor_transaction_id` and `cursor` are the transaction id and id of the
+    last event delivered. Failed deliveries are
+    retried with an exponential backoff, and the webhook is disabled after
+    `WEBHOOK_MAX_FAILURES` consecutive failures.
+    """
+
+    url = models.URLField()
+    # Topic prefixes (e.g. 'movie.'); every topic when empty
+    topics = models.JSONField(default=list, blank=True)
+    secret = models.CharField(max_length=100, blank=True)
+    is_active = models.BooleanField(default=True)
+    cursor_transaction_id = models.BigIntegerField(default=0)
+    cursor = models.BigIntegerField(default=0)
+    failures = models.PositiveIntegerField(default=0)
+    retry_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.url
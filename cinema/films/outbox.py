@@ -0,0 +1,247 @@
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboxEvent, Webhook
+
+
+def emit(topic, object_id, **data):
+    """
+    Write an outbox event, in the current transaction.
+
+    The signal handlers call it after the save or delete, which Django does not run
+    in a transaction of its own: code writing outside the API (commands, jobs,
+    shell) must wrap its writes in `transaction.atomic()`, or a change may be
+    committed without its event.
+
+    Args:
+        topic (str): What happened, e.g. 'movie.changed' or 'rating.deleted'.
+        object_id (int): The primary key of the changed object.
+        **data: A few fields consumers need without fetching the object
+            (must be JSON serializable).
+    """
+    OutboxEvent.objects.create(topic=topic, object_id=object_id, data=data)
+
+
+def emit_many(topic, object_ids, **data):
+    """
+    Write the same outbox event for many objects in a single INSERT.
+    """
+    OutboxEvent.objects.bulk_create(
+        [
+            OutboxEvent(topic=topic, object_id=object_id, data=data)
+            for object_id in object_ids
+        ]
+    )
+
+
+def serialize_event(event):
+    return {
+        "id": event.pk,
+        "topic": event.topic,
+        "object_id": event.object_id,
+        "data": event.data,
+        "created_at": event.created_at,
+    }
+
+
+def encode_cursor(event):
+    """
+    Return the cursor pointing after an event, as served by /api/changes/.
+    """
+    return f"{event.transaction_id}.{event.pk}"
+
+
+def decode_cursor(value):
+    """
+    Parse a cursor returned by `encode_cursor`. '0' is the start of the feed.
+
+    Returns:
+        tuple: The transaction id and id of the last event seen.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    transaction_id, _, event_id = value.partition(".")
+    return int(transaction_id), int(event_id or 0)
+
+
+def pending_events(cursor, topics=None, limit=100):
+    """
+    Return the visible events after a cursor, in (transaction_id, id) order.
+
+    Ids are allocated in write order, not in commit order: an event from a
+    transaction still running can have a lower id than a visible one. Ordering
+    by transaction id first keeps it after the cursor until it becomes visible
+    (see OutboxEventQuerySet.visible).
+
+    Args:
+        cursor (tuple): The transaction id and id of the last event already seen.
+        topics (list, optional): Topic prefixes to keep. Every topic when empty.
+        limit (int): The maximum number of events.
+
+    Returns:
+        list: The events.
+    """
+    transaction_id, event_id = cursor
+    events = OutboxEvent.objects.visible().filter(
+        Q(transaction_id__gt=transaction_id)
+        | Q(transaction_id=transaction_id, pk__gt=event_id)
+    )
+    if topics:
+        prefixes = Q()
+        for topic in topics:
+            prefixes |= Q(topic__startswith=topic)
+        events = events.filter(prefixes)
+    return list(events.order_by("transaction_id", "pk")[:limit])
+
+
+def deliver(webhook, batch_size):
+    """
+    POST the next batch of events to a webhook, and move its cursor on success.
+
+    The JSON body holds the events and the new cursor. With a secret, the body
+    is signed with HMAC-SHA256 in the `X-Webhook-Signature` header. A failure
+    delays the next attempt exponentially, up to `WEBHOOK_RETRY_MAX_DELAY`.
+
+    Args:
+        webhook (Webhook): The webhook.
+        batch_size (int): The maximum number of events per request.
+
+    Returns:
+        int: The number of events delivered.
+    """
+    events = pending_events(
+        (webhook.cursor_transaction_id, webhook.cursor), webhook.topics, batch_size
+    )
+    if not events:
+        return 0
+    body = json.dumps(
+        {
+            "events": [serialize_event(event) for event in events],
+            "cursor": encode_cursor(events[-1]),
+        },
+        cls=DjangoJSONEncoder,
+    ).encode()
+    headers = {"Content-Type": "application/json"}
+    if webhook.secret:
+        signature = hmac.new(webhook.secret.encode(), body, hashlib.sha256).hexdigest()
+        headers["X-Webhook-Signature"] = f"sha256={signature}"
+    try:
+        response = requests.post(
+            webhook.url, data=body, headers=headers, timeout=settings.WEBHOOK_TIMEOUT
+        )
+        response.raise_for_status()
+    except requests.RequestException as error:
+        webhook.failures += 1
+        webhook.last_error = str(error)
+        delay = min(2**webhook.failures, settings.WEBHOOK_RETRY_MAX_DELAY)
+        webhook.retry_at = timezone.now() + timedelta(seconds=delay)
+        webhook.is_active = webhook.failures < settings.WEBHOOK_MAX_FAILURES
+        webhook.save(update_fields=["failures", "last_error", "retry_at", "is_active"])
+        return 0
+    webhook.cursor_transaction_id = events[-1].transaction_id
+    webhook.cursor = events[-1].pk
+    webhook.failures = 0
+    webhook.last_error = ""
+    webhook.retry_at = timezone.now()
+    webhook.save(
+        update_fields=[
+            "cursor_transaction_id",
+            "cursor",
+            "failures",
+            "last_error",
+            "retry_at",
+        ]
+    )
+    return len(events)
+
+
+def claim_webhook(exclude=()):
+    """
+    Claim the next active webhook due for delivery.
+
+    The webhook is locked with SELECT ... FOR UPDATE SKIP LOCKED, like the jobs
+    (see films.jobs.claim_job), and leased by moving its `retry_at` past the
+    time a delivery can take: other dispatchers skip it until the delivery
+    moves it back, or pick it up again if this dispatcher died meanwhile.
+
+    Args:
+        exclude (iterable): Ids of the webhooks not to claim.
+
+    Returns:
+        Webhook or None: The claimed webhook, or None if none is due.
+    """
+    with transaction.atomic():
+        webhook = (
+            Webhook.objects.select_for_update(skip_locked=True)
+            .filter(is_active=True, retry_at__lte=timezone.now())
+            .exclude(pk__in=exclude)
+            .order_by("retry_at", "id")
+            .first()
+        )
+        if webhook is None:
+            return None
+        lease = timedelta(seconds=settings.WEBHOOK_TIMEOUT * 3)
+        Webhook.objects.filter(pk=webhook.pk).update(retry_at=timezone.now() + lease)
+    return webhook
+
+
+def dispatch_webhooks(batch_size=None):
+    """
+    Deliver one batch of events to every active webhook due for delivery.
+
+    Several dispatchers can run at once: each webhook is claimed by one of
+    them (see `claim_webhook`).
+
+    Returns:
+        int: The number of events delivered, over all webhooks.
+    """
+    batch_size = batch_size or settings.WEBHOOK_BATCH_SIZE
+    delivered = 0
+    claimed = []
+    while (webhook := claim_webhook(exclude=claimed)) is not None:
+        claimed.append(webhook.pk)
+        count = deliver(webhook, batch_size)
+        if not count and webhook.retry_at <= timezone.now():
+            # Nothing to deliver: end the lease
+            Webhook.objects.filter(pk=webhook.pk).update(retry_at=webhook.retry_at)
+        delivered += count
+    return delivered
+
+
+def prune_events():
+    """
+    Delete the events older than `OUTBOX_RETENTION_DAYS` that every active
+    webhook received.
+
+    A webhook failing or backing off for longer than the retention period
+    keeps its undelivered events.
+
+    Returns:
+        int: The number of events deleted.
+    """
+    cutoff = timezone.now() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    events = OutboxEvent.objects.filter(created_at__lt=cutoff)
+    oldest = (
+        Webhook.objects.filter(is_active=True)
+        .order_by("cursor_transaction_id", "cursor")
+        .values_list("cursor_transaction_id", "cursor")
+        .first()
+    )
+    if oldest is not None:
+        transaction_id, event_id = oldest
+        events = events.filter(
+            Q(transaction_id__lt=transaction_id)
+            | Q(transaction_id=transaction_id, pk__lte=event_id)
+        )
+    deleted, _ = events.delete()
+    return deleted
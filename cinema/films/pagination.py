@@ -0,0 +1,226 @@
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+def estimate_count(queryset):
+    """
+    Return the PostgreSQL planner estimate of the number of rows of a queryset.
+
+    For an unfiltered queryset, the estimate comes from `pg_class.reltuples`, kept
+    up to date by VACUUM/ANALYZE. Otherwise it is the row estimate of the query plan
+    (EXPLAIN, without running the query). Both are read in constant time whatever
+    the size of the table.
+
+    Args:
+        queryset (QuerySet): An unfiltered queryset, or one filtered like its
+            model's `objects` manager (see `has_default_filters`).
+
+    Returns:
+        int or None: The estimated row count, or None if no estimate is available
+        (other database backends, or tables never analyzed).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    if queryset.query.where:
+        plan = json.loads(queryset.explain(format="json"))
+        return int(plan[0]["Plan"]["Plan Rows"])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def has_default_filters(queryset):
+    """
+    Return whether a queryset has no filters other than its model's `objects`
+    manager ones, such as the active movies of `Movie.objects`.
+    """
+    manager = getattr(queryset.model, "objects", queryset.model._default_manager)
+    return queryset.query.where == manager.all().query.where
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator using the planner estimate instead of COUNT(*) for large unfiltered tables.
+
+    Querysets with more filters than their model's default ones, and tables whose estimate is below
+    `ESTIMATED_COUNT_THRESHOLD`, are still counted exactly.
+    `is_estimated` tells whether `count` is approximate.
+    """
+
+    is_estimated = False
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet) and has_default_filters(
+            self.object_list
+        ):
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate > settings.ESTIMATED_COUNT_THRESHOLD:
+                self.is_estimated = True
+                return estimate
+        return super().count
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """
+    Page number pagination with estimated totals for large tables.
+
+    Pagination is enabled per request with the `page_size` query parameter, and
+    responses tell whether `count` is approximate with `count_is_estimate`.
+    """
+
+    django_paginator_class = EstimatedCountPaginator
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.page.paginator.count,
+                "count_is_estimate": self.page.paginator.is_estimated,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_is_estimate"] = {"type": "boolean"}
+        return response_schema
+
+
+class MovieCursorPagination(CursorPagination):
+    """
+    Cursor pagination for the movie lists, selected with the `cursor` query
+    parameter (empty for the first page).
+
+    Only the orderings of `ordering_fields`, which are all indexed, are allowed,
+    and `id` is appended to them as a tie-breaker. The cursor holds the values
+    of all the ordering fields of the last movie of the page, and the next page
+    starts strictly after them (a keyset) instead of skipping rows with an
+    OFFSET: deep pages cost the same as the first one, however many movies
+    share a rating, and no count is run.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = "id"
+    ordering_fields = ["id", "release_date", "rating"]
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        unindexed = [
+            field for field in ordering if field.lstrip("-") not in self.ordering_fields
+        ]
+        if unindexed:
+            raise ValidationError(
+                {
+                    "error": f"Cursor pagination cannot be ordered by {', '.join(unindexed)}, "
+                    f"use one of {', '.join(self.ordering_fields)}."
+                }
+            )
+        if not any(field.lstrip("-") == "id" for field in ordering):
+            ordering = (*ordering, "-id" if ordering[0].startswith("-") else "id")
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Return the page after (or, for a reversed cursor, before) the position of
+        the cursor.
+
+        Positions are unique thanks to the `id` tie-breaker, so the cursors never
+        carry the offset that `CursorPagination` uses to step over equal positions.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        current_position = self.cursor.position if self.cursor else None
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [
+                field[1:] if field.startswith("-") else f"-{field}" for field in ordering
+            ]
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = queryset.filter(
+                self.keyset_filter(queryset.model, ordering, current_position)
+            )
+
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def keyset_filter(self, model, ordering, position):
+        """
+        Return the condition selecting the rows strictly after a position, in an
+        ordering: `(a, b) > (x, y)` is written `a > x OR (a = x AND b > y)`.
+        """
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError
+            values = [
+                model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(ordering, values)
+            ]
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        return json.dumps(
+            [str(getattr(instance, field.lstrip("-"))) for field in ordering]
+        )
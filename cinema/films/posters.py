@@ -0,0 +1,137 @@
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import storages
+
+from config.utils import get_tmdb_image
+
+from .images import make_variants, pick_variant
+from .models import Movie, TmdbImage
+
+logger = logging.getLogger(__name__)
+
+# Movie field holding the TMDb path of each kind of image
+IMAGE_KINDS = {"poster": "poster_path", "backdrop": "backdrop_path"}
+
+
+def image_sizes(kind):
+    return settings.POSTER_SIZES if kind == "poster" else settings.BACKDROP_SIZES
+
+
+def download_movie_images(movie_ids=None):
+    """
+    Download the TMDb posters and backdrops of movies and make their local variants.
+
+    Images are downloaded concurrently (`TMDB_IMAGE_WORKERS` threads), apart
+    from the movie import, which only stores the TMDb paths:
+        - paths already downloaded (see TmdbImage) are not downloaded again;
+        - downloaded images whose checksum is already known reuse its variants
+          instead of being resized again;
+        - the other images are resized concurrently, see `make_variants`.
+    The variant names are then copied to every movie using the images.
+    A failed download does not stop the others, and the job fails afterwards,
+    so it is retried.
+
+    Args:
+        movie_ids (list, optional): The movies whose images are downloaded.
+            All movies when omitted.
+
+    Returns:
+        int: The number of images downloaded.
+
+    Raises:
+        RuntimeError: If some downloads failed.
+    """
+    movies = Movie.all_objects.all()
+    if movie_ids is not None:
+        movies = movies.filter(pk__in=movie_ids)
+    movies = list(movies.only("pk", "images", *IMAGE_KINDS.values()))
+    kinds = {
+        getattr(movie, field): kind
+        for movie in movies
+        for kind, field in IMAGE_KINDS.items()
+        if getattr(movie, field)
+    }
+    images = {image.path: image for image in TmdbImage.objects.filter(path__in=kinds)}
+    missing = [path for path in kinds if path not in images]
+
+    with ThreadPoolExecutor(max_workers=settings.TMDB_IMAGE_WORKERS) as executor:
+        downloads = dict(zip(missing, executor.map(download_image, missing)))
+        failed = [path for path, content in downloads.items() if content is None]
+        downloads = {
+            path: (content, hashlib.sha256(content).hexdigest())
+            for path, content in downloads.items()
+            if content is not None
+        }
+        known = {
+            image.checksum: image.variants
+            for image in TmdbImage.objects.filter(
+                checksum__in=[checksum for _, checksum in downloads.values()]
+            )
+        }
+        storage = storages["images"]
+        to_resize = [
+            path for path, (_, checksum) in downloads.items() if checksum not in known
+        ]
+        resized = executor.map(
+            lambda path: make_variants(
+                storage, downloads[path][0], image_sizes(kinds[path])
+            ),
+            to_resize,
+        )
+        variants = dict(zip(to_resize, resized))
+
+    new_images = [
+        TmdbImage(
+            path=path,
+            checksum=checksum,
+            variants=variants.get(path) or known[checksum],
+        )
+        for path, (_, checksum) in downloads.items()
+    ]
+    TmdbImage.objects.bulk_create(new_images, ignore_conflicts=True)
+    images.update((image.path, image) for image in new_images)
+
+    for movie in movies:
+        movie.images = {
+            kind: images[getattr(movie, field)].variants
+            for kind, field in IMAGE_KINDS.items()
+            if getattr(movie, field) in images
+        }
+    Movie.all_objects.bulk_update(movies, ["images"], batch_size=500)
+
+    if failed:
+        raise RuntimeError(f"{len(failed)} TMDb image(s) could not be downloaded")
+    return len(downloads)
+
+
+def download_image(path):
+    """
+    Download a TMDb image, or return None if the download fails.
+    """
+    try:
+        return get_tmdb_image(path)
+    except Exception:
+        logger.exception("Could not download TMDb image %s", path)
+        return None
+
+
+def movie_image_url(movie, kind, size=None, image_format="webp"):
+    """
+    Return the URL of the local variant of a movie image best matching a width.
+
+    Args:
+        movie (Movie): The movie.
+        kind (str): 'poster' or 'backdrop'.
+        size (int, optional): Wanted width in pixels, the smallest variant by default.
+        image_format (str): 'webp' or 'jpeg'.
+
+    Returns:
+        str or None: The URL, or None until the image is downloaded.
+    """
+    name = pick_variant(
+        (movie.images or {}).get(kind), size or image_sizes(kind)[0], image_format
+    )
+    return storages["images"].url(name) if name else None
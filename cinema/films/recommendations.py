@@ -0,0 +1,153 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from .models import Favorite, MovieSimilarity, Rating
+
+
+def liked_movies(spectator):
+    """
+    Return a queryset of the ids of the movies a spectator liked.
+
+    A movie is liked when it is in the spectator's favorites, or rated at least
+    `RECOMMENDATIONS_MIN_RATING`.
+    """
+    favorites = Favorite.objects.filter(spectator=spectator).values("movie_id")
+    ratings = Rating.objects.filter(
+        spectator=spectator,
+        movie__isnull=False,
+        rating__gte=settings.RECOMMENDATIONS_MIN_RATING,
+    ).values("movie_id")
+    return favorites.union(ratings)
+
+
+def compute_neighbors(top_k):
+    """
+    Compute the top-K most similar movies of every movie from spectator likes.
+
+    Likes (favorites and good ratings) form a sparse spectators x movies matrix.
+    Its item-item product counts the spectators who liked both movies, which is
+    normalized into a cosine similarity.
+
+    Args:
+        top_k (int): The number of neighbors kept per movie.
+
+    Returns:
+        dict: Movie id mapped to a list of (similar movie id, score), best first.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    pairs = list(
+        Favorite.objects.values_list("spectator_id", "movie_id").union(
+            Rating.objects.filter(
+                movie__isnull=False, rating__gte=settings.RECOMMENDATIONS_MIN_RATING
+            ).values_list("spectator_id", "movie_id")
+        )
+    )
+    if not pairs:
+        return {}
+
+    pairs = np.array(pairs, dtype=np.int64)
+    _, user_index = np.unique(pairs[:, 0], return_inverse=True)
+    movie_ids, movie_index = np.unique(pairs[:, 1], return_inverse=True)
+    likes = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (user_index, movie_index)),
+        shape=(user_index.max() + 1, len(movie_ids)),
+    )
+
+    cooccurrence = (likes.T @ likes).tocsr()
+    counts = cooccurrence.diagonal()
+    cooccurrence.setdiag(0)
+    cooccurrence.eliminate_zeros()
+    # Cosine similarity: co-likes / sqrt(likes(i) * likes(j))
+    inverse_norms = sparse.diags(1 / np.sqrt(counts))
+    similarity = (inverse_norms @ cooccurrence @ inverse_norms).tocsr()
+    similarity.sort_indices()
+
+    neighbors = {}
+    for row in range(similarity.shape[0]):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        if start == end:
+            continue
+        scores = similarity.data[start:end]
+        columns = similarity.indices[start:end]
+        best = np.argsort(-scores, kind="stable")[:top_k]
+        neighbors[int(movie_ids[row])] = [
+            (int(movie_ids[columns[i]]), round(float(scores[i]), 6)) for i in best
+        ]
+    return neighbors
+
+
+def build_recommendations(top_k=None, full=False):
+    """
+    Rebuild the stored similar movies.
+
+    The similarities are recomputed from all the likes on every run: the sparse
+    product costs little next to the writes, and only the movies whose
+    neighbors changed are rewritten, unless `full` is set.
+
+    Args:
+        top_k (int, optional): Neighbors kept per movie. Defaults to `RECOMMENDATIONS_TOP_K`.
+        full (bool, optional): Delete and rewrite all stored neighbors.
+
+    Returns:
+        int: The number of movies whose neighbors were rewritten.
+    """
+    neighbors = compute_neighbors(top_k or settings.RECOMMENDATIONS_TOP_K)
+
+    stored = {}
+    if not full:
+        for movie_id, similar_id, score in MovieSimilarity.objects.order_by(
+            "movie_id", "-score", "similar_movie_id"
+        ).values_list("movie_id", "similar_movie_id", "score"):
+            stored.setdefault(movie_id, []).append((similar_id, score))
+
+    changed = [
+        movie_id
+        for movie_id in neighbors.keys() | stored.keys()
+        if neighbors.get(movie_id) != stored.get(movie_id)
+    ]
+    with transaction.atomic():
+        if full:
+            MovieSimilarity.objects.all().delete()
+        else:
+            MovieSimilarity.objects.filter(movie_id__in=changed).delete()
+        MovieSimilarity.objects.bulk_create(
+            MovieSimilarity(movie_id=movie_id, similar_movie_id=similar_id, score=score)
+            for movie_id in changed
+            for similar_id, score in neighbors.get(movie_id, [])
+        )
+    return len(changed)
+
+
+def similar_movie_ids(movie_id, limit):
+    """
+    Return the ids of the movies most similar to a movie, best first.
+    """
+    return list(
+        MovieSimilarity.objects.filter(movie_id=movie_id)
+        .order_by("-score")
+        .values_list("similar_movie_id", flat=True)[:limit]
+    )
+
+
+def recommended_movie_ids(spectator, limit):
+    """
+    Return the ids of the movies recommended to a spectator, best first.
+
+    The neighbors of every liked movie are summed in the database, and movies
+    the spectator already liked or rated are left out.
+    """
+    liked = liked_movies(spectator)
+    seen = Q(similar_movie__in=liked) | Q(
+        similar_movie__in=Rating.objects.filter(spectator=spectator).values("movie_id")
+    )
+    return list(
+        MovieSimilarity.objects.filter(movie__in=liked)
+        .exclude(seen)
+        .values("similar_movie")
+        .annotate(total=Sum("score"))
+        .order_by("-total")
+        .values_list("similar_movie", flat=True)[:limit]
+    )
@@ -0,0 +1,83 @@
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import cbor2
+except ImportError:  # CBOR support is optional (films[binary] extra)
+    cbor2 = None
+
+# Converts what the binary formats cannot encode (dates, decimals, lazy strings...)
+# the same way as the JSON renderer
+_json_encoder = JSONEncoder()
+
+
+def encode_value(value):
+    return _json_encoder.default(value)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renderer for MessagePack, a binary JSON: smaller and faster to encode and decode.
+
+    Selected with `Accept: application/msgpack` or `?format=msgpack`.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=encode_value)
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parser for MessagePack request bodies (`Content-Type: application/msgpack`).
+    """
+
+    media_type = "application/msgpack"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
+
+
+class CBORRenderer(BaseRenderer):
+    """
+    Renderer for CBOR (RFC 8949), selected with `Accept: application/cbor` or
+    `?format=cbor`. Only registered when cbor2 is installed.
+    """
+
+    media_type = "application/cbor"
+    format = "cbor"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return cbor2.dumps(
+            data, default=lambda encoder, value: encoder.encode(encode_value(value))
+        )
+
+
+class CBORParser(BaseParser):
+    """
+    Parser for CBOR request bodies (`Content-Type: application/cbor`).
+    """
+
+    media_type = "application/cbor"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return cbor2.loads(stream.read())
+        except (ValueError, cbor2.CBORDecodeError) as exc:
+            raise ParseError(f"CBOR parse error - {exc}")
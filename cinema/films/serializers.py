@@ -1,6 +1,11 @@
+from django.conf import settings
 from rest_framework import serializers
 
-from .models import AuthorRating, Favorite, Movie, Rating, Users
+from .avatars import avatar_variant_url
+from .filters import MovieQuerySerializer
+from .posters import movie_image_url
+from .models import (AuthorRating, Favorite, Movie, Rating, SpectatorSummary,
+                     Users)
 
 
 class FavoriteMovieSerializer(serializers.ModelSerializer):
@@ -14,11 +19,17 @@ class FavoriteMovieSerializer(serializers.ModelSerializer):
 
 
 class UserSerializer(serializers.ModelSerializer):
-    """Serializer for user details, including favorite movies."""
+    """
+    Serializer for user details, including favorite movies.
+
+    `avatar_url` is the avatar variant closest to the `avatar_size` query
+    parameter (in pixels), in WebP or in the `avatar_format` query parameter.
+    """
 
     favorite_movies = FavoriteMovieSerializer(
         source="spectator_favorite", many=True, read_only=True
     )
+    avatar_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Users
@@ -29,6 +40,7 @@ class UserSerializer(serializers.ModelSerializer):
             "role",
             "bio",
             "avatar",
+            "avatar_url",
             "source",
             "favorite_movies",
             "password",
@@ -37,11 +49,38 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
         extra_kwargs = {"password": {"write_only": True}}
 
+    def get_avatar_url(self, user):
+        request = self.context.get("request")
+        size, image_format = None, "webp"
+        if request is not None:
+            size = request.query_params.get("avatar_size")
+            size = int(size) if size and size.isdigit() else None
+            image_format = request.query_params.get("avatar_format", image_format)
+        url = avatar_variant_url(user, size, image_format)
+        if url is not None and request is not None:
+            url = request.build_absolute_uri(url)
+        return url
+
 
 class MovieSerializer(serializers.ModelSerializer):
-    """Serializer for movie details, including authors and genres."""
+    """
+    Serializer for movie details, including authors and genres.
+
+    `poster_url` and `backdrop_url` are the local image variants closest to the
+    `poster_size` and `backdrop_size` query parameters (widths in pixels), in
+    WebP or in the `image_format` query parameter. They are null until the
+    images are downloaded.
+
+    `is_favorite` and `my_rating` are the state of the authenticated user, read
+    from the annotations of `MovieQuerySet.with_user_state`; they are null for
+    anonymous users and movies loaded without them.
+    """
 
     authors = UserSerializer(many=True, read_only=True)
+    poster_url = serializers.SerializerMethodField()
+    backdrop_url = serializers.SerializerMethodField()
+    is_favorite = serializers.BooleanField(read_only=True, allow_null=True)
+    my_rating = serializers.IntegerField(read_only=True, allow_null=True)
 
     class Meta:
         model = Movie
@@ -57,8 +96,103 @@ class MovieSerializer(serializers.ModelSerializer):
             "genres",
             "original_title",
             "original_language",
+            "ratings_count",
+            "ratings_average",
+            "poster_url",
+            "backdrop_url",
+            "is_favorite",
+            "my_rating",
+        ]
+        read_only_fields = ["id", "authors", "ratings_count", "ratings_average"]
+
+    def get_poster_url(self, movie):
+        return self.get_image_url(movie, "poster")
+
+    def get_backdrop_url(self, movie):
+        return self.get_image_url(movie, "backdrop")
+
+    def get_image_url(self, movie, kind):
+        request = self.context.get("request")
+        size, image_format = None, "webp"
+        if request is not None:
+            size = request.query_params.get(f"{kind}_size")
+            size = int(size) if size and size.isdigit() else None
+            image_format = request.query_params.get("image_format", image_format)
+        url = movie_image_url(movie, kind, size, image_format)
+        if url is not None and request is not None:
+            url = request.build_absolute_uri(url)
+        return url
+
+
+class BatchUserSerializer(UserSerializer):
+    """
+    User serializer of batch requests, reading the favorite movies loaded for
+    the whole batch (see films.batch).
+    """
+
+    favorite_movies = serializers.SerializerMethodField()
+
+    def get_favorite_movies(self, user):
+        movie_ids = self.context["batch"].favorites.get(user.pk) or []
+        return [{"movie": movie_id} for movie_id in movie_ids]
+
+
+class BatchMovieSerializer(MovieSerializer):
+    """
+    Movie serializer of batch requests: authors are loaded for the whole batch
+    and each user is serialized once (see films.batch).
+    """
+
+    authors = serializers.SerializerMethodField()
+
+    def get_authors(self, movie):
+        batch = self.context["batch"]
+        return [
+            batch.serialize_user(batch.users.get(user_id))
+            for user_id in batch.movie_authors.get(movie.pk) or []
         ]
-        read_only_fields = ["id", "authors"]
+
+
+class BatchItemSerializer(serializers.Serializer):
+    """
+    A resource request of a batch.
+
+    `movie` and `user` resources are looked up by `id`. `rating` and
+    `favorite` resources are looked up by `movie`, for the `spectator` or,
+    by default, the authenticated user. Movies can `include` the user's
+    rating (`my_rating`) and favorite state (`is_favorite`).
+    """
+
+    resource = serializers.ChoiceField(["movie", "user", "rating", "favorite"])
+    id = serializers.IntegerField(required=False, min_value=1)
+    movie = serializers.IntegerField(required=False, min_value=1)
+    spectator = serializers.IntegerField(required=False, min_value=1)
+    include = serializers.MultipleChoiceField(
+        choices=["my_rating", "is_favorite"], required=False
+    )
+
+    def validate(self, attrs):
+        key = "id" if attrs["resource"] in ["movie", "user"] else "movie"
+        if key not in attrs:
+            raise serializers.ValidationError(
+                f"{attrs['resource']} requests need a '{key}'."
+            )
+        return attrs
+
+
+class BatchSerializer(serializers.Serializer):
+    """
+    Body of a batch request: a list of resource requests, answered in order.
+    """
+
+    requests = serializers.ListField(child=BatchItemSerializer(), min_length=1)
+
+    def validate_requests(self, requests):
+        if len(requests) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f"At most {settings.BATCH_MAX_REQUESTS} requests per batch."
+            )
+        return requests
 
 
 class RatingSerializer(serializers.ModelSerializer):
@@ -76,6 +210,14 @@ class RatingSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "spectator", "movie"]
 
 
+class RatingValueSerializer(serializers.Serializer):
+    """
+    Rating given by a spectator to a movie or an author, from 1 to 10.
+    """
+
+    rating = serializers.ChoiceField(Movie.RATING_CHOICES)
+
+
 class RatingAuthorSerializer(serializers.ModelSerializer):
     """
     Serializer for the AuthorRating model, including spectator and author details.
@@ -104,3 +246,98 @@ class FavoriteSerializer(serializers.ModelSerializer):
         fields = ["id", "spectator", "movie"]
         read_only_fields = ["id", "spectator", "movie"]
         unique_together = ("spectator", "movie")
+
+
+class SpectatorSummarySerializer(serializers.ModelSerializer):
+    """
+    Serializer for the activity counters of a spectator.
+    """
+
+    class Meta:
+        model = SpectatorSummary
+        fields = [
+            "spectator",
+            "favorites_count",
+            "ratings_count",
+            "ratings_average",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+
+def reject_unknown_fields(serializer, data, label):
+    """
+    Raise a validation error if the data has keys that are not serializer fields,
+    which DRF would otherwise silently ignore.
+    """
+    unknown = set(data) - set(serializer.fields) if isinstance(data, dict) else set()
+    if unknown:
+        raise serializers.ValidationError(f"{label}: {', '.join(sorted(unknown))}")
+
+
+class MovieFilterSerializer(MovieQuerySerializer):
+    """
+    Filters selecting the movies of a bulk action: the filters of the movie
+    lists, see films.filters.
+    """
+
+    def to_internal_value(self, data):
+        reject_unknown_fields(self, data, "Unknown filters")
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("At least one filter is required.")
+        return super().validate(attrs)
+
+
+class MovieBulkValuesSerializer(serializers.ModelSerializer):
+    """
+    Fields that can be set on many movies at once.
+    """
+
+    class Meta:
+        model = Movie
+        fields = ["status", "rating", "genres", "original_language"]
+        extra_kwargs = {field: {"required": False} for field in fields}
+
+    def to_internal_value(self, data):
+        reject_unknown_fields(self, data, "Fields not updatable in bulk")
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("At least one field is required.")
+        return attrs
+
+
+class MovieBulkSerializer(serializers.Serializer):
+    """
+    Selection of the movies of a bulk action, by ids or by filters.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, max_length=10000
+    )
+    filter = MovieFilterSerializer(required=False)
+
+    def validate(self, attrs):
+        if ("ids" in attrs) == ("filter" in attrs):
+            raise serializers.ValidationError("Give either 'ids' or 'filter'.")
+        return attrs
+
+
+class MovieBulkArchiveSerializer(MovieBulkSerializer):
+    """
+    Bulk archive of movies, or restore with `archived` set to false.
+    """
+
+    archived = serializers.BooleanField(default=True)
+
+
+class MovieBulkUpdateSerializer(MovieBulkSerializer):
+    """
+    Bulk update of movies, setting the same `values` on every selected movie.
+    """
+
+    values = MovieBulkValuesSerializer()
@@ -0,0 +1,187 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .jobs import enqueue
+from .models import Author, Favorite, Movie, Rating, Spectator, Users
+from .outbox import emit
+from .summaries import update_spectator_summary
+
+
+@receiver(post_save, sender=Users)
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Spectator)
+@receiver(post_delete, sender=Users)
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Spectator)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """
+    Drop a saved or deleted user from the authentication cache.
+    """
+    # Imported here so processes without the API (config.profiles.importer)
+    # do not load REST framework when the app is ready
+    from .authentication import invalidate_cached_user
+
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=Users)
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Spectator)
+def queue_avatar_variants(sender, instance, **kwargs):
+    """
+    Queue the resizing of a new avatar, in the same transaction as the user.
+    """
+    if not instance.avatar:
+        return
+    if (instance.avatar_variants or {}).get("source") != instance.avatar.name:
+        enqueue("make_avatar_variants", user_id=instance.pk)
+
+
+@receiver(post_save, sender=Favorite)
+def count_added_favorite(sender, instance, created, **kwargs):
+    """
+    Count a new favorite in the spectator's summary.
+    """
+    if created:
+        update_spectator_summary(instance.spectator_id, favorites=1)
+
+
+@receiver(post_delete, sender=Favorite)
+def count_removed_favorite(sender, instance, **kwargs):
+    """
+    Uncount a deleted favorite from the spectator's summary.
+    """
+    update_spectator_summary(instance.spectator_id, favorites=-1, create=False)
+
+
+@receiver(pre_save, sender=Rating)
+def remember_previous_rating(sender, instance, **kwargs):
+    """
+    Remember who gave an edited rating and its value, to update the summaries after the save.
+    """
+    instance.previous = None
+    if instance.pk is not None:
+        instance.previous = (
+            Rating.objects.filter(pk=instance.pk)
+            .values_list("spectator_id", "rating")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Rating)
+def count_saved_rating(sender, instance, created, **kwargs):
+    """
+    Count a new or edited rating in the spectator's summary.
+    """
+    previous = getattr(instance, "previous", None)
+    if previous is not None:
+        spectator_id, rating = previous
+        update_spectator_summary(
+            spectator_id, ratings=-1, ratings_sum=-rating, create=False
+        )
+    update_spectator_summary(
+        instance.spectator_id, ratings=1, ratings_sum=int(instance.rating)
+    )
+
+
+@receiver(post_delete, sender=Rating)
+def count_deleted_rating(sender, instance, **kwargs):
+    """
+    Uncount a deleted rating from the spectator's summary.
+    """
+    update_spectator_summary(
+        instance.spectator_id,
+        ratings=-1,
+        ratings_sum=-int(instance.rating),
+        create=False,
+    )
+
+
+@receiver(post_save, sender=Movie)
+def emit_movie_changed(sender, instance, **kwargs):
+    """
+    Write a change event for a saved movie.
+    """
+    emit("movie.changed", instance.pk, state=instance.state)
+
+
+@receiver(post_delete, sender=Movie)
+def emit_movie_deleted(sender, instance, **kwargs):
+    """
+    Write a change event for a deleted movie.
+    """
+    emit("movie.deleted", instance.pk)
+
+
+@receiver(post_save, sender=Users)
+@receiver(post_save, sender=Author)
+def emit_author_changed(sender, instance, **kwargs):
+    """
+    Write a change event for a saved author.
+    """
+    if instance.role == "author":
+        emit("author.changed", instance.pk)
+
+
+@receiver(post_delete, sender=Users)
+@receiver(post_delete, sender=Author)
+def emit_author_deleted(sender, instance, **kwargs):
+    """
+    Write a change event for a deleted author.
+    """
+    if instance.role == "author":
+        emit("author.deleted", instance.pk)
+
+
+@receiver(post_save, sender=Rating)
+def emit_rating_changed(sender, instance, **kwargs):
+    """
+    Write a change event for a saved rating.
+    """
+    emit(
+        "rating.changed",
+        instance.pk,
+        movie=instance.movie_id,
+        spectator=instance.spectator_id,
+        rating=int(instance.rating),
+    )
+
+
+@receiver(post_delete, sender=Rating)
+def emit_rating_deleted(sender, instance, **kwargs):
+    """
+    Write a change event for a deleted rating.
+    """
+    emit(
+        "rating.deleted",
+        instance.pk,
+        movie=instance.movie_id,
+        spectator=instance.spectator_id,
+    )
+
+
+@receiver(post_save, sender=Favorite)
+def emit_favorite_added(sender, instance, created, **kwargs):
+    """
+    Write a change event for a new favorite.
+    """
+    if created:
+        emit(
+            "favorite.added",
+            instance.pk,
+            movie=instance.movie_id,
+            spectator=instance.spectator_id,
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+def emit_favorite_removed(sender, instance, **kwargs):
+    """
+    Write a change event for a removed favorite.
+    """
+    emit(
+        "favorite.removed",
+        instance.pk,
+        movie=instance.movie_id,
+        spectator=instance.spectator_id,
+    )
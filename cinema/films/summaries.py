@@ -0,0 +1,136 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Favorite, Rating, SpectatorSummary, Users
+
+COUNTERS = ["favorites_count", "ratings_count", "ratings_sum"]
+
+
+def with_summary_counts(users):
+    """
+    Annotate users with their summary counters, computed from their favorites
+    and ratings with one subquery per counter.
+
+    Args:
+        users (QuerySet): The users.
+
+    Returns:
+        QuerySet: The users, with `favorites_count`, `ratings_count` and `ratings_sum`.
+    """
+    favorites = (
+        Favorite.objects.filter(spectator=OuterRef("pk")).order_by().values("spectator")
+    )
+    ratings = (
+        Rating.objects.filter(spectator=OuterRef("pk")).order_by().values("spectator")
+    )
+    return users.annotate(
+        favorites_count=Coalesce(
+            Subquery(favorites.annotate(count=Count("id")).values("count")), 0
+        ),
+        ratings_count=Coalesce(
+            Subquery(ratings.annotate(count=Count("id")).values("count")), 0
+        ),
+        ratings_sum=Coalesce(
+            Subquery(ratings.annotate(total=Sum("rating")).values("total")), 0
+        ),
+    )
+
+
+def update_spectator_summary(
+    spectator_id, favorites=0, ratings=0, ratings_sum=0, create=True
+):
+    """
+    Add to the counters of a spectator, after a write to their favorites or ratings.
+
+    Call it in the transaction of the write: the counters are then updated with it,
+    and the summary row stays locked until the end of the transaction.
+    A missing summary is created from the spectator's favorites and ratings, which
+    already include the write.
+
+    Args:
+        spectator_id (int): The spectator whose favorites or ratings changed.
+        favorites (int): Change in the number of favorites.
+        ratings (int): Change in the number of ratings.
+        ratings_sum (int): Change in the sum of the ratings.
+        create (bool): Whether to create a missing summary. Deletions do not, the
+            spectator may be being deleted as well.
+    """
+    summary = SpectatorSummary.objects.filter(pk=spectator_id)
+    changes = {
+        "favorites_count": F("favorites_count") + favorites,
+        "ratings_count": F("ratings_count") + ratings,
+        "ratings_sum": F("ratings_sum") + ratings_sum,
+        "updated_at": timezone.now(),
+    }
+    if summary.update(**changes) or not create:
+        return
+
+    counts = (
+        with_summary_counts(Users.objects.filter(pk=spectator_id))
+        .values(*COUNTERS)
+        .first()
+    )
+    if counts is None:
+        return
+    try:
+        with transaction.atomic():
+            SpectatorSummary.objects.create(
+                spectator_id=spectator_id, updated_at=timezone.now(), **counts
+            )
+    except IntegrityError:
+        # Another transaction created it meanwhile, without this write: add to it
+        summary.update(**changes)
+
+
+def rebuild_spectator_summaries(spectator_ids=None, batch_size=1000):
+    """
+    Recompute the summary of every spectator with favorites, ratings or a summary.
+
+    Args:
+        spectator_ids (list, optional): Only recompute the summaries of these spectators.
+        batch_size (int): The number of summaries written per INSERT ... ON CONFLICT.
+
+    Returns:
+        int: The number of summaries written.
+    """
+    users = Users.objects.filter(
+        Exists(Favorite.objects.filter(spectator=OuterRef("pk")))
+        | Exists(Rating.objects.filter(spectator=OuterRef("pk")))
+        | Exists(SpectatorSummary.objects.filter(spectator=OuterRef("pk")))
+    )
+    if spectator_ids is not None:
+        users = users.filter(pk__in=spectator_ids)
+    users = with_summary_counts(users).order_by("pk")
+    now = timezone.now()
+    summaries = []
+    written = 0
+    for spectator_id, *counts in users.values_list("pk", *COUNTERS).iterator(
+        chunk_size=batch_size
+    ):
+        summaries.append(
+            SpectatorSummary(
+                spectator_id=spectator_id, updated_at=now, **dict(zip(COUNTERS, counts))
+            )
+        )
+        if len(summaries) == batch_size:
+            written += write_summaries(summaries)
+            summaries = []
+    return written + write_summaries(summaries)
+
+
+def write_summaries(summaries):
+    """
+    Insert summaries, or overwrite the counters of the existing ones.
+
+    Returns:
+        int: The number of summaries written.
+    """
+    SpectatorSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=["spectator"],
+        update_fields=COUNTERS + ["updated_at"],
+    )
+    return len(summaries)
@@ -0,0 +1,79 @@
+from django.core.management import call_command
+from django.db.models import Avg, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .avatars import make_avatar_variants
+from .content_index import build_content_index
+from .jobs import task
+from .models import Movie, Rating
+from .posters import download_movie_images
+from .recommendations import build_recommendations
+from .summaries import rebuild_spectator_summaries
+
+
+@task("import_tmdb")
+def import_tmdb():
+    """
+    Import popular movies from TMDb.
+    """
+    call_command("import_tmdb")
+
+
+@task("recompute_movie_ratings")
+def recompute_movie_ratings(movie_ids=None):
+    """
+    Recompute the number and average of spectator ratings of movies in a single UPDATE.
+
+    Args:
+        movie_ids (list, optional): The movies to update. All movies when omitted.
+    """
+    movies = Movie.all_objects.all()
+    if movie_ids is not None:
+        movies = movies.filter(pk__in=movie_ids)
+    ratings = Rating.objects.filter(movie=OuterRef("pk")).order_by().values("movie")
+    movies.update(
+        ratings_count=Coalesce(
+            Subquery(ratings.annotate(count=Count("id")).values("count")), 0
+        ),
+        ratings_average=Subquery(ratings.annotate(average=Avg("rating")).values("average")),
+    )
+
+
+@task("build_recommendations")
+def rebuild_recommendations(full=False):
+    """
+    Rebuild the similar movies used for recommendations.
+    """
+    build_recommendations(full=full)
+
+
+@task("build_content_index")
+def rebuild_content_index():
+    """
+    Rebuild the content-based similar movies index.
+    """
+    build_content_index()
+
+
+@task("rebuild_spectator_summaries")
+def rebuild_summaries():
+    """
+    Recompute the activity counters of every spectator.
+    """
+    rebuild_spectator_summaries()
+
+
+@task("make_avatar_variants")
+def resize_avatar(user_id):
+    """
+    Make the resized variants of a user's avatar.
+    """
+    make_avatar_variants(user_id)
+
+
+@task("download_movie_images")
+def download_images(movie_ids=None):
+    """
+    Download the TMDb posters and backdrops of movies.
+    """
+    download_movie_images(movie_ids=movie_ids)
@@ -0,0 +1,203 @@
+import math
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Refills then draws one token from every bucket, only if they all have one.
+# KEYS are the buckets, ARGV their capacity and refill rate (tokens per second).
+TOKEN_BUCKET_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local levels = {}
+local allowed = 1
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local bucket = redis.call('HMGET', key, 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    levels[i] = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    if levels[i] < 1 then
+        allowed = 0
+    end
+end
+local result = {allowed}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local tokens = levels[i] - allowed
+    redis.call('HSET', key, 'tokens', tokens, 'updated', now)
+    redis.call('PEXPIRE', key, math.ceil((capacity - tokens) / rate * 1000) + 1000)
+    result[i + 1] = tostring(tokens)
+end
+return result
+"""
+
+
+def parse_rate(rate):
+    """
+    Parse a throttle rate such as '300/min', or '300/min:50' with a burst size.
+
+    Args:
+        rate (str): Number of requests per second, minute, hour or day, optionally
+            followed by the burst size. The burst size defaults to the number of requests.
+
+    Returns:
+        tuple: The bucket capacity and its refill rate in tokens per second,
+        or None if the rate is None (no limit).
+    """
+    if rate is None:
+        return None
+    rate, _, burst = rate.partition(":")
+    requests, period = rate.split("/")
+    return int(burst or requests), int(requests) / PERIODS[period[0]]
+
+
+class LocalBuckets:
+    """
+    Token buckets kept in the memory of the current process.
+
+    Used with the per-process memory cache, where limits are per worker anyway.
+    """
+
+    # Above this many buckets, the full ones are dropped (they are recreated full)
+    max_buckets = 10000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def consume(self, limits):
+        now = time.monotonic()
+        with self.lock:
+            levels = []
+            for key, capacity, rate in limits:
+                tokens, updated, _, _ = self.buckets.get(key, (capacity, now, 0, 0))
+                levels.append(min(capacity, tokens + (now - updated) * rate))
+            allowed = all(tokens >= 1 for tokens in levels)
+            if allowed:
+                levels = [tokens - 1 for tokens in levels]
+            for (key, capacity, rate), tokens in zip(limits, levels):
+                self.buckets[key] = (tokens, now, capacity, rate)
+            if len(self.buckets) > self.max_buckets:
+                self.prune(now)
+        return allowed, levels
+
+    def prune(self, now):
+        for key, (tokens, updated, capacity, rate) in list(self.buckets.items()):
+            if tokens + (now - updated) * rate >= capacity:
+                del self.buckets[key]
+
+
+class RedisBuckets:
+    """
+    Token buckets shared by every worker in Redis, updated by a Lua script.
+
+    All the buckets of a request are checked and drawn from atomically, in a
+    single round trip.
+    """
+
+    def __init__(self, redis_cache):
+        self.cache = redis_cache
+        self.script = None
+
+    def consume(self, limits):
+        keys = [self.cache.make_and_validate_key(key) for key, _, _ in limits]
+        # Django's Redis cache has no public access to its client
+        client = self.cache._cache.get_client(keys[0], write=True)
+        if self.script is None:
+            self.script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        args = [value for _, capacity, rate in limits for value in (capacity, rate)]
+        allowed, *levels = self.script(keys=keys, args=args, client=client)
+        return bool(allowed), [float(tokens) for tokens in levels]
+
+
+_buckets = None
+
+
+def get_buckets():
+    """
+    Return the token buckets matching the default cache backend.
+    """
+    global _buckets
+    if _buckets is None:
+        cache = caches["default"]
+        _buckets = (
+            RedisBuckets(cache) if isinstance(cache, RedisCache) else LocalBuckets()
+        )
+    return _buckets
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle drawing one token per request from each bucket the request counts against.
+
+    Every client has a bucket, per user when authenticated ('user' rate) and per
+    IP address otherwise ('anon' rate). Views with a `throttle_scope` (and any
+    search query, 'search' scope) add a second bucket, per client as well.
+    A bucket holds up to its burst size and refills at the sustained rate, both
+    configured in the REST framework DEFAULT_THROTTLE_RATES.
+
+    The state of the tightest bucket is stored on the request as `rate_limit`,
+    see films.mixins.RateLimitHeadersMixin.
+    """
+
+    def allow_request(self, request, view):
+        limits = self.get_limits(request, view)
+        if not limits:
+            return True
+        allowed, levels = get_buckets().consume(limits)
+        buckets = [
+            (tokens, capacity, rate)
+            for (_, capacity, rate), tokens in zip(limits, levels)
+        ]
+        # Seconds until every empty bucket holds a token again
+        self.wait_time = max(
+            ((1 - tokens) / rate for tokens, _, rate in buckets if tokens < 1),
+            default=0,
+        )
+        # Report an empty bucket if any, else the one closest to being empty
+        tokens, capacity, rate = min(
+            buckets, key=lambda bucket: (bucket[0] >= 1, bucket[0] / bucket[1])
+        )
+        request.rate_limit = {
+            "limit": capacity,
+            "remaining": max(int(tokens), 0),
+            "reset": math.ceil((capacity - tokens) / rate),
+        }
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+    def get_limits(self, request, view):
+        """
+        Return the buckets of a request.
+
+        Returns:
+            list: (cache key, capacity, refill rate) tuples of the rated buckets.
+        """
+        if request.user and request.user.is_authenticated:
+            client_scope, client = "user", f"user:{request.user.pk}"
+        else:
+            client_scope, client = "anon", f"ip:{self.get_ident(request)}"
+        scopes = [client_scope, self.get_scope(request, view)]
+
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        limits = []
+        for scope in filter(None, scopes):
+            rate = parse_rate(rates.get(scope))
+            if rate is not None:
+                limits.append((f"throttle:{scope}:{client}", *rate))
+        return limits
+
+    def get_scope(self, request, view):
+        if request.query_params.get(api_settings.SEARCH_PARAM):
+            return "search"
+        return getattr(view, "throttle_scope", None)
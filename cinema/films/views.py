@@ -1,15 +1,37 @@
+from django.conf import settings
+from django.core.files.storage import storages
+from django.db import IntegrityError, router, transaction
+from django.http import FileResponse, Http404
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import (AllowAny, BasePermission,
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import (AllowAny, BasePermission, IsAdminUser,
                                         IsAuthenticated)
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import AuthorRating, Favorite, Movie, Rating, Users
-from .serializers import (FavoriteSerializer, MovieSerializer,
-                          RatingAuthorSerializer, RatingSerializer,
-                          UserSerializer)
+from .authentication import blacklist_token
+from .batch import Batch
+from .bulk import update_returning_ids
+from .content_index import content_similar_movie_ids
+from .db_stats import database_stats
+from .filters import MovieFilterBackend, filter_movies
+from .mixins import AtomicWritesMixin, RateLimitHeadersMixin, ReplicaReadMixin
+from .models import (AuthorRating, Favorite, Movie, Rating, SpectatorSummary,
+                     Users)
+from .outbox import (decode_cursor, emit, emit_many, encode_cursor,
+                     pending_events, serialize_event)
+from .pagination import MovieCursorPagination
+from .recommendations import recommended_movie_ids, similar_movie_ids
+from .serializers import (BatchSerializer, FavoriteSerializer,
+                          MovieBulkArchiveSerializer, MovieBulkUpdateSerializer,
+                          MovieSerializer, RatingAuthorSerializer,
+                          RatingSerializer, RatingValueSerializer,
+                          SpectatorSummarySerializer, UserSerializer)
+from .summaries import update_spectator_summary
 
 # Create your views here.
 
@@ -23,7 +45,26 @@ class IsAuthor(BasePermission):
         return hasattr(request.user, "role") and request.user.role == "author"
 
 
-class MovieViewSet(viewsets.ModelViewSet):
+# Relations serialized with each movie by MovieSerializer
+MOVIE_PREFETCH = ["authors", "authors__spectator_favorite"]
+
+
+def movies_in_order(movie_ids, user):
+    """
+    Return the movies with the given ids, in the same order as the ids, with
+    the state of the user (see MovieQuerySet.with_user_state).
+    """
+    movies = (
+        Movie.objects.with_user_state(user)
+        .prefetch_related(*MOVIE_PREFETCH)
+        .in_bulk(movie_ids)
+    )
+    return [movies[movie_id] for movie_id in movie_ids if movie_id in movies]
+
+
+class MovieViewSet(
+    AtomicWritesMixin, RateLimitHeadersMixin, ReplicaReadMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for managing movies.
     Provides list, retrieve, update, archive, and filter by status/source.
@@ -31,19 +72,44 @@ class MovieViewSet(viewsets.ModelViewSet):
 
     queryset = Movie.objects.all()
     serializer_class = MovieSerializer
-    filter_backends = [filters.OrderingFilter, filters.SearchFilter]
+    filter_backends = [MovieFilterBackend, filters.OrderingFilter, filters.SearchFilter]
     search_fields = ["title", "overview"]
-    ordering_fields = ["release_date", "title"]
+    ordering_fields = ["release_date", "title", "rating", "id"]
+    ordering = ["id"]
 
     def get_queryset(self):
         """
-        Optionally filter movies by source (manual or tmdb).
+        List active movies, or every movie when a state is requested: the
+        movies are then filtered by MovieFilterBackend, like for the other
+        filters (see films.filters).
+        Single movies are looked up whatever their state.
+        Movies carry the favorite state and rating of the authenticated user,
+        computed in the same query (see MovieQuerySet.with_user_state), and
+        lists prefetch the serialized relations.
+        """
+        if self.detail:
+            return Movie.all_objects.with_user_state(self.request.user)
+        if "state" in self.request.query_params:
+            queryset = Movie.all_objects.all()
+        else:
+            queryset = super().get_queryset()
+        return queryset.with_user_state(self.request.user).prefetch_related(
+            *MOVIE_PREFETCH
+        )
+
+    @property
+    def paginator(self):
         """
-        queryset = super().get_queryset()
-        source = self.request.query_params.get("source")
-        if source in ["manual", "tmdb"]:
-            queryset = queryset.filter(source=source)
-        return queryset
+        Use cursor pagination when the `cursor` query parameter is given,
+        page number pagination otherwise.
+        """
+        if not hasattr(self, "_paginator") and "cursor" in self.request.query_params:
+            if "page" in self.request.query_params:
+                raise ValidationError(
+                    {"error": "page and cursor cannot be used together."}
+                )
+            self._paginator = MovieCursorPagination()
+        return super().paginator
 
     def get_permissions(self):
         """
@@ -56,15 +122,34 @@ class MovieViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"], url_path="by-status")
     def get_movies_by_status(self, request):
         """
-        List movies filtered by status.
+        List movies filtered by status, without pagination.
         """
-        status_param = request.query_params.get("status")
-        movies = (
-            self.queryset.filter(status=status_param) if status_param else self.queryset
-        )
+        movies = self.filter_queryset(self.get_queryset())
         serializer = self.get_serializer(movies, many=True)
         return Response({"count": len(serializer.data), "results": serializer.data})
 
+    @action(detail=True, methods=["get"], url_path="similar")
+    def similar_movies(self, request, pk=None):
+        """
+        List the movies most liked by the spectators who liked this movie.
+        When there are not enough likes yet, the list is completed with the
+        movies whose content is the most similar.
+        Unknown or invalid movie ids get a 404.
+        """
+        movie = self.get_object()
+        limit = settings.RECOMMENDATIONS_TOP_K
+        movie_ids = similar_movie_ids(movie.pk, limit)
+        if len(movie_ids) < limit:
+            movie_ids += [
+                movie_id
+                for movie_id in content_similar_movie_ids(movie.pk, limit)
+                if movie_id not in movie_ids
+            ][: limit - len(movie_ids)]
+        serializer = self.get_serializer(
+            movies_in_order(movie_ids, request.user), many=True
+        )
+        return Response({"results": serializer.data})
+
     def retrieve(self, request, pk=None):
         """
         Retrieve a single movie by ID.
@@ -113,13 +198,95 @@ class MovieViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
+    def update_selected_movies(self, selection, values):
+        """
+        Update the movies selected by ids or filters in a single UPDATE statement.
+
+        Args:
+            selection (dict): Validated `ids` or `filter`, see MovieBulkSerializer.
+            values (dict): New value of each field.
+
+        Returns:
+            list: The ids of the updated movies.
+        """
+        ids = selection.get("ids")
+        queryset = None
+        if ids is None:
+            # Filters apply to archived movies too, so they can be restored
+            queryset = filter_movies(Movie.all_objects.all(), selection["filter"])
+        with transaction.atomic(using=router.db_for_write(Movie)):
+            movie_ids = update_returning_ids(Movie, values, ids=ids, queryset=queryset)
+            # The UPDATE sends no post_save signal
+            emit_many("movie.changed", movie_ids, **values)
+        return movie_ids
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-archive",
+        permission_classes=[IsAuthenticated, IsAuthor],
+    )
+    def bulk_archive(self, request):
+        """
+        Archive the movies selected by ids or filters, or restore them with
+        `"archived": false`.
+        """
+        serializer = MovieBulkArchiveSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+        new_state = "archived" if serializer.validated_data["archived"] else "active"
+        movie_ids = self.update_selected_movies(
+            serializer.validated_data, {"state": new_state}
+        )
+        return Response(
+            {
+                "message": f"{len(movie_ids)} movie(s) set to '{new_state}'",
+                "movie_ids": movie_ids,
+                "new_state": new_state,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-update",
+        permission_classes=[IsAuthenticated, IsAuthor],
+    )
+    def bulk_update(self, request):
+        """
+        Set the same field values on the movies selected by ids or filters.
+        """
+        serializer = MovieBulkUpdateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            movie_ids = self.update_selected_movies(
+                serializer.validated_data, serializer.validated_data["values"]
+            )
+        except IntegrityError:
+            return Response(
+                {"error": "Another movie has the same title, status and date."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(
+            {"message": f"{len(movie_ids)} movie(s) updated", "movie_ids": movie_ids},
+            status=status.HTTP_200_OK,
+        )
+
 
-class AuthorViewSet(viewsets.ModelViewSet):
+class AuthorViewSet(
+    AtomicWritesMixin, RateLimitHeadersMixin, ReplicaReadMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for managing authors (users with role 'author').
     """
 
-    queryset = Users.objects.filter(role="author")
+    queryset = Users.objects.filter(role="author").order_by("id")
     serializer_class = UserSerializer
 
     def get_queryset(self):
@@ -166,7 +333,7 @@ class AuthorViewSet(viewsets.ModelViewSet):
         Delete an author if they have no associated movies.
         """
         author = self.get_object()
-        if Movie.objects.filter(authors=author).exists():
+        if Movie.all_objects.filter(authors=author).exists():
             return Response(
                 {
                     "error": "Cannot delete this author: at least one film is associated with him."
@@ -179,14 +346,25 @@ class AuthorViewSet(viewsets.ModelViewSet):
         )
 
 
-class SpectatorViewSet(viewsets.ModelViewSet):
+class SpectatorViewSet(
+    AtomicWritesMixin, RateLimitHeadersMixin, ReplicaReadMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for managing spectators (users with role 'spectator').
     """
 
-    queryset = Users.objects.filter(role="spectator")
+    queryset = Users.objects.filter(role="spectator").order_by("id")
     serializer_class = UserSerializer
 
+    def get_queryset(self):
+        """
+        Read the summary with the spectator, in the same query.
+        """
+        queryset = super().get_queryset()
+        if self.action == "summary":
+            queryset = queryset.select_related("summary")
+        return queryset
+
     def get_permissions(self):
         """
         Restrict update, partial_update, and destroy to authenticated users.
@@ -228,13 +406,28 @@ class SpectatorViewSet(viewsets.ModelViewSet):
             {"message": "Spectator deleted"}, status=status.HTTP_204_NO_CONTENT
         )
 
+    @action(detail=True, methods=["get"], url_path="summary")
+    def summary(self, request, pk=None):
+        """
+        Return the activity counters of a spectator: favorites, ratings and average rating.
+        """
+        spectator = self.get_object()
+        try:
+            summary = spectator.summary
+        except SpectatorSummary.DoesNotExist:
+            # No favorite or rating yet
+            summary = SpectatorSummary(spectator=spectator)
+        return Response(SpectatorSummarySerializer(summary).data)
+
 
-class FavoriteViewSet(viewsets.ModelViewSet):
+class FavoriteViewSet(
+    AtomicWritesMixin, RateLimitHeadersMixin, ReplicaReadMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for managing favorite movies of spectators.
     """
 
-    queryset = Favorite.objects.all()
+    queryset = Favorite.objects.order_by("id")
     serializer_class = FavoriteSerializer
 
     @action(
@@ -247,7 +440,7 @@ class FavoriteViewSet(viewsets.ModelViewSet):
         """
         Add a movie to the authenticated user's favorites.
         """
-        movie = Movie.objects.get(pk=pk)
+        movie = get_object_or_404(Movie.objects, pk=pk)
         favorite, created = Favorite.objects.get_or_create(
             spectator=request.user, movie=movie
         )
@@ -267,9 +460,9 @@ class FavoriteViewSet(viewsets.ModelViewSet):
     )
     def remove_movie_from_favorites(self, request, pk=None):
         """
-        Remove a movie from the authenticated user's favorites.
+        Remove a movie from the authenticated user's favorites, archived or not.
         """
-        movie = Movie.objects.get(pk=pk)
+        movie = get_object_or_404(Movie.all_objects, pk=pk)
         favorite = Favorite.objects.filter(spectator=request.user, movie=movie).first()
         if favorite:
             favorite.delete()
@@ -301,13 +494,23 @@ class FavoriteViewSet(viewsets.ModelViewSet):
         return Response({"favorites": serializer.data}, status=status.HTTP_200_OK)
 
 
-class RatingViewSet(viewsets.ModelViewSet):
+class RatingViewSet(
+    AtomicWritesMixin, RateLimitHeadersMixin, ReplicaReadMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for managing ratings on movies and authors.
     """
 
-    queryset = Rating.objects.all()
+    queryset = Rating.objects.order_by("id")
     serializer_class = RatingSerializer
+    throttle_scope = "ratings"
+
+    def perform_update(self, serializer):
+        """
+        Save the rating and the spectator's summary together.
+        """
+        with transaction.atomic():
+            serializer.save()
 
     @action(
         detail=True,
@@ -317,21 +520,44 @@ class RatingViewSet(viewsets.ModelViewSet):
     )
     def add_rating_to_movie(self, request, pk=None):
         """
-        Add a rating to a movie by the authenticated user.
+        Add a rating to a movie by the authenticated user, or replace their previous one.
         """
-        movie = Movie.objects.get(pk=pk)
-        rating_value = request.data.get("rating")
-        if not rating_value:
+        movie = get_object_or_404(Movie.objects, pk=pk)
+        serializer = RatingValueSerializer(data=request.data)
+        if not serializer.is_valid():
             return Response(
-                {"error": "Rating value is required"},
-                status=status.HTTP_400_BAD_REQUEST,
+                {"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+        rating_value = serializer.validated_data["rating"]
+
+        with transaction.atomic():
+            # Locks the spectator's summary, so the previous rating cannot change meanwhile
+            update_spectator_summary(request.user.pk)
+            previous = (
+                Rating.objects.filter(spectator=request.user, movie=movie)
+                .values_list("rating", flat=True)
+                .first()
+            )
+            # A single INSERT ... ON CONFLICT DO UPDATE, safe against concurrent submissions
+            [rating] = Rating.objects.bulk_create(
+                [Rating(movie=movie, spectator=request.user, rating=rating_value)],
+                update_conflicts=True,
+                unique_fields=["spectator", "movie"],
+                update_fields=["rating"],
+            )
+            update_spectator_summary(
+                request.user.pk,
+                ratings=int(previous is None),
+                ratings_sum=rating_value - (previous or 0),
+            )
+            # The upsert sends no post_save signal
+            emit(
+                "rating.changed",
+                rating.pk,
+                movie=movie.pk,
+                spectator=request.user.pk,
+                rating=rating_value,
             )
-
-        rating = Rating.objects.create(
-            movie=movie,
-            spectator=request.user,
-            rating=rating_value,
-        )
         return Response(
             {"message": "Rating added", "rating": RatingSerializer(rating).data},
             status=status.HTTP_201_CREATED,
@@ -345,18 +571,21 @@ class RatingViewSet(viewsets.ModelViewSet):
     )
     def add_rating_to_author(self, request, pk=None):
         """
-        Add a rating to an author by the authenticated user.
+        Add a rating to an author by the authenticated user, or replace their previous one.
         """
-        author = Users.objects.get(pk=pk)
-        rating_value = request.data.get("rating")
-        if not rating_value:
+        author = get_object_or_404(Users.objects, pk=pk)
+        serializer = RatingValueSerializer(data=request.data)
+        if not serializer.is_valid():
             return Response(
-                {"error": "Rating value is required"},
-                status=status.HTTP_400_BAD_REQUEST,
+                {"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST
             )
+        rating_value = serializer.validated_data["rating"]
 
-        rating = AuthorRating.objects.create(
-            author=author, spectator=request.user, rating=rating_value
+        [rating] = AuthorRating.objects.bulk_create(
+            [AuthorRating(author=author, spectator=request.user, rating=rating_value)],
+            update_conflicts=True,
+            unique_fields=["spectator", "author"],
+            update_fields=["rating"],
         )
         return Response(
             {"message": "Rating added", "rating": RatingAuthorSerializer(rating).data},
@@ -364,14 +593,32 @@ class RatingViewSet(viewsets.ModelViewSet):
         )
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(
+    AtomicWritesMixin, RateLimitHeadersMixin, ReplicaReadMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for managing users (registration and details).
     """
 
-    queryset = Users.objects.all()
+    queryset = Users.objects.order_by("id")
     serializer_class = UserSerializer
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="me/recommendations",
+        permission_classes=[IsAuthenticated],
+    )
+    def my_recommendations(self, request):
+        """
+        List movies recommended to the authenticated user from the movies they liked.
+        """
+        movie_ids = recommended_movie_ids(request.user, settings.RECOMMENDATIONS_TOP_K)
+        serializer = MovieSerializer(
+            movies_in_order(movie_ids, request.user), many=True
+        )
+        return Response({"results": serializer.data})
+
     @action(
         detail=False,
         methods=["post"],
@@ -417,10 +664,98 @@ class LogoutView(APIView):
             )
         try:
             token = RefreshToken(refresh_token)
-            token.blacklist()
-            return Response(status=status.HTTP_205_RESET_CONTENT)
-        except Exception:
+        except TokenError:
+            token = None
+        if token is None or not blacklist_token(token):
             return Response(
                 {"detail": "Invalid token or already blacklisted."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        return Response(status=status.HTTP_205_RESET_CONTENT)
+
+
+class ChangesView(APIView):
+    """
+    API view listing the change events after a cursor, for incremental pulls by admins.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        Return up to `limit` events after the `since` cursor, oldest first.
+
+        `topics` keeps the events of some topic prefixes (comma separated, e.g.
+        'movie.,rating.'). Pass the returned cursor as `since` to get the next
+        events; `has_more` tells whether they are already available.
+        """
+        since = request.query_params.get("since", "0")
+        try:
+            cursor = decode_cursor(since)
+            limit = min(int(request.query_params.get("limit", 100)), 1000)
+        except ValueError:
+            return Response(
+                {"error": "since must be a cursor and limit a number"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        topics = [t for t in request.query_params.get("topics", "").split(",") if t]
+        events = pending_events(cursor, topics, max(limit, 1) + 1)
+        has_more = len(events) > limit
+        events = events[:limit]
+        return Response(
+            {
+                "results": [serialize_event(event) for event in events],
+                "cursor": encode_cursor(events[-1]) if events else since,
+                "has_more": has_more,
+            }
+        )
+
+
+class BatchView(APIView):
+    """
+    API view answering several resource requests in one round trip, for pages
+    that need a movie, its authors, and the user's rating and favorite state.
+    """
+
+    def post(self, request):
+        """
+        Answer each resource request of the body, in order, with its status and
+        data or error. Objects of the same type are loaded with a single query
+        for the whole batch (see films.batch).
+        """
+        serializer = BatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+        results = Batch(request).resolve(serializer.validated_data["requests"])
+        return Response({"results": results})
+
+
+class DatabaseStatusView(APIView):
+    """
+    API view reporting the database connections and connection pool usage, for admins.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        Return the connection settings and pool statistics of each database.
+        """
+        return Response(database_stats())
+
+
+def hashed_media(request, storage, name):
+    """
+    Serve an image variant from the 'avatars' or 'images' storage.
+
+    Variant names are hashes of their content, so the response can be cached
+    by browsers and CDNs without ever being revalidated.
+    """
+    storage = storages[storage]
+    if not storage.exists(name):
+        raise Http404("Image variant not found")
+    response = FileResponse(storage.open(name, "rb"))
+    response["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
@@ -0,0 +1,42 @@
+"""
+Gunicorn configuration for serving the project in production.
+
+Run with: gunicorn --config gunicorn.conf.py config.wsgi:application
+Every value can be overridden with the GUNICORN_* environment variables below.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Requests are mostly waiting on PostgreSQL: two workers per core, plus one
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
+worker_class = "gthread" if threads > 1 else "sync"
+
+# Load Django once in the master, so forked workers share its memory pages
+preload_app = True
+
+# Recycle workers from time to time to bound memory growth
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    """
+    Never share a database connection or pool opened by the master with the workers.
+    """
+    from django.db import connections
+
+    connections.close_all()
+    for connection in connections.all():
+        # Only the PostgreSQL and Oracle backends support connection pools
+        if hasattr(connection, "close_pool"):
+            connection.close_pool()
@@ -0,0 +1,44 @@
+import pytest
+
+from films.throttling import LocalBuckets
+
+
+@pytest.fixture(autouse=True)
+def content_index_dir(settings, tmp_path):
+    """
+    Build content indexes in a temporary directory.
+    """
+    settings.CONTENT_INDEX_DIR = tmp_path / "content_index"
+    return settings.CONTENT_INDEX_DIR
+
+
+@pytest.fixture(autouse=True)
+def throttle_buckets(monkeypatch):
+    """
+    Start every test with full rate limit buckets.
+    """
+    buckets = LocalBuckets()
+    monkeypatch.setattr("films.throttling._buckets", buckets)
+    return buckets
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    """
+    Store uploads and image variants in a temporary directory.
+    """
+    settings.MEDIA_ROOT = tmp_path
+    settings.STORAGES = {
+        **settings.STORAGES,
+        **{
+            name: {
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+                "OPTIONS": {"location": tmp_path / name, "base_url": base_url},
+            }
+            for name, base_url in [
+                ("avatars", "/media/avatars/variants/"),
+                ("images", "/media/images/"),
+            ]
+        },
+    }
+    return tmp_path
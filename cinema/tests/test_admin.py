@@ -0,0 +1,91 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from films.models import Movie, Rating, Users
+
+
+def create_movies(count):
+    for i in range(count):
+        author = Users.objects.create(username=f"author_{count}_{i}", role="author")
+        movie = Movie.objects.create(
+            title=f"Movie {count} {i}",
+            overview="A movie.",
+            release_date="2024-01-01",
+            rating=5,
+            status="released",
+        )
+        movie.authors.add(author)
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+def test_movie_changelist_queries_do_not_grow_with_rows(admin_client):
+    """
+    Test that listing movies with their authors does not run one query per movie.
+    """
+    create_movies(2)
+    few = count_queries(admin_client, "/admin/films/movie/")
+    create_movies(8)
+    many = count_queries(admin_client, "/admin/films/movie/")
+    assert few == many
+
+
+@pytest.mark.django_db
+def test_has_movies_filter(admin_client):
+    """
+    Test that the author filter separates authors with and without movies.
+    """
+    create_movies(1)
+    Users.objects.create(username="idle_author", role="author")
+
+    response = admin_client.get("/admin/films/author/?has_movies=no")
+    assert [a.username for a in response.context["cl"].result_list] == ["idle_author"]
+    response = admin_client.get("/admin/films/author/?has_movies=yes")
+    assert [a.username for a in response.context["cl"].result_list] == ["author_1_0"]
+
+
+@pytest.mark.django_db
+def test_movie_rating_inline_is_paginated(admin_client):
+    """
+    Test that the ratings inline only shows one page of ratings.
+    """
+    movie = Movie.objects.create(
+        title="Popular Movie",
+        overview="A popular movie.",
+        release_date="2024-01-01",
+        rating=5,
+        status="released",
+    )
+    for i in range(25):
+        spectator = Users.objects.create(username=f"spectator_{i}", role="spectator")
+        Rating.objects.create(movie=movie, spectator=spectator, rating=5)
+
+    url = f"/admin/films/movie/{movie.pk}/change/"
+    response = admin_client.get(url)
+    formset = response.context["inline_admin_formsets"][0].formset
+    assert len(formset.forms) == 20
+    response = admin_client.get(f"{url}?{formset.prefix}-page=2")
+    assert len(response.context["inline_admin_formsets"][0].formset.forms) == 5
+
+
+@pytest.mark.django_db
+def test_archive_admin_actions(admin_client):
+    """
+    Test that the admin actions archive and restore the selected movies.
+    """
+    create_movies(2)
+    ids = list(Movie.objects.values_list("pk", flat=True))
+
+    data = {"action": "archive_movies", "_selected_action": ids}
+    admin_client.post("/admin/films/movie/", data)
+    assert not Movie.objects.exists()
+
+    data = {"action": "unarchive_movies", "_selected_action": ids[:1]}
+    admin_client.post("/admin/films/movie/", data)
+    assert list(Movie.objects.values_list("pk", flat=True)) == ids[:1]
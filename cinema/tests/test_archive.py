@@ -0,0 +1,89 @@
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+from films.models import Movie, Users
+from films.pagination import estimate_count
+
+
+@pytest.fixture
+def movies():
+    for title, state in [("Live", "active"), ("Old", "archived")]:
+        Movie.objects.create(
+            title=title,
+            overview="A movie.",
+            release_date="2024-01-01",
+            rating=5,
+            status="released",
+            state=state,
+        )
+
+
+@pytest.mark.django_db
+def test_archived_movies_are_hidden(movies):
+    """
+    Test that archived movies are left out of lists unless explicitly requested.
+    """
+    client = APIClient()
+    assert [m["title"] for m in client.get("/api/movies/").data] == ["Live"]
+    response = client.get("/api/movies/by-status/?status=released")
+    assert [m["title"] for m in response.data["results"]] == ["Live"]
+
+    response = client.get("/api/movies/?state=archived")
+    assert [m["title"] for m in response.data] == ["Old"]
+    assert Movie.all_objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_archive_action_hides_movie(movies):
+    """
+    Test that archiving a movie removes it from the default queryset.
+    """
+    client = APIClient()
+    client.force_authenticate(Users.objects.create(username="director", role="author"))
+    movie = Movie.objects.get(title="Live")
+
+    response = client.patch(f"/api/movies/{movie.pk}/archive/")
+    assert response.status_code == 200
+    assert not Movie.objects.exists()
+    assert Movie.all_objects.archived().count() == 2
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Reads PostgreSQL indexes and plans"
+)
+@pytest.mark.django_db
+def test_active_movies_use_partial_indexes(movies):
+    """
+    Test that the partial indexes only cover active movies, and that filtered
+    querysets are estimated from the query plan.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s",
+            [Movie._meta.db_table],
+        )
+        indexes = dict(cursor.fetchall())
+    assert "WHERE" in indexes["movie_active_status_idx"]
+
+    assert estimate_count(Movie.objects.filter(status="released")) >= 1
+
+
+@pytest.mark.django_db
+def test_favorite_of_archived_movie_can_be_removed(movies):
+    """
+    Test that archived movies can leave the favorites, but not be added or rated.
+    """
+    spectator = Users.objects.create(username="viewer", role="spectator")
+    client = APIClient()
+    client.force_authenticate(spectator)
+    movie = Movie.objects.get()
+    assert client.post(f"/api/favorites/{movie.pk}/add/").status_code == 201
+    Movie.objects.filter(pk=movie.pk).update(state="archived")
+
+    assert client.post(f"/api/favorites/{movie.pk}/add/").status_code == 404
+    url = f"/api/rating/{movie.pk}/add-to-movie/"
+    assert client.post(url, {"rating": 5}).status_code == 404
+    assert client.delete(f"/api/favorites/{movie.pk}/remove/").status_code == 204
+    assert client.get("/api/favorites/my-favorites/").data["favorites"] == []
+    for pk in ["abc", 0]:
+        assert client.delete(f"/api/favorites/{pk}/remove/").status_code == 404
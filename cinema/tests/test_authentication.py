@@ -0,0 +1,73 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from films.checks import check_shared_cache
+from films.models import Movie, Users
+
+
+@pytest.fixture
+def author():
+    cache.clear()
+    user = Users.objects.create(username="director", role="author")
+    user.set_password("secret-pass")
+    user.save()
+    return user
+
+
+@pytest.mark.django_db
+def test_token_contains_username_claim(author):
+    """
+    Test that issued access tokens carry the user's username.
+    """
+    response = APIClient().post(
+        "/api/token/", {"username": "director", "password": "secret-pass"}
+    )
+    assert response.status_code == 200
+    assert AccessToken(response.data["access"])["username"] == "director"
+
+
+def test_shared_cache_check(settings):
+    """
+    Test that the deployment checks warn about a per-process cache.
+    """
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    assert [warning.id for warning in check_shared_cache(None)] == ["films.W001"]
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": "redis://localhost:6379",
+        }
+    }
+    assert check_shared_cache(None) == []
+
+
+@pytest.mark.django_db
+def test_authenticated_user_is_served_from_cache(author):
+    """
+    Test that the user is only loaded once, and reloaded after being saved.
+    """
+    movie = Movie.objects.create(
+        title="Some Movie",
+        overview="A movie.",
+        release_date="2024-01-01",
+        rating=5,
+        status="released",
+    )
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(author)}")
+    url = f"/api/movies/{movie.pk}/archive/"
+
+    client.patch(url)
+    with CaptureQueriesContext(connection) as context:
+        response = client.patch(url)
+    assert response.status_code == 200
+    assert not any("films_users" in q["sql"] for q in context.captured_queries)
+
+    author.role = "spectator"
+    author.save()
+    assert client.patch(url).status_code == 403
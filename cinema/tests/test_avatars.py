@@ -0,0 +1,65 @@
+import pytest
+from io import BytesIO
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+from rest_framework.test import APIClient
+from films.avatars import make_avatar_variants
+from films.models import Job, Users
+
+
+def make_avatar():
+    output = BytesIO()
+    Image.new("RGB", (800, 600), "red").save(output, "PNG")
+    return SimpleUploadedFile("face.png", output.getvalue(), "image/png")
+
+
+@pytest.mark.django_db
+def test_avatar_variants(media_root):
+    """
+    Test that an uploaded avatar is resized by a job, and that the variant matching
+    the requested size is served with immutable cache headers.
+    """
+    author = Users.objects.create(username="director", role="author")
+    author.avatar = make_avatar()
+    author.save()
+    assert Job.objects.filter(name="make_avatar_variants").count() == 1
+
+    client = APIClient()
+    response = client.get(f"/api/authors/{author.pk}/")
+    assert response.data["author"]["avatar_url"].endswith(".png")
+
+    call_command("run_jobs", "--burst")
+    author.refresh_from_db()
+    assert set(author.avatar_variants["sizes"]) == {"48", "128", "512"}
+    # Saving the variants does not queue another job
+    assert Job.objects.filter(name="make_avatar_variants").count() == 1
+
+    response = client.get(f"/api/authors/{author.pk}/?avatar_size=40")
+    url = response.data["author"]["avatar_url"]
+    assert url.endswith(author.avatar_variants["sizes"]["48"]["webp"])
+    response = client.get(f"/api/authors/{author.pk}/?avatar_format=jpeg")
+    assert response.data["author"]["avatar_url"].endswith(".jpg")
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response["Cache-Control"] == "public, max-age=31536000, immutable"
+    image = Image.open(BytesIO(b"".join(response.streaming_content)))
+    assert (image.format, image.size) == ("WEBP", (48, 48))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_avatar_variants_are_saved_with_their_event(media_root):
+    """
+    Test that the variants saved by the job are rolled back with their change event.
+    """
+    author = Users.objects.create(username="director", role="author")
+    author.avatar = make_avatar()
+    author.save()
+
+    with mock.patch("films.signals.emit", side_effect=RuntimeError("outbox down")):
+        with pytest.raises(RuntimeError):
+            make_avatar_variants(author.pk)
+    author.refresh_from_db()
+    assert author.avatar_variants == {}
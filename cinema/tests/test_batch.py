@@ -0,0 +1,132 @@
+import pytest
+from rest_framework.test import APIClient
+from films.models import Favorite, Movie, Rating, Users
+
+
+@pytest.fixture
+def catalog():
+    spectator = Users.objects.create(username="spectator", role="spectator")
+    authors = [
+        Users.objects.create(username=f"director{i}", role="author") for i in range(2)
+    ]
+    movies = []
+    for i in range(3):
+        movie = Movie.objects.create(
+            title=f"Movie {i}",
+            overview="A movie.",
+            release_date="2024-01-01",
+            rating=5,
+            status="released",
+        )
+        movie.authors.set(authors)
+        movies.append(movie)
+    Rating.objects.create(spectator=spectator, movie=movies[0], rating=8)
+    Favorite.objects.create(spectator=spectator, movie=movies[1])
+    return spectator, authors, movies
+
+
+def movie_requests(movies, authors):
+    requests = [
+        {"resource": "movie", "id": movie.pk, "include": ["my_rating", "is_favorite"]}
+        for movie in movies
+    ]
+    requests += [{"resource": "user", "id": author.pk} for author in authors]
+    requests += [{"resource": "rating", "movie": movie.pk} for movie in movies]
+    requests += [{"resource": "favorite", "movie": movie.pk} for movie in movies]
+    return requests
+
+
+@pytest.mark.django_db
+def test_batch_answers_requests_in_order(catalog):
+    """
+    Test that a batch answers each resource request, in order, with its status.
+    """
+    spectator, authors, movies = catalog
+    client = APIClient()
+    client.force_authenticate(spectator)
+    response = client.post(
+        "/api/batch/",
+        {
+            "requests": [
+                {"resource": "movie", "id": movies[0].pk, "include": ["my_rating"]},
+                {"resource": "movie", "id": 999999},
+                {"resource": "user", "id": authors[0].pk},
+                {"resource": "rating", "movie": movies[1].pk},
+                {"resource": "favorite", "movie": movies[1].pk},
+            ]
+        },
+        format="json",
+    )
+    assert response.status_code == 200
+    movie, missing, user, rating, favorite = response.data["results"]
+    assert movie["status"] == 200
+    assert movie["data"]["title"] == "Movie 0"
+    assert movie["data"]["my_rating"] == 8
+    assert movie["data"]["is_favorite"] is None
+    assert [a["username"] for a in movie["data"]["authors"]] == [
+        "director0",
+        "director1",
+    ]
+    assert missing == {"status": 404, "error": "Movie not found"}
+    assert user["data"]["username"] == "director0"
+    assert rating["status"] == 404
+    assert favorite["data"]["is_favorite"] is True
+
+
+@pytest.mark.django_db
+def test_batch_loads_each_type_once(catalog, django_assert_num_queries):
+    """
+    Test that the number of queries does not depend on the number of requests.
+    """
+    spectator, authors, movies = catalog
+    client = APIClient()
+    client.force_authenticate(spectator)
+    # movies, movie authors, users, favorites, ratings
+    with django_assert_num_queries(5):
+        response = client.post(
+            "/api/batch/", {"requests": movie_requests(movies, authors)}, format="json"
+        )
+    results = response.data["results"]
+    statuses = [result["status"] for result in results]
+    assert statuses == [200] * 5 + [200, 404, 404] + [200] * 3
+    assert [result["data"]["is_favorite"] for result in results[:3]] == [
+        False,
+        True,
+        False,
+    ]
+
+    with django_assert_num_queries(5):
+        client.post(
+            "/api/batch/",
+            {"requests": movie_requests(movies[:1], authors[:1])},
+            format="json",
+        )
+
+
+@pytest.mark.django_db
+def test_batch_validation(catalog, settings):
+    """
+    Test that invalid batches are rejected, and user data needs authentication.
+    """
+    _, _, movies = catalog
+    settings.BATCH_MAX_REQUESTS = 2
+    client = APIClient()
+    response = client.post(
+        "/api/batch/", {"requests": [{"resource": "movie"}]}, format="json"
+    )
+    assert response.status_code == 400
+    response = client.post(
+        "/api/batch/",
+        {"requests": [{"resource": "user", "id": 1}] * 3},
+        format="json",
+    )
+    assert response.status_code == 400
+
+    response = client.post(
+        "/api/batch/",
+        {"requests": [{"resource": "rating", "movie": movies[0].pk}]},
+        format="json",
+    )
+    assert response.data["results"] == [
+        {"status": 401, "error": "Authentication required"}
+    ]
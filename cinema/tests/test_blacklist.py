@@ -0,0 +1,66 @@
+import pytest
+from datetime import timedelta
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from films.authentication import blacklist_token, is_token_blacklisted
+from films.models import RevokedToken, Users
+
+
+@pytest.fixture
+def client_and_refresh():
+    cache.clear()
+    user = Users.objects.create(username="viewer", role="spectator")
+    refresh = RefreshToken.for_user(user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+    return client, str(refresh)
+
+
+@pytest.mark.django_db
+def test_logout_blacklists_refresh_token(client_and_refresh):
+    """
+    Test that a logged out refresh token can neither be reused nor blacklisted twice.
+    """
+    client, refresh = client_and_refresh
+
+    assert client.post("/api/token/refresh/", {"refresh": refresh}).status_code == 200
+    assert client.post("/api/logout/", {"refresh": refresh}).status_code == 205
+    assert client.post("/api/logout/", {"refresh": refresh}).status_code == 400
+    assert client.post("/api/token/refresh/", {"refresh": refresh}).status_code == 401
+
+    # Still rejected once the cache entry is gone
+    cache.clear()
+    assert client.post("/api/token/refresh/", {"refresh": refresh}).status_code == 401
+
+
+@pytest.mark.django_db
+def test_blacklist_checks_are_cached(client_and_refresh, django_assert_num_queries):
+    """
+    Test that a token is looked up in the blacklist table once, blacklisted or not.
+    """
+    _, refresh = client_and_refresh
+    token = RefreshToken(refresh)
+    assert is_token_blacklisted(token) is False
+    with django_assert_num_queries(0):
+        assert is_token_blacklisted(token) is False
+
+    blacklist_token(token)
+    with django_assert_num_queries(0):
+        assert is_token_blacklisted(token) is True
+
+
+@pytest.mark.django_db
+def test_purge_blacklist_deletes_expired_tokens():
+    """
+    Test that the purge command only deletes expired blacklisted tokens.
+    """
+    now = timezone.now()
+    RevokedToken.objects.create(jti="expired", expires_at=now - timedelta(hours=1))
+    RevokedToken.objects.create(jti="live", expires_at=now + timedelta(hours=1))
+
+    call_command("purge_blacklist")
+
+    assert list(RevokedToken.objects.values_list("jti", flat=True)) == ["live"]
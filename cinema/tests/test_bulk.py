@@ -0,0 +1,100 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from films.models import Movie, Users
+
+
+@pytest.fixture
+def movies():
+    return [
+        Movie.objects.create(
+            title=f"Movie {i}",
+            overview="A movie.",
+            release_date=f"202{i}-01-01",
+            rating=5,
+            status="released",
+            source="tmdb" if i < 2 else "manual",
+        )
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def client():
+    client = APIClient()
+    client.force_authenticate(Users.objects.create(username="director", role="author"))
+    return client
+
+
+@pytest.mark.django_db
+def test_bulk_archive_by_ids(client, movies):
+    """
+    Test that movies are archived in one UPDATE returning the ids that exist.
+    """
+    ids = [movies[0].pk, movies[1].pk, 999999]
+    with CaptureQueriesContext(connection) as context:
+        response = client.post("/api/movies/bulk-archive/", {"ids": ids}, format="json")
+    assert response.status_code == 200
+    assert response.data["movie_ids"] == [movies[0].pk, movies[1].pk]
+    updates = [q for q in context.captured_queries if q["sql"].startswith("UPDATE")]
+    assert len(updates) == 1
+    assert list(Movie.objects.values_list("pk", flat=True)) == [movies[2].pk]
+
+    response = client.post(
+        "/api/movies/bulk-archive/",
+        {"filter": {"state": "archived"}, "archived": False},
+        format="json",
+    )
+    assert response.data["movie_ids"] == [movies[0].pk, movies[1].pk]
+    assert Movie.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_bulk_update_by_filter(client, movies):
+    """
+    Test that a bulk update only accepts allowed filters and fields.
+    """
+    response = client.post(
+        "/api/movies/bulk-update/",
+        {"filter": {"source": "tmdb"}, "values": {"status": "planned", "rating": 8}},
+        format="json",
+    )
+    assert response.status_code == 200
+    assert response.data["movie_ids"] == [movies[0].pk, movies[1].pk]
+    assert Movie.objects.filter(status="planned", rating=8).count() == 2
+
+    response = client.post(
+        "/api/movies/bulk-update/",
+        {
+            "filter": {"source": "tmdb", "rating_min": 8},
+            "values": {"status": "released"},
+        },
+        format="json",
+    )
+    assert response.data["movie_ids"] == [movies[0].pk, movies[1].pk]
+
+    for data in [
+        {"filter": {"title__startswith": "M"}, "values": {"rating": 1}},
+        {"filter": {"release_date__gte": "2000-01-01"}, "values": {"rating": 1}},
+        {"filter": {"rating_min": 9, "rating_max": 2}, "values": {"rating": 1}},
+        {"filter": {}, "values": {"rating": 1}},
+        {"ids": [movies[0].pk], "values": {"title": "Renamed"}},
+        {"ids": [movies[0].pk], "values": {"rating": 42}},
+        {"ids": [movies[0].pk], "filter": {"source": "tmdb"}, "values": {}},
+    ]:
+        response = client.post("/api/movies/bulk-update/", data, format="json")
+        assert response.status_code == 400
+    assert not Movie.objects.filter(rating=1).exists()
+
+
+@pytest.mark.django_db
+def test_bulk_actions_require_an_author(movies):
+    """
+    Test that anonymous users cannot run bulk actions.
+    """
+    response = APIClient().post(
+        "/api/movies/bulk-archive/", {"ids": [movies[0].pk]}, format="json"
+    )
+    assert response.status_code == 403
+    assert Movie.objects.count() == 3
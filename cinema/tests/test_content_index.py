@@ -0,0 +1,78 @@
+import pytest
+from rest_framework.test import APIClient
+from films.content_index import (build_content_index, content_similar_movie_ids,
+                                 load_content_index)
+from films.models import Movie
+
+
+def create_movie(title, overview, genres):
+    return Movie.objects.create(
+        title=title,
+        overview=overview,
+        release_date="2024-01-01",
+        rating=5,
+        status="released",
+        genres=genres,
+        original_language="en",
+    )
+
+
+@pytest.fixture
+def movies():
+    return {
+        "invasion": create_movie(
+            "Invasion", "Aliens invade the earth from outer space.", "Science Fiction"
+        ),
+        "odyssey": create_movie(
+            "Odyssey", "Astronauts meet aliens in outer space.", "Science Fiction, Drama"
+        ),
+        "paris": create_movie(
+            "Paris", "Two strangers fall in love in Paris.", "Romance, Comedy"
+        ),
+    }
+
+
+@pytest.mark.django_db
+def test_content_similar_movies(movies):
+    """
+    Test that movies sharing overview words and genres are the most similar.
+    """
+    assert build_content_index() == 3
+
+    similar = content_similar_movie_ids(movies["invasion"].pk, 10)
+    assert similar[0] == movies["odyssey"].pk
+    assert movies["invasion"].pk not in similar
+
+
+@pytest.mark.django_db
+def test_index_is_memory_mapped_and_reloaded(movies, content_index_dir):
+    """
+    Test that the index is loaded from memory-mapped files, and reloaded after a rebuild
+    which keeps the previous version.
+    """
+    build_content_index()
+    matrix, _ = load_content_index()
+    # Read-only views on the mapped files, not copies
+    assert not matrix.data.flags.owndata
+    assert not matrix.data.flags.writeable
+
+    create_movie("Sequel", "Aliens invade again.", "Science Fiction")
+    build_content_index()
+    assert load_content_index()[0].shape[0] == 4
+
+    # The previous version is kept until the next build, older ones are deleted
+    versions = sorted(content_index_dir.glob("v*"))
+    assert len(versions) == 2
+    build_content_index()
+    assert sorted(content_index_dir.glob("v*"))[0] == versions[1]
+    assert len(list(content_index_dir.glob("v*"))) == 2
+
+
+@pytest.mark.django_db
+def test_similar_endpoint_falls_back_to_content(movies):
+    """
+    Test that movies without likes still get similar movies from their content.
+    """
+    build_content_index()
+    response = APIClient().get(f"/api/movies/{movies['invasion'].pk}/similar/")
+    assert response.data["results"][0]["title"] == "Odyssey"
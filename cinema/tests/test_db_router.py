@@ -0,0 +1,66 @@
+import pytest
+from rest_framework.test import APIClient
+from config.db_router import ReplicaRouter, read_from_replica
+from films.models import Movie, Users
+
+
+@pytest.fixture
+def read_log(monkeypatch):
+    """
+    Record the database chosen for each read, with a single fake replica.
+    """
+    log = []
+    monkeypatch.setattr("django.conf.settings.DATABASE_REPLICAS", ["replica"])
+    db_for_read = ReplicaRouter.db_for_read
+
+    def logged_db_for_read(self, model, **hints):
+        alias = db_for_read(self, model, **hints)
+        log.append(alias)
+        # The fake replica does not exist, the read really runs on the default database
+        return "default"
+
+    monkeypatch.setattr(ReplicaRouter, "db_for_read", logged_db_for_read)
+    return log
+
+
+def test_router_reads_from_replica_inside_block(settings):
+    """
+    Test that reads go to a replica inside read_from_replica only, and writes never do.
+    """
+    settings.DATABASE_REPLICAS = ["replica"]
+    router = ReplicaRouter()
+
+    assert router.db_for_read(Movie) == "default"
+    with read_from_replica():
+        assert router.db_for_read(Movie) == "replica"
+        assert router.db_for_write(Movie) == "default"
+    assert router.db_for_read(Movie) == "default"
+
+
+@pytest.mark.django_db
+def test_client_reads_primary_after_write(read_log):
+    """
+    Test that safe requests read from a replica, except right after a write by the same client.
+    """
+    movie = Movie.objects.create(
+        title="Replicated Movie",
+        overview="A movie.",
+        release_date="2024-01-01",
+        rating=5,
+        status="released",
+    )
+    spectator = Users.objects.create(username="reader", role="spectator")
+    client = APIClient()
+    client.force_authenticate(spectator)
+
+    read_log.clear()
+    client.get(f"/api/movies/{movie.pk}/")
+    assert "replica" in read_log
+
+    response = client.post(f"/api/favorites/{movie.pk}/add/")
+    assert response.status_code == 201
+    assert "db_pin" in response.cookies
+
+    read_log.clear()
+    client.get(f"/api/movies/{movie.pk}/")
+    assert read_log and "replica" not in read_log
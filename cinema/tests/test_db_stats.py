@@ -0,0 +1,27 @@
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+from films.models import Users
+
+
+@pytest.mark.django_db
+def test_database_status_is_admin_only():
+    """
+    Test that the database status reports connection settings to admins only.
+    """
+    client = APIClient()
+    client.force_authenticate(Users.objects.create(username="viewer", role="spectator"))
+    assert client.get("/api/health/db/").status_code == 403
+
+    client.force_authenticate(
+        Users.objects.create(username="admin", role="author", is_staff=True)
+    )
+    response = client.get("/api/health/db/")
+    assert response.status_code == 200
+    default = response.data["default"]
+    assert default["conn_health_checks"] is True
+    assert default["pool"] is None
+    if connection.vendor == "postgresql":
+        assert sum(default["server_connections"].values()) >= 1
+    else:
+        assert default["server_connections"] == {}
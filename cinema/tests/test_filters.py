@@ -0,0 +1,188 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from films.checks import check_movie_filter_indexes
+from films.models import Movie, Users
+
+
+@pytest.fixture
+def movies():
+    author = Users.objects.create(username="director", role="author")
+    for title, release_date, rating, language, genres in [
+        ("Alien", "1979-05-25", 9, "en", "Horror, Science Fiction"),
+        ("Ringu", "1998-01-31", 7, "ja", "Horror"),
+        ("Amelie", "2001-04-25", 8, "fr", "Comedy, Romance"),
+        ("Heat", "1995-12-15", 6, "en", "Action, Drama"),
+    ]:
+        movie = Movie.objects.create(
+            title=title,
+            overview="A movie.",
+            release_date=release_date,
+            rating=rating,
+            status="released",
+            original_language=language,
+            genres=genres,
+        )
+        if language == "en":
+            movie.authors.add(author)
+    return author
+
+
+def titles(response):
+    return sorted(movie["title"] for movie in response.data)
+
+
+@pytest.mark.django_db
+def test_filters_combine(movies):
+    """
+    Test that every filter narrows the list, and that they combine.
+    """
+    client = APIClient()
+    assert titles(client.get("/api/movies/?genre=horror")) == ["Alien", "Ringu"]
+    assert titles(client.get("/api/movies/?genre=Horror&genre=science fiction")) == [
+        "Alien"
+    ]
+    assert titles(client.get("/api/movies/?rating_min=7&rating_max=8")) == [
+        "Amelie",
+        "Ringu",
+    ]
+    assert titles(client.get("/api/movies/?original_language=en&rating_min=7")) == [
+        "Alien"
+    ]
+    assert titles(client.get(f"/api/movies/?author={movies.pk}")) == ["Alien", "Heat"]
+    assert titles(client.get("/api/movies/?year=1998")) == ["Ringu"]
+    assert titles(
+        client.get(
+            "/api/movies/?release_date_after=1990-01-01&release_date_before=1999-12-31"
+        )
+    ) == ["Heat", "Ringu"]
+
+
+@pytest.mark.django_db
+def test_state_filter(movies):
+    """
+    Test that the state filter lists archived movies, and active ones by default.
+    """
+    Movie.objects.filter(title="Heat").update(state="archived")
+    client = APIClient()
+    assert titles(client.get("/api/movies/?state=archived")) == ["Heat"]
+    assert "Heat" not in titles(client.get("/api/movies/?state=active"))
+    assert "Heat" not in titles(client.get("/api/movies/"))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "query",
+    [
+        "rating_min=9&rating_max=2",
+        "rating_min=11",
+        "release_date_after=2000-01-01&release_date_before=1999-01-01",
+        "year=1998&release_date_after=1990-01-01",
+        "release_date_after=yesterday",
+        "status=unknown",
+        "state=deleted",
+    ],
+)
+def test_invalid_filters_are_rejected(query, django_assert_num_queries):
+    """
+    Test that invalid values and contradictory filters get a 400 without any query.
+    """
+    with django_assert_num_queries(0):
+        response = APIClient().get(f"/api/movies/?{query}")
+    assert response.status_code == 400
+    assert "error" in response.data
+
+
+@pytest.mark.django_db
+def test_cursor_pagination(movies):
+    """
+    Test that cursor pagination walks through a filtered list in an indexed order.
+    """
+    client = APIClient()
+    response = client.get(
+        "/api/movies/?cursor=&page_size=2&ordering=-rating&rating_min=7"
+    )
+    assert [movie["title"] for movie in response.data["results"]] == ["Alien", "Amelie"]
+    assert "count" not in response.data
+
+    response = client.get(response.data["next"])
+    assert [movie["title"] for movie in response.data["results"]] == ["Ringu"]
+    assert response.data["next"] is None
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_is_a_keyset(movies):
+    """
+    Test that cursor pagination walks through many movies sharing a rating, past
+    the offset cutoff of CursorPagination, without an OFFSET, in both directions.
+    """
+    Movie.objects.bulk_create(
+        Movie(
+            title=f"Sequel {number}",
+            overview="A movie.",
+            release_date="2010-01-01",
+            rating=7,
+            status="released",
+        )
+        for number in range(1200)
+    )
+    expected = list(
+        Movie.objects.order_by("-rating", "-id").values_list("id", flat=True)
+    )
+    client = APIClient()
+    pages = []
+    url = "/api/movies/?cursor=&page_size=500&ordering=-rating"
+    while url:
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert not any("OFFSET" in query["sql"] for query in context.captured_queries)
+        pages.append([movie["id"] for movie in response.data["results"]])
+        url = response.data["next"]
+    assert sum(pages, []) == expected
+
+    # Back from the last page
+    previous = client.get(response.data["previous"])
+    assert [movie["id"] for movie in previous.data["results"]] == pages[-2]
+
+    assert client.get("/api/movies/?cursor=cD1vb3Bz").status_code == 404
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_rejects_invalid_combinations(movies):
+    """
+    Test that cursor pagination refuses unindexed orderings and page numbers.
+    """
+    client = APIClient()
+    response = client.get("/api/movies/?cursor=&ordering=title")
+    assert response.status_code == 400
+    response = client.get("/api/movies/?cursor=&page=2")
+    assert response.status_code == 400
+    response = client.get("/api/movies/?ordering=title&page_size=2")
+    assert response.status_code == 200
+
+
+def test_filter_indexes_check(monkeypatch):
+    """
+    Test that the system check reports filters without a suitable index.
+    """
+    assert check_movie_filter_indexes(None) == []
+    monkeypatch.setattr(
+        "films.filters.MOVIE_FILTERS",
+        {
+            "overview": ("overview__icontains", None),
+            "title": ("title", "movie_missing_idx"),
+            "rating": ("rating", "movie_active_status_idx"),
+            "genre": ("genre_list__contains", "movie_active_genres_idx"),
+            "language": ("original_language", "movie_active_genres_idx"),
+            "state": ("state", "movie_active_status_idx"),
+        },
+    )
+    errors = check_movie_filter_indexes(None)
+    assert [error.id for error in errors] == [
+        "films.E001",
+        "films.E002",
+        "films.E003",
+        "films.E003",
+        "films.E003",
+    ]
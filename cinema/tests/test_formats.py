@@ -0,0 +1,83 @@
+import gzip
+import msgpack
+import pytest
+from rest_framework.test import APIClient
+from films.models import Movie, Users
+
+
+@pytest.fixture
+def movies():
+    for i in range(30):
+        Movie.objects.create(
+            title=f"Movie {i}",
+            overview="A movie with a rather long overview. " * 5,
+            release_date="2024-01-01",
+            rating=5,
+            status="released",
+        )
+
+
+@pytest.mark.django_db
+def test_messagepack_responses_and_requests(movies):
+    """
+    Test that MessagePack is rendered on request, with the same data as JSON,
+    and accepted as a request body.
+    """
+    client = APIClient()
+    response = client.get("/api/movies/", HTTP_ACCEPT="application/msgpack")
+    assert response["Content-Type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == client.get("/api/movies/").json()
+
+    spectator = Users.objects.create(username="viewer", role="spectator")
+    client.force_authenticate(spectator)
+    movie = Movie.objects.first()
+    response = client.post(
+        f"/api/rating/{movie.pk}/add-to-movie/",
+        msgpack.packb({"rating": 8}),
+        content_type="application/msgpack",
+    )
+    assert response.status_code == 201
+    assert response.data["rating"]["rating"] == 8
+
+
+@pytest.mark.django_db
+def test_responses_are_compressed_above_threshold(movies):
+    """
+    Test that large responses are compressed for clients accepting it, and small ones are not.
+    """
+    client = APIClient()
+    response = client.get("/api/movies/", HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response["Vary"]
+    assert gzip.decompress(response.content) == client.get("/api/movies/").content
+
+    movie = Movie.objects.first()
+    response = client.get(f"/api/movies/{movie.pk}/", HTTP_ACCEPT_ENCODING="gzip")
+    assert not response.has_header("Content-Encoding")
+
+    brotli = pytest.importorskip("brotli")
+    response = client.get("/api/movies/", HTTP_ACCEPT_ENCODING="gzip, br")
+    assert response["Content-Encoding"] == "br"
+    assert brotli.decompress(response.content) == client.get("/api/movies/").content
+
+
+@pytest.mark.django_db
+def test_refused_encodings_and_html_are_not_compressed(movies):
+    """
+    Test that codings with a zero quality value are refused, and that HTML pages
+    (which hold a CSRF token) are not compressed.
+    """
+    client = APIClient()
+    for accept_encoding in ["gzip;q=0", "*;q=0", "identity", "br;q=0, gzip;q=0.0"]:
+        response = client.get("/api/movies/", HTTP_ACCEPT_ENCODING=accept_encoding)
+        assert not response.has_header("Content-Encoding")
+    response = client.get("/api/movies/", HTTP_ACCEPT_ENCODING="br;q=0, *")
+    assert response["Content-Encoding"] == "gzip"
+    response = client.get("/api/movies/", HTTP_ACCEPT_ENCODING="gzip, br;q=0.5")
+    assert response["Content-Encoding"] == "gzip"
+
+    response = client.get(
+        "/api/movies/?page_size=100", HTTP_ACCEPT="text/html", HTTP_ACCEPT_ENCODING="gzip"
+    )
+    assert response["Content-Type"].startswith("text/html")
+    assert not response.has_header("Content-Encoding")
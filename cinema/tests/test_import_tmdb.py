@@ -0,0 +1,102 @@
+import pytest
+from unittest.mock import patch
+from django.core.management import call_command
+from films.models import Job, Movie, Users
+
+POPULAR = {"results": [{"id": 1}, {"id": 2}]}
+
+
+def fake_movie(movie_id):
+    return {
+        "title": f"Movie {movie_id}",
+        "release_date": "2024-01-01",
+        "overview": "An imported movie.",
+        "vote_average": 7,
+        "status": "Released",
+        "genres": [{"name": "Drama"}],
+        "original_title": f"Movie {movie_id}",
+        "original_language": "en",
+        "poster_path": f"/poster{movie_id}.jpg",
+        "credits": {"crew": [{"id": 42, "name": "Jane Doe", "job": "Director"}]},
+    }
+
+
+def fake_tmdb(endpoint, params=None):
+    if endpoint == "movie/popular":
+        return POPULAR
+    if endpoint.startswith("movie/"):
+        return fake_movie(int(endpoint.split("/")[1]))
+    if endpoint == "person/42":
+        return {"birthday": "1960-05-04"}
+    raise AssertionError(f"Unexpected TMDb call: {endpoint}")
+
+
+@pytest.mark.django_db
+@patch("films.management.commands.import_tmdb.get_tmdb_data", side_effect=fake_tmdb)
+def test_import_uses_one_request_per_movie(mock_get):
+    """
+    Test that movie details and credits come from a single appended request,
+    and that a shared director is only fetched once.
+    """
+    call_command("import_tmdb")
+
+    endpoints = [call.args[0] for call in mock_get.call_args_list]
+    assert endpoints == ["movie/popular", "movie/1", "movie/2", "person/42"]
+    assert mock_get.call_args_list[1].kwargs["params"] == {
+        "append_to_response": "credits"
+    }
+    assert Movie.objects.count() == 2
+    author = Users.objects.get(username="jane_doe")
+    assert str(author.date_of_birth) == "1960-05-04"
+    assert author.tmdb_person_id == 42
+    # Images are downloaded by a separate job
+    job = Job.objects.get(name="download_movie_images")
+    assert sorted(job.payload["movie_ids"]) == sorted(
+        Movie.objects.values_list("pk", flat=True)
+    )
+    assert Movie.objects.filter(poster_path="/poster1.jpg").exists()
+
+
+@pytest.mark.django_db
+@patch("films.management.commands.import_tmdb.get_tmdb_data", side_effect=fake_tmdb)
+def test_import_skips_known_directors(mock_get):
+    """
+    Test that directors already stored locally are not fetched again.
+    """
+    Users.objects.create(
+        username="jane_doe", role="author", source="tmdb", date_of_birth="1960-05-04"
+    )
+
+    call_command("import_tmdb")
+
+    endpoints = [call.args[0] for call in mock_get.call_args_list]
+    assert "person/42" not in endpoints
+    assert len(endpoints) == 3
+
+
+@pytest.mark.django_db
+@patch("films.management.commands.import_tmdb.get_tmdb_data", side_effect=fake_tmdb)
+@pytest.mark.parametrize("source", ["tmdb", "manual"])
+def test_import_resolves_directors_by_tmdb_id(mock_get, source):
+    """
+    Test that directors are matched by TMDb person id rather than by name, and
+    that a namesake spectator is never taken for the director, whatever its source.
+    """
+    Users.objects.create(username="jane_doe", role="spectator", source=source)
+
+    call_command("import_tmdb")
+    author = Users.objects.get(tmdb_person_id=42)
+    assert author.username == "jane_doe_42"
+    assert Users.objects.filter(username="jane_doe", role="spectator").exists()
+
+    mock_get.reset_mock()
+    author.username = "renamed"
+    author.save()
+    call_command("import_tmdb")
+    endpoints = [call.args[0] for call in mock_get.call_args_list]
+    assert "person/42" not in endpoints
+    assert Users.objects.filter(role="author").count() == 1
+    assert list(Movie.objects.values_list("authors__username", flat=True)) == [
+        "renamed",
+        "renamed",
+    ]
@@ -0,0 +1,112 @@
+from datetime import timedelta
+from unittest.mock import patch
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+from films.jobs import TASKS, enqueue
+from films.models import Job, Movie, Rating, Users
+
+
+@pytest.fixture
+def failing_task():
+    def fail():
+        raise RuntimeError("boom")
+
+    TASKS["fail"] = fail
+    yield "fail"
+    del TASKS["fail"]
+
+
+@pytest.mark.django_db
+def test_recompute_ratings_job():
+    """
+    Test that a queued rating recompute is run by the worker and updates the movie aggregates.
+    """
+    movie = Movie.objects.create(
+        title="Rated Movie",
+        overview="A rated movie.",
+        release_date="2024-01-01",
+        rating=5,
+        status="released",
+    )
+    for username, value in [("alice", 4), ("bob", 8)]:
+        spectator = Users.objects.create(username=username, role="spectator")
+        Rating.objects.create(movie=movie, spectator=spectator, rating=value)
+
+    job = enqueue("recompute_movie_ratings", movie_ids=[movie.pk])
+    call_command("run_jobs", "--burst")
+
+    job.refresh_from_db()
+    movie.refresh_from_db()
+    assert job.status == "done"
+    assert job.attempts == 1
+    assert movie.ratings_count == 2
+    assert movie.ratings_average == 6
+
+
+@pytest.mark.django_db
+def test_failing_job_is_retried_then_failed(failing_task):
+    """
+    Test that a failing job is queued again with a delay, then failed after its last attempt.
+    """
+    job = enqueue(failing_task, max_attempts=2)
+
+    call_command("run_jobs", "--burst")
+    job.refresh_from_db()
+    assert job.status == "queued"
+    assert job.run_at > timezone.now()
+    assert "boom" in job.last_error
+
+    Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+    call_command("run_jobs", "--burst")
+    job.refresh_from_db()
+    assert job.status == "failed"
+    assert job.attempts == 2
+
+
+@pytest.mark.django_db
+def test_lost_running_jobs_are_requeued(failing_task, settings):
+    """
+    Test that jobs left running by a dead worker are requeued after the timeout,
+    or failed when they had no attempt left.
+    """
+    settings.JOB_TIMEOUT = 60
+    started_at = timezone.now() - timedelta(seconds=120)
+    lost = enqueue(failing_task, max_attempts=3)
+    exhausted = enqueue(failing_task, max_attempts=1)
+    running = enqueue(failing_task)
+    Job.objects.filter(pk__in=[lost.pk, exhausted.pk]).update(
+        status="running", attempts=1, started_at=started_at
+    )
+    Job.objects.filter(pk=running.pk).update(
+        status="running", attempts=1, started_at=timezone.now()
+    )
+
+    call_command("run_jobs", "--burst")
+    lost.refresh_from_db()
+    exhausted.refresh_from_db()
+    running.refresh_from_db()
+    # Requeued, then run again and failed by the task
+    assert (lost.status, lost.attempts) == ("queued", 2)
+    assert "boom" in lost.last_error
+    assert exhausted.status == "failed"
+    assert "worker lost" in exhausted.last_error
+    assert running.status == "running"
+
+
+@pytest.mark.django_db
+@patch("films.management.commands.import_tmdb.get_tmdb_data")
+def test_failed_import_fails_its_job(mock_get):
+    """
+    Test that a TMDb error fails the import command, so its job is retried.
+    """
+    mock_get.side_effect = RuntimeError("TMDb is down")
+    with pytest.raises(CommandError):
+        call_command("import_tmdb")
+
+    job = enqueue("import_tmdb")
+    call_command("run_jobs", "--burst")
+    job.refresh_from_db()
+    assert job.status == "queued"
+    assert "TMDb is down" in job.last_error
@@ -0,0 +1,193 @@
+import hashlib
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from rest_framework.test import APIClient
+from films.models import Movie, OutboxEvent, Users, Webhook
+from films.outbox import claim_webhook, emit, pending_events, prune_events
+
+
+@pytest.fixture
+def webhook_server():
+    """
+    Local HTTP server recording the webhook requests, failing while `fail` is set.
+    """
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append((dict(self.headers), body))
+            self.send_response(500 if server.fail else 204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    server.fail = False
+    server.received = received
+    server.url = f"http://127.0.0.1:{server.server_port}/hook"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+def create_movie(title="Movie"):
+    return Movie.objects.create(
+        title=title,
+        overview="A movie.",
+        release_date="2024-01-01",
+        rating=5,
+        status="released",
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_changes_are_written_with_the_transaction():
+    """
+    Test that events are only written when their transaction commits.
+    """
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            create_movie()
+            raise RuntimeError("rollback")
+    assert not OutboxEvent.objects.exists()
+
+    movie = create_movie()
+    spectator = Users.objects.create(username="viewer", role="spectator")
+    client = APIClient()
+    client.force_authenticate(spectator)
+    client.post(f"/api/rating/{movie.pk}/add-to-movie/", {"rating": 7})
+    client.post(f"/api/favorites/{movie.pk}/add/")
+
+    topics = list(OutboxEvent.objects.order_by("pk").values_list("topic", flat=True))
+    assert topics == ["movie.changed", "rating.changed", "favorite.added"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_changes_endpoint_pages_with_a_cursor(admin_user):
+    """
+    Test that changes are pulled incrementally after a cursor.
+    """
+    for title in "ABC":
+        create_movie(title)
+    client = APIClient()
+    client.force_authenticate(admin_user)
+
+    response = client.get("/api/changes/?since=0&limit=2")
+    assert [e["topic"] for e in response.data["results"]] == ["movie.changed"] * 2
+    assert response.data["has_more"] is True
+
+    response = client.get(f"/api/changes/?since={response.data['cursor']}")
+    assert len(response.data["results"]) == 1
+    assert response.data["has_more"] is False
+    response = client.get(f"/api/changes/?since={response.data['cursor']}")
+    assert response.data["results"] == []
+
+    assert APIClient().get("/api/changes/").status_code in (401, 403)
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Other backends serialize writes"
+)
+@pytest.mark.django_db(transaction=True)
+def test_events_of_running_transactions_are_not_skipped():
+    """
+    Test that an event with a lower id, from a newer transaction still running
+    when a later event is read, is read once its transaction commits.
+    """
+    other = connection.get_new_connection(connection.get_connection_params())
+    try:
+        with transaction.atomic():
+            # This transaction gets the older transaction id...
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_current_xact_id()")
+            # ...the other one writes the lower event id, and stays open
+            with other.cursor() as cursor:
+                cursor.execute(
+                    "INSERT INTO films_outboxevent (topic, object_id, data, created_at) "
+                    "VALUES ('movie.changed', 1, '{}', now())"
+                )
+            emit("movie.changed", 2)
+
+        events = pending_events((0, 0))
+        assert [event.object_id for event in events] == [2]
+        cursor = (events[-1].transaction_id, events[-1].pk)
+
+        other.commit()
+        events = pending_events(cursor)
+        assert [event.object_id for event in events] == [1]
+        assert pending_events((events[-1].transaction_id, events[-1].pk)) == []
+    finally:
+        other.close()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_webhooks_receive_batches_with_retries(webhook_server):
+    """
+    Test that events are delivered in signed batches, and retried after a failure.
+    """
+    webhook = Webhook.objects.create(
+        url=webhook_server.url, topics=["movie."], secret="s3cret"
+    )
+    movie = create_movie()
+    Users.objects.create(username="viewer", role="spectator")
+
+    webhook_server.fail = True
+    call_command("dispatch_webhooks", "--burst")
+    webhook.refresh_from_db()
+    assert (webhook.cursor, webhook.failures) == (0, 1)
+
+    webhook_server.fail = False
+    Webhook.objects.filter(pk=webhook.pk).update(retry_at=webhook.created_at)
+    call_command("dispatch_webhooks", "--burst")
+    webhook.refresh_from_db()
+    assert webhook.failures == 0
+
+    headers, body = webhook_server.received[-1]
+    payload = json.loads(body)
+    assert [(e["topic"], e["object_id"]) for e in payload["events"]] == [
+        ("movie.changed", movie.pk)
+    ]
+    assert f"{webhook.cursor_transaction_id}.{webhook.cursor}" == payload["cursor"]
+    signature = hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+    assert headers["X-Webhook-Signature"] == f"sha256={signature}"
+
+    # Nothing new, nothing sent
+    call_command("dispatch_webhooks", "--burst")
+    assert len(webhook_server.received) == 2
+
+
+@pytest.mark.django_db
+def test_claimed_webhooks_are_skipped():
+    """
+    Test that a webhook being delivered by a dispatcher is skipped by the others.
+    """
+    webhook = Webhook.objects.create(url="http://127.0.0.1:9/hook")
+    assert claim_webhook() == webhook
+    assert claim_webhook() is None
+
+
+@pytest.mark.django_db
+def test_events_not_delivered_are_kept(settings):
+    """
+    Test that old events are only pruned once every active webhook received them.
+    """
+    settings.OUTBOX_RETENTION_DAYS = 0
+    first, second = create_movie("First"), create_movie("Second")
+    delivered = OutboxEvent.objects.get(object_id=first.pk)
+    Webhook.objects.create(
+        url="http://127.0.0.1:9/hook",
+        cursor_transaction_id=delivered.transaction_id,
+        cursor=delivered.pk,
+    )
+    Webhook.objects.create(url="http://127.0.0.1:9/off", is_active=False)
+
+    assert prune_events() == 1
+    assert list(OutboxEvent.objects.values_list("object_id", flat=True)) == [second.pk]
@@ -0,0 +1,47 @@
+import pytest
+from rest_framework.test import APIClient
+from films.models import Movie
+
+
+@pytest.fixture
+def movies():
+    for i in range(3):
+        Movie.objects.create(
+            title=f"Movie {i}",
+            overview="A movie.",
+            release_date="2024-01-01",
+            rating=5,
+            status="released",
+            source="manual",
+        )
+
+
+@pytest.mark.django_db
+def test_list_is_paginated_on_request(movies):
+    """
+    Test that lists are only paginated when a page size is requested, with exact small counts.
+    """
+    client = APIClient()
+    assert len(client.get("/api/movies/").data) == 3
+
+    response = client.get("/api/movies/?page_size=2")
+    assert response.data["count"] == 3
+    assert response.data["count_is_estimate"] is False
+    assert len(response.data["results"]) == 2
+
+
+@pytest.mark.django_db
+def test_large_tables_use_estimated_count(movies, monkeypatch):
+    """
+    Test that the planner estimate is used above the threshold, but not for filtered lists.
+    """
+    monkeypatch.setattr("films.pagination.estimate_count", lambda queryset: 1_000_000)
+    client = APIClient()
+
+    response = client.get("/api/movies/?page_size=2")
+    assert response.data["count"] == 1_000_000
+    assert response.data["count_is_estimate"] is True
+
+    response = client.get("/api/movies/?page_size=2&source=manual")
+    assert response.data["count"] == 3
+    assert response.data["count_is_estimate"] is False
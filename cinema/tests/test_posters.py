@@ -0,0 +1,81 @@
+import pytest
+from io import BytesIO
+from unittest.mock import patch
+from PIL import Image
+from rest_framework.test import APIClient
+from films.models import Movie, TmdbImage
+from films.posters import download_movie_images
+
+
+def fake_image(path):
+    if path == "/broken.jpg":
+        raise OSError("connection reset")
+    output = BytesIO()
+    color = "blue" if path in ("/poster.jpg", "/same-poster.jpg") else "green"
+    Image.new("RGB", (1000, 1500), color).save(output, "JPEG")
+    return output.getvalue()
+
+
+def create_movie(title, poster_path, backdrop_path=None):
+    return Movie.objects.create(
+        title=title,
+        overview="A movie.",
+        release_date="2024-01-01",
+        rating=5,
+        status="released",
+        poster_path=poster_path,
+        backdrop_path=backdrop_path,
+    )
+
+
+@pytest.mark.django_db
+@patch("films.posters.get_tmdb_image", side_effect=fake_image)
+def test_movie_images_are_downloaded_once(mock_get, media_root):
+    """
+    Test that images are downloaded once per path, resized once per content,
+    and exposed as local variants.
+    """
+    movie = create_movie("A", "/poster.jpg", "/backdrop.jpg")
+    create_movie("B", "/poster.jpg")
+    create_movie("C", "/same-poster.jpg")
+
+    assert download_movie_images() == 3
+    assert sorted(call.args[0] for call in mock_get.call_args_list) == [
+        "/backdrop.jpg",
+        "/poster.jpg",
+        "/same-poster.jpg",
+    ]
+    poster, same = TmdbImage.objects.filter(
+        path__in=["/poster.jpg", "/same-poster.jpg"]
+    )
+    assert poster.checksum == same.checksum
+    assert poster.variants == same.variants
+    assert set(Movie.objects.get(title="B").images) == {"poster"}
+
+    # Already downloaded images are not fetched again
+    mock_get.reset_mock()
+    assert download_movie_images() == 0
+    assert not mock_get.called
+
+    response = APIClient().get(f"/api/movies/{movie.pk}/?poster_size=300")
+    url = response.data["movie"]["poster_url"]
+    assert url.endswith(poster.variants["342"]["webp"])
+    assert response.data["movie"]["backdrop_url"] is not None
+    response = APIClient().get(url)
+    assert response["Cache-Control"] == "public, max-age=31536000, immutable"
+    image = Image.open(BytesIO(b"".join(response.streaming_content)))
+    assert image.size == (342, 513)
+
+
+@pytest.mark.django_db
+@patch("films.posters.get_tmdb_image", side_effect=fake_image)
+def test_failed_downloads_do_not_stop_the_others(mock_get, media_root):
+    """
+    Test that a failed download is reported after the other images are saved.
+    """
+    create_movie("A", "/poster.jpg", "/broken.jpg")
+
+    with pytest.raises(RuntimeError):
+        download_movie_images()
+    assert set(Movie.objects.get().images) == {"poster"}
+    assert APIClient().get("/api/movies/").data[0]["poster_url"] is not None
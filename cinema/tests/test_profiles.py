@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+
+CHECK_ROUTES = """
+import django
+from django.urls import Resolver404, resolve
+
+django.setup()
+for path in ["/api/movies/", "/admin/", "/api-auth/login/"]:
+    try:
+        resolve(path)
+        print(path)
+    except Resolver404:
+        pass
+"""
+
+
+@pytest.mark.parametrize(
+    "profile, routes",
+    [
+        ("config.profiles.api", ["/api/movies/"]),
+        ("config.profiles.admin", ["/api/movies/", "/admin/", "/api-auth/login/"]),
+        ("config.profiles.importer", ["/api/movies/"]),
+    ],
+)
+def test_profile_starts_with_its_routes(profile, routes):
+    """
+    Test that each settings profile starts in a fresh interpreter and only routes to installed apps.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", CHECK_ROUTES],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": profile},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == routes
@@ -0,0 +1,116 @@
+import re
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from films.models import AuthorRating, Movie, Rating, Users
+
+
+@pytest.fixture
+def movie():
+    return Movie.objects.create(
+        title="Rated Movie",
+        overview="A movie.",
+        release_date="2024-01-01",
+        rating=5,
+        status="released",
+    )
+
+
+@pytest.fixture
+def client_and_spectator():
+    spectator = Users.objects.create(username="critic", role="spectator")
+    client = APIClient()
+    client.force_authenticate(spectator)
+    return client, spectator
+
+
+@pytest.mark.django_db
+def test_rating_again_replaces_previous_rating(client_and_spectator, movie):
+    """
+    Test that rating a movie or an author twice keeps a single, updated rating.
+    """
+    client, spectator = client_and_spectator
+    author = Users.objects.create(username="director", role="author")
+
+    for value in [4, 9]:
+        url = f"/api/rating/{movie.pk}/add-to-movie/"
+        assert client.post(url, {"rating": value}).status_code == 201
+        url = f"/api/rating/{author.pk}/add-to-author/"
+        assert client.post(url, {"rating": value}).status_code == 201
+
+    assert list(Rating.objects.values_list("spectator", "rating")) == [(spectator.pk, 9)]
+    assert list(AuthorRating.objects.values_list("spectator", "rating")) == [
+        (spectator.pk, 9)
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("value", [42, 0, -5, "ten", ""])
+def test_invalid_ratings_are_rejected(client_and_spectator, movie, value):
+    """
+    Test that ratings outside 1..10 get a 400 and store nothing.
+    """
+    client, _ = client_and_spectator
+    author = Users.objects.create(username="director", role="author")
+
+    for url in [
+        f"/api/rating/{movie.pk}/add-to-movie/",
+        f"/api/rating/{author.pk}/add-to-author/",
+    ]:
+        response = client.post(url, {"rating": value})
+        assert response.status_code == 400
+        assert "error" in response.data
+    assert not Rating.objects.exists()
+    assert not AuthorRating.objects.exists()
+
+
+@pytest.mark.django_db
+def test_rating_unknown_author(client_and_spectator):
+    """
+    Test that rating an unknown or invalid author gets a 404.
+    """
+    client, _ = client_and_spectator
+    for pk in ["abc", 0]:
+        url = f"/api/rating/{pk}/add-to-author/"
+        assert client.post(url, {"rating": 5}).status_code == 404
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Drops constraints the PostgreSQL way"
+)
+@pytest.mark.django_db
+def test_dedupe_ratings_keeps_latest(client_and_spectator, movie):
+    """
+    Test that duplicate ratings from before the unique constraint are compacted to the latest one.
+    """
+    _, spectator = client_and_spectator
+    other = Users.objects.create(username="other", role="spectator")
+    # Databases created before the constraint may hold duplicates
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, "films_rating")
+        [name] = [
+            name
+            for name, constraint in constraints.items()
+            if constraint["unique"] and constraint["columns"] == ["spectator_id", "movie_id"]
+        ]
+        cursor.execute(f'ALTER TABLE films_rating DROP CONSTRAINT "{name}"')
+        cursor.execute("ALTER TABLE films_rating ALTER COLUMN movie_id DROP NOT NULL")
+    for value in [2, 4, 8]:
+        Rating.objects.create(spectator=spectator, movie=movie, rating=value)
+    Rating.objects.create(spectator=other, movie=movie, rating=6)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO films_rating (spectator_id, rating) VALUES (%s, 3)",
+            [other.pk],
+        )
+
+    # A single DELETE, whatever the number of duplicates, which only touches the
+    # rating table as the other tables may not be migrated yet
+    with CaptureQueriesContext(connection) as context:
+        call_command("dedupe_ratings")
+    assert len(context.captured_queries) == 1
+    tables = re.findall(r'"(films_\w+)"', context.captured_queries[0]["sql"])
+    assert set(tables) == {"films_rating"}
+    assert sorted(Rating.objects.values_list("rating", flat=True)) == [6, 8]
@@ -0,0 +1,61 @@
+import pytest
+from rest_framework.test import APIClient
+from films.models import Favorite, Movie, Rating, Users
+from films.recommendations import build_recommendations
+
+
+@pytest.fixture
+def movies():
+    movies = {}
+    for title in "ABCD":
+        movies[title] = Movie.objects.create(
+            title=title,
+            overview="A movie.",
+            release_date="2024-01-01",
+            rating=5,
+            status="released",
+        )
+    likes = {"s1": "AB", "s2": "ABC", "s3": "CD"}
+    for username, titles in likes.items():
+        spectator = Users.objects.create(username=username, role="spectator")
+        for title in titles:
+            Favorite.objects.create(spectator=spectator, movie=movies[title])
+    # A low rating is not a like
+    disliker = Users.objects.create(username="s4", role="spectator")
+    Rating.objects.create(spectator=disliker, movie=movies["A"], rating=2)
+    Rating.objects.create(spectator=disliker, movie=movies["D"], rating=9)
+    return movies
+
+
+@pytest.mark.django_db
+def test_similar_movies(movies):
+    """
+    Test that similar movies are ranked by how many spectators liked both movies.
+    """
+    assert build_recommendations() == 4
+    # Nothing changed, nothing is rewritten
+    assert build_recommendations() == 0
+
+    response = APIClient().get(f"/api/movies/{movies['A'].pk}/similar/")
+    assert response.status_code == 200
+    assert [m["title"] for m in response.data["results"]] == ["B", "C"]
+
+    for pk in ["not-a-number", 0]:
+        assert APIClient().get(f"/api/movies/{pk}/similar/").status_code == 404
+
+
+@pytest.mark.django_db
+def test_my_recommendations(movies):
+    """
+    Test that recommendations exclude movies the user already liked or rated.
+    """
+    build_recommendations()
+    user = Users.objects.create(username="newcomer", role="spectator")
+    Favorite.objects.create(spectator=user, movie=movies["A"])
+    Rating.objects.create(spectator=user, movie=movies["B"], rating=3)
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.get("/api/users/me/recommendations/")
+    assert response.status_code == 200
+    assert [m["title"] for m in response.data["results"]] == ["C"]
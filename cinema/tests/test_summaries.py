@@ -0,0 +1,98 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from films.models import Favorite, Movie, Rating, SpectatorSummary, Users
+from films.summaries import rebuild_spectator_summaries
+
+
+@pytest.fixture
+def movies():
+    return [
+        Movie.objects.create(
+            title=f"Movie {i}",
+            overview="A movie.",
+            release_date="2024-01-01",
+            rating=5,
+            status="released",
+        )
+        for i in range(3)
+    ]
+
+
+def summary_of(spectator):
+    return APIClient().get(f"/api/spectators/{spectator.pk}/summary/").data
+
+
+@pytest.mark.django_db
+def test_summary_follows_favorites_and_ratings(movies):
+    """
+    Test that the summary counters follow favorite and rating writes through the API.
+    """
+    spectator = Users.objects.create(username="fan", role="spectator")
+    client = APIClient()
+    client.force_authenticate(spectator)
+    assert summary_of(spectator)["favorites_count"] == 0
+
+    for movie in movies:
+        client.post(f"/api/favorites/{movie.pk}/add/")
+    client.delete(f"/api/favorites/{movies[0].pk}/remove/")
+    client.post(f"/api/rating/{movies[0].pk}/add-to-movie/", {"rating": 4})
+    client.post(f"/api/rating/{movies[1].pk}/add-to-movie/", {"rating": 6})
+    # Rating again replaces the previous rating
+    client.post(f"/api/rating/{movies[1].pk}/add-to-movie/", {"rating": 10})
+
+    summary = summary_of(spectator)
+    assert summary["favorites_count"] == 2
+    assert summary["ratings_count"] == 2
+    assert summary["ratings_average"] == 7
+
+    # Deleting a movie removes its favorites and ratings
+    movies[1].delete()
+    summary = summary_of(spectator)
+    assert summary["favorites_count"] == 1
+    assert summary["ratings_count"] == 1
+    assert summary["ratings_average"] == 4
+
+    spectator.delete()
+    assert not SpectatorSummary.objects.exists()
+
+
+@pytest.mark.django_db
+def test_summary_is_one_row_read(movies):
+    """
+    Test that the summary costs a single query, however active the spectator.
+    """
+    spectator = Users.objects.create(username="fan", role="spectator")
+    for movie in movies:
+        Favorite.objects.create(spectator=spectator, movie=movie)
+        Rating.objects.create(spectator=spectator, movie=movie, rating=8)
+
+    with CaptureQueriesContext(connection) as queries:
+        summary = summary_of(spectator)
+    assert len(queries) == 1
+    assert summary["ratings_count"] == 3
+
+    author = Users.objects.create(username="director", role="author")
+    for pk in [0, "abc", author.pk]:
+        assert APIClient().get(f"/api/spectators/{pk}/summary/").status_code == 404
+
+
+@pytest.mark.django_db
+def test_rebuild_summaries(movies):
+    """
+    Test that rebuilding restores counters that drifted from the favorites and ratings.
+    """
+    spectator = Users.objects.create(username="fan", role="spectator")
+    Favorite.objects.create(spectator=spectator, movie=movies[0])
+    Rating.objects.create(spectator=spectator, movie=movies[0], rating=3)
+    SpectatorSummary.objects.filter(pk=spectator.pk).update(
+        favorites_count=10, ratings_count=0, ratings_sum=0
+    )
+
+    assert rebuild_spectator_summaries() == 1
+
+    summary = SpectatorSummary.objects.get(pk=spectator.pk)
+    assert summary.favorites_count == 1
+    assert summary.ratings_count == 1
+    assert summary.ratings_average == 3
@@ -0,0 +1,80 @@
+import pytest
+from rest_framework.test import APIClient
+from films.models import Movie, Users
+from films.throttling import parse_rate
+
+
+@pytest.fixture
+def movie():
+    return Movie.objects.create(
+        title="Throttled Movie",
+        overview="A movie.",
+        release_date="2024-01-01",
+        rating=5,
+        status="released",
+    )
+
+
+def test_parse_rate():
+    """
+    Test that rates give the bucket capacity (burst) and its refill rate per second.
+    """
+    assert parse_rate("120/min") == (120, 2)
+    assert parse_rate("10/s:50") == (50, 10)
+    assert parse_rate(None) is None
+
+
+@pytest.mark.django_db
+def test_anonymous_burst_is_limited(settings, movie):
+    """
+    Test that an anonymous client gets its burst, then 429 with the rate limit headers.
+    """
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {"anon": "1/min:3"},
+    }
+    client = APIClient()
+
+    remaining = []
+    for _ in range(3):
+        response = client.get(f"/api/movies/{movie.pk}/")
+        assert response.status_code == 200
+        assert response["X-RateLimit-Limit"] == "3"
+        remaining.append(response["X-RateLimit-Remaining"])
+    assert remaining == ["2", "1", "0"]
+
+    response = client.get(f"/api/movies/{movie.pk}/")
+    assert response.status_code == 429
+    assert response["X-RateLimit-Remaining"] == "0"
+    assert 0 < int(response["Retry-After"]) <= 60
+
+    # A forged X-Forwarded-For does not give a new bucket
+    response = client.get(f"/api/movies/{movie.pk}/", HTTP_X_FORWARDED_FOR="10.0.0.3")
+    assert response.status_code == 429
+
+    # Another client has its own bucket
+    other = APIClient(REMOTE_ADDR="10.0.0.2")
+    assert other.get(f"/api/movies/{movie.pk}/").status_code == 200
+
+
+@pytest.mark.django_db
+def test_scoped_buckets_add_to_client_bucket(settings, movie):
+    """
+    Test that searches and ratings draw from their own bucket on top of the user's one.
+    """
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {"user": "100/min", "search": "1/min", "ratings": "1/min"},
+    }
+    client = APIClient()
+    client.force_authenticate(Users.objects.create(username="fan", role="spectator"))
+
+    assert client.get("/api/movies/?search=throttled").status_code == 200
+    assert client.get("/api/movies/?search=throttled").status_code == 429
+    assert client.get("/api/movies/").status_code == 200
+
+    url = f"/api/rating/{movie.pk}/add-to-movie/"
+    assert client.post(url, {"rating": 8}).status_code == 201
+    response = client.post(url, {"rating": 9})
+    assert response.status_code == 429
+    assert response["X-RateLimit-Limit"] == "1"
@@ -0,0 +1,61 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from films.models import Favorite, Movie, Rating, Users
+
+
+@pytest.fixture
+def spectator():
+    spectator = Users.objects.create(username="spectator", role="spectator")
+    author = Users.objects.create(username="director", role="author")
+    for i in range(6):
+        movie = Movie.objects.create(
+            title=f"Movie {i}",
+            overview="A movie.",
+            release_date="2024-01-01",
+            rating=5,
+            status="released",
+        )
+        movie.authors.add(author)
+        if i % 2:
+            Favorite.objects.create(spectator=spectator, movie=movie)
+        if i % 3 == 0:
+            Rating.objects.create(spectator=spectator, movie=movie, rating=i + 1)
+    return spectator
+
+
+@pytest.mark.django_db
+def test_movies_carry_user_state(spectator):
+    """
+    Test that movies carry the favorite state and rating of the authenticated user.
+    """
+    client = APIClient()
+    client.force_authenticate(spectator)
+    movies = client.get("/api/movies/").data
+    assert [m["is_favorite"] for m in movies] == [False, True] * 3
+    assert [m["my_rating"] for m in movies] == [1, None, None, 4, None, None]
+
+    movie = client.get(f"/api/movies/{movies[3]['id']}/").data["movie"]
+    assert movie["is_favorite"] is True
+    assert movie["my_rating"] == 4
+
+    movies = APIClient().get("/api/movies/").data
+    assert {(m["is_favorite"], m["my_rating"]) for m in movies} == {(None, None)}
+
+
+@pytest.mark.django_db
+def test_user_state_adds_no_query_per_movie(spectator):
+    """
+    Test that a personalized page costs the same queries whatever its size.
+    """
+    client = APIClient()
+    client.force_authenticate(spectator)
+    # The count itself depends on the backend (estimated counts are PostgreSQL only)
+    queries = []
+    for page_size in [2, 6]:
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f"/api/movies/?page_size={page_size}")
+        assert len(response.data["results"]) == page_size
+        queries.append(len(context.captured_queries))
+    assert queries[0] == queries[1]